@@ -11,9 +11,15 @@ python manage.py collectstatic --noinput
 echo "==> Running migrations..."
 python manage.py migrate --noinput
 
+echo "==> Creating cache table..."
+python manage.py createcachetable
+
 echo "==> Loading data fixtures..."
 python manage.py loaddata fixtures/data.json
 
+echo "==> Rebuilding dish indexes..."
+python manage.py reindex_dishes
+
 echo "==> Starting gunicorn..."
 exec gunicorn graze_api.wsgi:application \
     --bind 0.0.0.0:8000 \
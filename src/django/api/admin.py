@@ -1,7 +1,26 @@
 from django.contrib import admin
 from django.utils.html import mark_safe
 from unfold.admin import ModelAdmin, TabularInline
-from .models import Restaurant, MenuItem, DataFlag, RestaurantLocation, LocationFlag, ByoComponent
+from .models import (
+    Restaurant, MenuItem, DataFlag, RestaurantLocation, LocationFlag, ByoComponent, DataVersion, Category,
+    CategoryAlias,
+)
+
+
+class CatalogAdminMixin:
+    """Collapse the catalog version bumps of one admin request (inlines, list edits, bulk actions) into one."""
+
+    def changeform_view(self, *args, **kwargs):
+        with DataVersion.deferred():
+            return super().changeform_view(*args, **kwargs)
+
+    def changelist_view(self, *args, **kwargs):
+        with DataVersion.deferred():
+            return super().changelist_view(*args, **kwargs)
+
+    def delete_view(self, *args, **kwargs):
+        with DataVersion.deferred():
+            return super().delete_view(*args, **kwargs)
 
 
 class MenuItemInline(TabularInline):
@@ -18,7 +37,7 @@ class ByoComponentInline(TabularInline):
 
 
 @admin.register(Restaurant)
-class RestaurantAdmin(ModelAdmin):
+class RestaurantAdmin(CatalogAdminMixin, ModelAdmin):
     list_display = ['name', 'slug', 'icon_thumb', 'item_count', 'location_count', 'has_byo', 'last_updated']
     search_fields = ['name', 'slug']
     prepopulated_fields = {'slug': ('name',)}
@@ -51,12 +70,30 @@ class RestaurantAdmin(ModelAdmin):
 
 
 @admin.register(MenuItem)
-class MenuItemAdmin(ModelAdmin):
+class MenuItemAdmin(CatalogAdminMixin, ModelAdmin):
     list_display = ['name', 'restaurant', 'category', 'calories', 'protein', 'carbs', 'fat', 'density_label', 'is_available']
-    list_filter = ['restaurant', 'category', 'is_available']
+    list_filter = ['restaurant', 'canonical_category', 'density_label', 'is_available']
     search_fields = ['name', 'restaurant__name']
 
 
+class CategoryAliasInline(TabularInline):
+    model = CategoryAlias
+    extra = 1
+    fields = ['key']
+
+
+@admin.register(Category)
+class CategoryAdmin(CatalogAdminMixin, ModelAdmin):
+    list_display = ['name', 'slug', 'dish_count']
+    search_fields = ['name', 'slug', 'aliases__key']
+    prepopulated_fields = {'slug': ('name',)}
+    inlines = [CategoryAliasInline]
+
+    @admin.display(description='Dishes')
+    def dish_count(self, obj):
+        return obj.menu_items.count()
+
+
 @admin.register(DataFlag)
 class DataFlagAdmin(ModelAdmin):
     list_display = ['menu_item', 'flag_type', 'resolved', 'created_at']
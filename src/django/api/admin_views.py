@@ -6,10 +6,11 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.utils import timezone
-from .models import Restaurant, MenuItem, ByoComponent, RestaurantLocation
+from .models import DataVersion, Restaurant, MenuItem, ByoComponent, RestaurantLocation
 
 
 @staff_member_required
+@DataVersion.deferred()
 def import_menu_items(request):
     """Import menu items from CSV file."""
     restaurants = Restaurant.objects.all()
@@ -79,6 +80,7 @@ def import_menu_items(request):
 
 
 @staff_member_required
+@DataVersion.deferred()
 def import_locations(request):
     """Import restaurant locations from CSV file."""
     restaurants = Restaurant.objects.all()
@@ -159,6 +161,7 @@ def import_locations(request):
 
 
 @staff_member_required
+@DataVersion.deferred()
 def parse_nutrition_pdf(request):
     """Parse a nutrition PDF using pdfplumber + Claude API."""
     restaurants = Restaurant.objects.all()
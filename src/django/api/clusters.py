@@ -0,0 +1,183 @@
+"""Map marker clusters of active locations for every zoom level (supercluster-style).
+
+Each worker precomputes the clusters of all zoom levels once per locations
+DataVersion. Locations are projected to Web Mercator in [0, 1]. Starting
+at MAX_ZOOM, each level is built from the level below it: every point or
+cluster not yet taken gathers all untaken neighbours within RADIUS pixels
+at that zoom (found through a grid of radius-sized buckets) into one
+cluster. The cluster sits at their count-weighted centroid and keeps a
+per-restaurant count. Its id, "c<zoom it formed at>-<smallest location
+id>", never collides with a location id and survives rebuilds while the
+membership is unchanged. A request then only reads one level, through a
+bisect on its x-sorted column, so its cost depends on what is visible
+rather than on how many locations exist.
+"""
+import bisect
+import math
+
+from rest_framework.exceptions import ValidationError
+
+from .models import DataVersion, RestaurantLocation
+from .versioning import VersionedCache
+
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+# Zooms above MAX_ZOOM show the unclustered locations
+MAX_QUERY_ZOOM = 24
+# Cluster radius in pixels, for tiles EXTENT pixels wide
+RADIUS = 60
+EXTENT = 512
+
+
+def project(lat, lng):
+    """Web Mercator (x, y) in [0, 1], y growing southwards."""
+    sin = math.sin(math.radians(lat))
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi if abs(sin) < 1 else (0.0 if sin > 0 else 1.0)
+    return lng / 360 + 0.5, min(max(y, 0.0), 1.0)
+
+
+def wrap_longitude(lng):
+    return (lng + 180) % 360 - 180 if not -180 <= lng <= 180 else lng
+
+
+def unproject(x, y):
+    """(lat, lng) of a Web Mercator point."""
+    return math.degrees(2 * math.atan(math.exp(math.pi * (1 - 2 * y)))) - 90, (x - 0.5) * 360
+
+
+class Node:
+    """A location (id is the location id) or a cluster at one zoom level (id is a "c" string)."""
+
+    __slots__ = ('id', 'x', 'y', 'count', 'restaurants', 'expansion_zoom', 'anchor')
+
+    def __init__(self, id, x, y, count, restaurants, expansion_zoom=None, anchor=None):
+        self.id = id
+        self.x = x
+        self.y = y
+        self.count = count
+        self.restaurants = restaurants
+        self.expansion_zoom = expansion_zoom
+        # Smallest location id inside the node
+        self.anchor = id if anchor is None else anchor
+
+    @property
+    def is_cluster(self):
+        return self.expansion_zoom is not None
+
+
+class Level:
+    """The nodes shown at one zoom, sorted by x for box queries."""
+
+    def __init__(self, nodes):
+        self.nodes = sorted(nodes, key=lambda node: (node.x, node.y, node.anchor))
+        self.xs = [node.x for node in self.nodes]
+
+    def in_box(self, min_x, max_x, min_y, max_y):
+        start = bisect.bisect_left(self.xs, min_x)
+        end = bisect.bisect_right(self.xs, max_x)
+        return [node for node in self.nodes[start:end] if min_y <= node.y <= max_y]
+
+
+class ClusterIndex:
+    """One Level per zoom from MIN_ZOOM to MAX_ZOOM, plus the unclustered locations above it."""
+
+    def __init__(self, rows):
+        """`rows` are (id, restaurant_id, latitude, longitude) tuples."""
+        nodes = [
+            Node(pk, *project(float(lat), float(lng)), 1, {restaurant_id: 1})
+            for pk, restaurant_id, lat, lng in rows
+        ]
+        self.total = len(nodes)
+        self.levels = {MAX_ZOOM + 1: Level(nodes)}
+        for zoom in range(MAX_ZOOM, MIN_ZOOM - 1, -1):
+            nodes = self._cluster(nodes, zoom)
+            self.levels[zoom] = Level(nodes)
+
+    @classmethod
+    def build(cls):
+        return cls(RestaurantLocation.objects.filter(is_active=True).order_by('id').values_list(
+            'id', 'restaurant_id', 'latitude', 'longitude',
+        ))
+
+    def _cluster(self, nodes, zoom):
+        """Merge the nodes of zoom + 1 into the nodes shown at `zoom`."""
+        radius = RADIUS / (EXTENT * 2 ** zoom)
+        limit = radius * radius
+        # Buckets one radius wide: every neighbour is in the 3x3 buckets around a node
+        buckets = {}
+        for index, node in enumerate(nodes):
+            buckets.setdefault((int(node.x / radius), int(node.y / radius)), []).append(index)
+        taken = [False] * len(nodes)
+        merged = []
+        for index, node in enumerate(nodes):
+            if taken[index]:
+                continue
+            column, row = int(node.x / radius), int(node.y / radius)
+            neighbours = [
+                other
+                for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                for other in buckets.get((column + dx, row + dy), ())
+                if not taken[other] and (nodes[other].x - node.x) ** 2 + (nodes[other].y - node.y) ** 2 <= limit
+            ]
+            for other in neighbours:
+                taken[other] = True
+            if len(neighbours) == 1:
+                merged.append(node)
+                continue
+            members = [nodes[other] for other in neighbours]
+            count = sum(member.count for member in members)
+            restaurants = {}
+            for member in members:
+                for restaurant_id, restaurant_count in member.restaurants.items():
+                    restaurants[restaurant_id] = restaurants.get(restaurant_id, 0) + restaurant_count
+            anchor = min(member.anchor for member in members)
+            merged.append(Node(
+                f'c{zoom}-{anchor}',
+                sum(member.x * member.count for member in members) / count,
+                sum(member.y * member.count for member in members) / count,
+                count,
+                restaurants,
+                expansion_zoom=zoom + 1,
+                anchor=anchor,
+            ))
+        return merged
+
+    def clusters(self, zoom, bbox=None):
+        """Nodes shown at `zoom` inside `bbox` (min_lat, min_lng, max_lat, max_lng), or everywhere."""
+        level = self.levels[min(max(zoom, MIN_ZOOM), MAX_ZOOM + 1)]
+        if bbox is None:
+            return list(level.nodes)
+        min_lat, min_lng, max_lat, max_lng = bbox
+        min_x, max_y = project(min_lat, min_lng)
+        max_x, min_y = project(max_lat, max_lng)
+        if min_lng > max_lng:
+            # Crosses the antimeridian
+            return level.in_box(min_x, 1.0, min_y, max_y) + level.in_box(0.0, max_x, min_y, max_y)
+        return level.in_box(min_x, max_x, min_y, max_y)
+
+
+cluster_index = VersionedCache(DataVersion.LOCATIONS, ClusterIndex.build)
+
+
+def parse_cluster_query(params):
+    """Parse zoom (fractions rounded down) and an optional bbox for the clusters endpoint."""
+    try:
+        zoom = math.floor(float(params.get('zoom', '')))
+    except (ValueError, OverflowError):
+        raise ValidationError({'zoom': 'zoom must be a number'})
+    if not MIN_ZOOM <= zoom <= MAX_QUERY_ZOOM:
+        raise ValidationError({'zoom': f'zoom must be between {MIN_ZOOM} and {MAX_QUERY_ZOOM}'})
+
+    bbox = params.get('bbox', '').strip()
+    if not bbox:
+        return zoom, None
+    try:
+        sw_lat, sw_lng, ne_lat, ne_lng = [float(value.strip()) for value in bbox.split(',')]
+    except ValueError:
+        raise ValidationError({'bbox': 'bbox must be 4 comma-separated numbers: sw_lat,sw_lng,ne_lat,ne_lng'})
+    if not -90 <= sw_lat <= ne_lat <= 90 or not ne_lng >= sw_lng:
+        raise ValidationError({'bbox': 'bbox latitudes must be within ±90 and ne must not be south or west of sw'})
+    if ne_lng - sw_lng >= 360:
+        return zoom, (sw_lat, -180.0, ne_lat, 180.0)
+    # Maps report longitudes past ±180 after panning across the antimeridian
+    return zoom, (sw_lat, wrap_longitude(sw_lng), ne_lat, wrap_longitude(ne_lng))
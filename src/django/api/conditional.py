@@ -0,0 +1,46 @@
+"""Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Validators come from DataVersion counters, not from the rendered body, so
+a request whose If-None-Match still matches gets its 304 after a single
+indexed lookup, before any queryset is evaluated or serialized.
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+
+def data_versions(request, *names):
+    """DataVersion.state() for the named counters, looked up at most once per request."""
+    memo = request.__dict__.setdefault('_data_versions', {})
+    if names not in memo:
+        memo[names] = DataVersion.state(*names)
+    return memo[names]
+
+
+def versioned(*names):
+    """View decorator adding a strong ETag and Last-Modified driven by the named versions.
+
+    A name may also be a callable taking the request and returning names, for
+    views whose dependencies vary with the query string. The ETag also covers
+    the full path and the Accept header, because the same data renders
+    differently per query string and per negotiated format.
+    """
+
+    def resolve(request):
+        resolved = []
+        for name in names:
+            resolved.extend(name(request) if callable(name) else [name])
+        return tuple(resolved)
+
+    def etag(request, *args, **kwargs):
+        versions, _ = data_versions(request, *resolve(request))
+        variant = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+        digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+        return f"{'.'.join(str(version) for version in versions)}-{digest}"
+
+    def last_modified(request, *args, **kwargs):
+        return data_versions(request, *resolve(request))[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
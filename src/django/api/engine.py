@@ -0,0 +1,153 @@
+"""Optional in-memory columnar engine for dish listings.
+
+The whole available catalog is loaded into NumPy column arrays once per
+worker and rebuilt when the catalog DataVersion changes. Filters are
+evaluated as vectorized boolean masks. Sorting and pagination use
+argpartition plus lexsort with id as the tie-breaker, so pages match the
+ORM ordering exactly. The engine returns only the page's ids; the view
+then loads those rows with a single primary-key query.
+
+Enable with DISH_QUERY_ENGINE=columnar. When the setting is off, or NumPy
+is not installed, DishListView uses the ORM path, as it always does for
+search and for the name sort (see DishColumns.supports).
+"""
+from django.conf import settings
+
+from .models import DataVersion, MenuItem, Restaurant
+from .queries import DENSITY_LABELS, DIET_FIELDS
+from .versioning import VersionedCache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the ORM path is always available
+    np = None
+
+
+class DishColumns:
+    """Column arrays for every available menu item."""
+
+    NUMERIC_COLUMNS = ['calories', 'protein', 'carbs', 'fat', 'protein_per_100cal', 'fiber', 'sodium', 'sugar',
+                       'saturated_fat']
+
+    def __init__(self, rows, restaurant_ids):
+        rows = list(rows)
+        self.restaurant_ids = restaurant_ids
+        self.ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.restaurant = np.array([row['restaurant_id'] for row in rows], dtype=np.int64)
+        self.restaurant_values, self.restaurant_index = np.unique(self.restaurant, return_inverse=True)
+        self.columns = {
+            # NULL is NaN, so it fails every range comparison like it does in SQL
+            name: np.array([np.nan if row[name] is None else float(row[name]) for row in rows], dtype=np.float64)
+            for name in self.NUMERIC_COLUMNS
+        }
+
+        self.density_code = np.array([DENSITY_LABELS.index(row['density_label']) for row in rows], dtype=np.int8)
+        self.diets = {
+            diet: np.array([row[field] for row in rows], dtype=bool)
+            for diet, field in DIET_FIELDS.items()
+        }
+
+        self.category = np.array([row['canonical_category_id'] or 0 for row in rows], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls):
+        rows = MenuItem.objects.filter(is_available=True).values(
+            'id', 'restaurant_id', 'canonical_category_id', 'density_label', *DIET_FIELDS.values(), *cls.NUMERIC_COLUMNS
+        )
+        return cls(rows, dict(Restaurant.objects.values_list('slug', 'id')))
+
+    def supports(self, query):
+        """Whether this engine can answer the query.
+
+        Search needs the database, and so does alpha_asc: name order follows
+        the database collation, which Python's code point order does not match
+        on Postgres, so pages and cursors would differ between the two paths.
+        """
+        return not query.search and query.sort_field != 'name'
+
+    def mask(self, query):
+        """Boolean mask of rows that pass every filter in the query."""
+        mask = np.ones(len(self), dtype=bool)
+        for field, lookup, value in query.ranges:
+            column = self.columns[field]
+            if lookup == 'gte':
+                mask &= column >= float(value)
+            else:
+                mask &= column <= float(value)
+
+        if query.category:
+            mask &= np.isin(self.category, query.category_ids)
+
+        if query.restaurants:
+            ids = [self.restaurant_ids[slug] for slug in query.restaurants if slug in self.restaurant_ids]
+            mask &= np.isin(self.restaurant, ids)
+
+        if query.density:
+            mask &= np.isin(self.density_code, [DENSITY_LABELS.index(label) for label in query.density])
+
+        for diet in query.diets:
+            mask &= self.diets[diet]
+
+        if query.near_only:
+            mask &= np.isin(self.restaurant, list(query.distances))
+
+        if query.sort == 'protein_ratio_desc':
+            mask &= self.columns['calories'] > 0
+        return mask
+
+    def distance_column(self, distances):
+        """Per-row distance to the restaurant's nearest location (NaN when it has none)."""
+        per_restaurant = np.array([distances.get(pk, np.nan) for pk in self.restaurant_values.tolist()])
+        return per_restaurant[self.restaurant_index]
+
+    def select(self, query, offset, limit, after=None):
+        """Return (ids, total) for one page of the query.
+
+        `after` is a decoded (value, id) cursor position. `total` counts every
+        filtered row and ignores the cursor.
+        """
+        field = query.sort_field
+        descending = query.ordering.startswith('-')
+        key = self.distance_column(query.distances) if field == 'distance_miles' else self.columns[field]
+
+        mask = self.mask(query)
+        total = int(mask.sum())
+        if after is not None:
+            # NULL (NaN) values come last in either direction, like the ORM's NULLS LAST
+            value, pk = after
+            later_ids = self.ids < pk if descending else self.ids > pk
+            if value is None:
+                mask &= np.isnan(key) & later_ids
+            else:
+                value = float(value)
+                later_keys = key < value if descending else key > value
+                mask &= later_keys | ((key == value) & later_ids) | np.isnan(key)
+
+        rows = np.flatnonzero(mask)
+        end = offset + limit
+        if end <= 0 or rows.size == 0:
+            return [], total
+
+        sort_key = -key[rows] if descending else key[rows]
+        sort_key[np.isnan(sort_key)] = np.inf
+        tiebreak = -self.ids[rows] if descending else self.ids[rows]
+        if end < rows.size:
+            # Keep only the first `end` keys, plus any ties at the boundary
+            boundary = sort_key[np.argpartition(sort_key, end - 1)[:end]].max()
+            keep = sort_key <= boundary
+            rows, sort_key, tiebreak = rows[keep], sort_key[keep], tiebreak[keep]
+        order = np.lexsort((tiebreak, sort_key))[offset:end]
+        return self.ids[rows[order]].tolist(), total
+
+
+_dish_columns = VersionedCache(DataVersion.CATALOG, DishColumns.build) if np is not None else None
+
+
+def get_dish_engine():
+    """The current columnar snapshot, or None when the engine is disabled."""
+    if _dish_columns is None or getattr(settings, 'DISH_QUERY_ENGINE', 'orm') != 'columnar':
+        return None
+    return _dish_columns.get()
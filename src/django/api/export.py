@@ -0,0 +1,95 @@
+"""Streaming export of every active location as GeoJSON or NDJSON.
+
+Rows are read with .iterator() (a server-side cursor on Postgres) and
+encoded chunk by chunk, optionally through a streaming gzip compressor, so
+memory stays flat however many locations there are. Used by the
+/locations/export.<format> endpoint and the export_locations command.
+"""
+import json
+import zlib
+
+from .models import RestaurantLocation
+
+FORMATS = {
+    'geojson': 'application/geo+json',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+# Encoded text is handed on in pieces of about this many characters
+BUFFER_SIZE = 64 * 1024
+
+PROPERTIES = ['name', 'address', 'city', 'state', 'postcode', 'country', 'phone', 'is_verified']
+
+
+def location_features(chunk_size=CHUNK_SIZE):
+    """GeoJSON Feature dicts for all active locations, ordered by id, fetched `chunk_size` rows at a time."""
+    rows = RestaurantLocation.objects.filter(is_active=True).order_by('id').values_list(
+        'id', 'latitude', 'longitude', 'restaurant__slug', 'restaurant__name', *PROPERTIES,
+    )
+    for pk, lat, lng, slug, restaurant_name, *values in rows.iterator(chunk_size=chunk_size):
+        properties = {'restaurant_slug': slug, 'restaurant_name': restaurant_name}
+        properties.update(zip(PROPERTIES, values))
+        yield {
+            'type': 'Feature',
+            'id': pk,
+            'geometry': {'type': 'Point', 'coordinates': [float(lng), float(lat)]},
+            'properties': properties,
+        }
+
+
+def _buffered(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _geojson_pieces(features):
+    yield '{"type":"FeatureCollection","features":['
+    for index, feature in enumerate(features):
+        yield (',' if index else '') + json.dumps(feature, separators=(',', ':'))
+    yield ']}\n'
+
+
+def _ndjson_pieces(features):
+    for feature in features:
+        yield json.dumps(feature, separators=(',', ':')) + '\n'
+
+
+def encode(features, export_format):
+    """Text chunks of the features in 'geojson' or 'ndjson'."""
+    pieces = _geojson_pieces(features) if export_format == 'geojson' else _ndjson_pieces(features)
+    return _buffered(pieces)
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip, honouring q-values (gzip;q=0 refuses it)."""
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    # An explicit gzip entry wins over the * wildcard
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks into a stream of bytes."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
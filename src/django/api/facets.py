@@ -0,0 +1,102 @@
+"""Facet counts for the dish filter drawer."""
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Q
+
+from config.models import FilterConfiguration
+
+from .models import DataVersion, MenuItem
+
+FACET_CACHE_TIMEOUT = 60 * 60
+
+
+def get_dish_facets(query):
+    """Facet counts for a DishQuery, cached per normalized query and data version."""
+    filter_configs = list(FilterConfiguration.objects.filter(is_active=True))
+    key = query.cache_key(
+        'dish-facets',
+        DataVersion.state(*query.version_names)[0],
+        [(config.name, config.options) for config in filter_configs],
+    )
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_dish_facets(query, filter_configs)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+def compute_dish_facets(query, filter_configs):
+    """Count matching dishes per restaurant, category, density label and range bucket.
+
+    Everything comes from a single GROUP BY query. Each FilterConfiguration
+    option becomes a conditional COUNT, using the same inclusive min/max
+    semantics as the DishListView range filters.
+    """
+    buckets = []
+    aggregates = {'dish_count': Count('id')}
+    for config in filter_configs:
+        try:
+            MenuItem._meta.get_field(config.name)
+        except FieldDoesNotExist:
+            continue
+        for option in config.options:
+            condition = Q()
+            if option.get('min') is not None:
+                condition &= Q(**{f'{config.name}__gte': option['min']})
+            if option.get('max') is not None:
+                condition &= Q(**{f'{config.name}__lte': option['max']})
+            alias = f'bucket_{len(buckets)}'
+            aggregates[alias] = Count('id', filter=condition) if condition else Count('id')
+            buckets.append((config.name, option, alias))
+
+    groups = (
+        query.filter(MenuItem.objects.filter(is_available=True))
+        .values('restaurant__slug', 'restaurant__name', 'canonical_category__slug', 'canonical_category__name',
+                'density_label')
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+    total = 0
+    restaurants = Counter()
+    restaurant_names = {}
+    categories = Counter()
+    category_names = {}
+    density = Counter()
+    bucket_counts = Counter()
+    for group in groups:
+        count = group['dish_count']
+        total += count
+        restaurants[group['restaurant__slug']] += count
+        restaurant_names[group['restaurant__slug']] = group['restaurant__name']
+        slug = group['canonical_category__slug']
+        categories[slug] += count
+        category_names[slug] = group['canonical_category__name']
+        density[group['density_label']] += count
+        for _, _, alias in buckets:
+            bucket_counts[alias] += group[alias]
+
+    ranges = {}
+    for name, option, alias in buckets:
+        ranges.setdefault(name, []).append({
+            'label': option['label'],
+            'min': option.get('min'),
+            'max': option.get('max'),
+            'count': bucket_counts[alias],
+        })
+
+    return {
+        'total': total,
+        'restaurants': [
+            {'slug': slug, 'name': restaurant_names[slug], 'count': count}
+            for slug, count in restaurants.most_common()
+        ],
+        'categories': [
+            {'value': category_names[slug], 'slug': slug, 'count': count}
+            for slug, count in categories.most_common() if slug
+        ],
+        'density': {label: density[label] for label, _ in MenuItem.DENSITY_CHOICES},
+        'ranges': ranges,
+    }
@@ -0,0 +1,119 @@
+"""Fast-path list serializers that build plain dicts from .values() rows.
+
+DRF's ModelSerializer builds a nested RestaurantListSerializer, resolves
+`logo.url` and runs DecimalField formatting for every row. Here each row
+is a `.values()` dict: decimals are already quantized by the database
+converter and only need formatting, and each restaurant is serialized once
+per response and shared by all of its rows. The output matches
+MenuItemListSerializer and LocationListSerializer exactly
+(see FastSerializerParityTests).
+
+Enable with FAST_SERIALIZERS=True.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+
+from .sideload import serialize_restaurants
+
+
+def fast_serializers_enabled():
+    return getattr(settings, 'FAST_SERIALIZERS', False)
+
+
+def decimal_string(value):
+    """Format a model DecimalField value the way DRF does (already quantized by the DB)."""
+    return None if value is None else f'{value:f}'
+
+
+def rounded_string(places):
+    """Format a float annotation like a DRF DecimalField with `places` decimal places."""
+    exponent = Decimal(1).scaleb(-places)
+
+    def convert(value):
+        if value is None:
+            return None
+        return f'{Decimal(str(value)).quantize(exponent):f}'
+    return convert
+
+
+class FastListSerializer:
+    """Serialize .values() rows of a model with a nested `restaurant` object.
+
+    With `sideload`, rows carry `restaurant_id` instead and the caller builds
+    the `included` block (see api/sideload.py). `fields` and
+    `restaurant_fields` are sparse fieldsets (see api/fieldsets.py).
+    """
+
+    # Output keys in the order the DRF serializer emits them
+    fields = []
+    # Per-field formatting; fields not listed pass through unchanged
+    converters = {}
+    # Annotations that are only present on some querysets; DRF omits them when absent
+    annotations = []
+
+    def __init__(self, sideload=False, fields=None, restaurant_fields=None):
+        self.sideload = sideload
+        if fields is not None:
+            self.fields = [field for field in self.fields if field in fields]
+        self.restaurant_fields = restaurant_fields
+
+    @property
+    def columns(self):
+        """Columns to request from .values()."""
+        skip = {'restaurant', *self.annotations}
+        columns = [field for field in self.fields if field not in skip]
+        if 'restaurant' in self.fields:
+            columns.append('restaurant_id')
+        return columns
+
+    def values(self, queryset, *extra):
+        """Narrow a queryset to the columns this serializer needs, plus any `extra`."""
+        columns = self.columns
+        return queryset.values(*columns, *[name for name in extra if name not in columns])
+
+    def serialize(self, rows):
+        rows = list(rows)
+        if 'restaurant' in self.fields and not self.sideload:
+            restaurants = serialize_restaurants({row['restaurant_id'] for row in rows}, self.restaurant_fields)
+        converters = self.converters
+        output = []
+        for row in rows:
+            item = {}
+            for field in self.fields:
+                if field == 'restaurant':
+                    if self.sideload:
+                        item['restaurant_id'] = row['restaurant_id']
+                    else:
+                        item[field] = restaurants[row['restaurant_id']]
+                elif field in row:
+                    value = row[field]
+                    item[field] = converters[field](value) if field in converters else value
+            output.append(item)
+        return output
+
+
+class FastMenuItemListSerializer(FastListSerializer):
+    """Same output as MenuItemListSerializer."""
+
+    fields = ['id', 'name', 'restaurant', 'category', 'serving_size', 'calories', 'protein', 'carbs', 'fat',
+              'protein_per_100cal', 'density_label', 'image_url']
+    converters = {
+        'protein': decimal_string,
+        'carbs': decimal_string,
+        'fat': decimal_string,
+        'protein_per_100cal': decimal_string,
+    }
+
+
+class FastLocationListSerializer(FastListSerializer):
+    """Same output as LocationListSerializer."""
+
+    fields = ['id', 'restaurant', 'name', 'latitude', 'longitude', 'address', 'city', 'state', 'postcode',
+              'phone', 'distance_miles', 'is_active']
+    converters = {
+        'latitude': decimal_string,
+        'longitude': decimal_string,
+        'distance_miles': rounded_string(1),
+    }
+    annotations = ['distance_miles']
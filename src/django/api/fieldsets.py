@@ -0,0 +1,83 @@
+"""Sparse fieldsets for list endpoints (`fields=` and `restaurant.fields=`).
+
+Clients name the output fields they need. The same list narrows the SQL
+column list (`only()` / `.values()`) and the serializer output, so smaller
+responses also mean less database and CPU work. `id` is always returned.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+from .serializers import RestaurantListSerializer
+
+RESTAURANT_FIELDS = RestaurantListSerializer.Meta.fields
+# Output fields computed from more than one column
+RESTAURANT_COLUMNS = {'logo_url': ['logo', 'logo_url']}
+
+
+def parse_fields(params, param, available):
+    """Requested fields in `available` order, or None when the parameter is absent."""
+    raw = params.get(param, '').strip()
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = requested - set(available)
+    if unknown:
+        raise ValidationError({
+            param: f"unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}"
+        })
+    return [name for name in available if name in requested or name == 'id']
+
+
+def restaurant_columns(fields=None):
+    """Restaurant model columns needed to serialize `fields` (all list fields when None)."""
+    columns = []
+    for name in fields or RESTAURANT_FIELDS:
+        columns.extend(RESTAURANT_COLUMNS.get(name, [name]))
+    return columns
+
+
+class Fieldset:
+    """Fields requested for one list response."""
+
+    def __init__(self, params, available):
+        self.available = available
+        self.fields = parse_fields(params, 'fields', available)
+        self.restaurant_fields = parse_fields(params, 'restaurant.fields', RESTAURANT_FIELDS)
+
+    def __contains__(self, name):
+        return self.fields is None or name in self.fields
+
+    @property
+    def key(self):
+        """Cache key discriminator."""
+        return [self.fields, self.restaurant_fields]
+
+    @property
+    def serializer_kwargs(self):
+        return {'fields': self.fields, 'restaurant_fields': self.restaurant_fields}
+
+    def narrow(self, queryset, nested=True, extra=()):
+        """Load only the columns the response needs; join the restaurant when it is nested.
+
+        `extra` names columns needed beyond the output, such as the sort key
+        used for cursors. Names that are not model fields (annotations) are
+        ignored here, since annotations are always selected.
+        """
+        nested = nested and 'restaurant' in self
+        if nested:
+            queryset = queryset.select_related('restaurant')
+        if self.fields is None and self.restaurant_fields is None:
+            return queryset
+
+        model = queryset.model
+        columns = []
+        for name in [*(self.fields or self.available), *extra]:
+            try:
+                model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            columns.append(name)
+        if nested:
+            columns.extend(f'restaurant__{column}' for column in restaurant_columns(self.restaurant_fields))
+        return queryset.only(*columns)
+
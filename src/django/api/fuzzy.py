@@ -0,0 +1,174 @@
+"""Typo-tolerant dish search backed by an in-process trigram index.
+
+Each worker builds an inverted index from available menu item names and
+their restaurant names. The index is rebuilt when the catalog DataVersion
+changes. Queries walk the posting lists from rarest to most common
+trigram, scan only the lists that can still produce a match, and stop
+when LATENCY_BUDGET runs out, so response time stays bounded as the
+catalog grows.
+"""
+import heapq
+import math
+import re
+import time
+from collections import Counter, defaultdict
+
+from django.db.models import Case, FloatField, Value, When
+
+from .models import DataVersion, MenuItem
+from .versioning import VersionedCache
+
+# Share of the query's trigrams a dish must contain (pg_trgm's word_similarity default is 0.6)
+SIMILARITY_THRESHOLD = 0.5
+# Minimum Jaccard similarity for a "did you mean" word replacement
+SUGGESTION_THRESHOLD = 0.3
+MAX_RESULTS = 200
+LATENCY_BUDGET = 0.025  # seconds
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted index from trigram to the documents that contain it."""
+
+    def __init__(self, documents):
+        self.keys = []
+        self.texts = []
+        self.sizes = []
+        self.postings = defaultdict(list)
+        for key, text in documents:
+            grams = trigrams(text)
+            if not grams:
+                continue
+            doc = len(self.keys)
+            self.keys.append(key)
+            self.texts.append(text)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(doc)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def overlap(self, grams):
+        """Count shared trigrams per document."""
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        return counts
+
+    def search(self, text, limit=MAX_RESULTS, threshold=SIMILARITY_THRESHOLD, deadline=None):
+        """Return ([(key, score), ...], truncated) ranked by similarity to text.
+
+        Documents must contain at least `threshold` of the query's trigrams, so
+        any match has to appear in one of the rarest (n - needed + 1) posting
+        lists. Only those lists are scanned, and each candidate is verified
+        against its own trigrams. The score blends coverage with Jaccard
+        similarity so that a short, close name ranks above a long name that
+        merely contains the query.
+        """
+        grams = trigrams(text)
+        if not grams:
+            return [], False
+        size = len(grams)
+        needed = max(1, math.ceil(threshold * size))
+        ordered = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+
+        truncated = False
+        candidates = set()
+        for gram in ordered[:size - needed + 1]:
+            candidates.update(self.postings.get(gram, ()))
+            if deadline is not None and time.perf_counter() > deadline:
+                truncated = True
+                break
+
+        scored = []
+        for checked, doc in enumerate(candidates):
+            if deadline is not None and checked % 256 == 255 and time.perf_counter() > deadline:
+                truncated = True
+                break
+            shared = len(grams & trigrams(self.texts[doc]))
+            if shared < needed:
+                continue
+            jaccard = shared / (size + self.sizes[doc] - shared)
+            scored.append((0.75 * shared / size + 0.25 * jaccard, doc))
+        best = heapq.nlargest(limit, scored)
+        return [(self.keys[doc], round(score, 4)) for score, doc in best], truncated
+
+
+class DishFuzzyIndex:
+    """Trigram indexes over dish documents and over the catalog vocabulary."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.dishes = TrigramIndex((pk, f'{name} {restaurant}') for pk, name, category, restaurant in rows)
+
+        frequency = Counter()
+        for pk, name, category, restaurant in rows:
+            frequency.update(WORD_RE.findall(f'{name} {category} {restaurant}'.lower()))
+        self.word_frequency = frequency
+        self.words = TrigramIndex((word, word) for word in frequency)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            MenuItem.objects.filter(is_available=True)
+            .values_list('id', 'name', 'category', 'restaurant__name')
+            .iterator(chunk_size=2000)
+        )
+
+    def search(self, query, limit=MAX_RESULTS, budget=LATENCY_BUDGET):
+        """Return ([(menu_item_id, score), ...], truncated) for a raw query string."""
+        return self.dishes.search(query, limit=limit, deadline=time.perf_counter() + budget)
+
+    def suggest(self, query):
+        """Return a corrected query ("did you mean"), or None when every word is known."""
+        words = WORD_RE.findall(query.lower())
+        corrected = []
+        changed = False
+        for word in words:
+            if word in self.word_frequency or len(word) < 3:
+                corrected.append(word)
+                continue
+            grams = trigrams(word)
+            counts = self.words.overlap(grams)
+            best = None
+            for doc, shared in counts.items():
+                jaccard = shared / (len(grams) + self.words.sizes[doc] - shared)
+                if jaccard < SUGGESTION_THRESHOLD:
+                    continue
+                candidate = (jaccard, self.word_frequency[self.words.keys[doc]], self.words.keys[doc])
+                if best is None or candidate > best:
+                    best = candidate
+            if best is None:
+                corrected.append(word)
+            else:
+                corrected.append(best[2])
+                changed = True
+        return ' '.join(corrected) if changed else None
+
+
+fuzzy_index = VersionedCache(DataVersion.CATALOG, DishFuzzyIndex.build)
+
+
+def fuzzy_search_dishes(queryset, query):
+    """Filter a MenuItem queryset to fuzzy matches annotated with `search_rank`.
+
+    Returns (queryset, did_you_mean).
+    """
+    index = fuzzy_index.get()
+    matches, _ = index.search(query)
+    if not matches:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField())), index.suggest(query)
+    rank = Case(*[When(id=pk, then=Value(score)) for pk, score in matches], output_field=FloatField())
+    queryset = queryset.filter(id__in=[pk for pk, _ in matches]).annotate(search_rank=rank)
+    return queryset, index.suggest(query)
@@ -0,0 +1,140 @@
+"""Distances from a point to restaurant locations.
+
+Radius and bbox searches never compute distances over the whole table.
+Each location stores the cell of a fixed lat/lng grid it falls in
+(RestaurantLocation.grid_cell). Cells are numbered row by row, so a box
+covers one contiguous range of cell numbers per grid row. The partial
+(grid_cell, latitude, longitude) index answers those ranges plus the exact
+bounds check, and exact distances are only computed for the survivors.
+
+Listings that take a user location need, for each restaurant, the distance
+to its nearest active location. That is computed once per request from the
+locations in range, reduced to a minimum per restaurant. Dish rows only look
+the result up by restaurant_id; they are never joined to locations.
+"""
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import ACos, Cos, Radians, Sin
+from rest_framework.exceptions import ValidationError
+
+from .models import RestaurantLocation
+
+EARTH_RADIUS_MILES = 3959.0
+MILES_PER_DEGREE_LAT = 69.0
+# Boxes spanning more grid rows than this skip the cells and use the (latitude, longitude) index
+MAX_CELL_ROWS = 64
+
+
+def parse_point(params):
+    """Parse lat/lng/radius into (lat, lng, radius or None), or None when no location is given."""
+    lat, lng, radius = params.get('lat'), params.get('lng'), params.get('radius')
+    if not lat and not lng:
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+        radius = float(radius) if radius else None
+    except (TypeError, ValueError):
+        raise ValidationError({'lat/lng': 'lat, lng, and radius must be valid numbers'})
+    if not all(math.isfinite(value) for value in (lat, lng, radius or 0)):
+        raise ValidationError({'lat/lng': 'lat, lng, and radius must be finite numbers'})
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or (radius is not None and radius <= 0):
+        raise ValidationError({'lat/lng': 'lat must be within ±90, lng within ±180 and radius positive'})
+    return lat, lng, radius
+
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    """Great-circle distance in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a radius in miles around a point."""
+    d_lat = radius / MILES_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or abs(lat) + d_lat >= 90:
+        d_lng = 180.0  # the circle reaches a pole, so it spans every longitude
+    else:
+        d_lng = min(radius / (MILES_PER_DEGREE_LAT * cos_lat), 180.0)
+    return lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng
+
+
+def longitude_spans(min_lng, max_lng):
+    """[(west, east), ...] within ±180 covering a longitude range that may run past ±180."""
+    if max_lng - min_lng >= 360:
+        return [(-180.0, 180.0)]
+    if min_lng < -180:
+        return [(min_lng + 360, 180.0), (-180.0, max_lng)]
+    if max_lng > 180:
+        return [(min_lng, 180.0), (-180.0, max_lng - 360)]
+    return [(min_lng, max_lng)]
+
+
+def cell_ranges(min_lat, max_lat, min_lng, max_lng):
+    """(first, last) grid_cell ranges covering a box, one per grid row."""
+    columns = RestaurantLocation.GRID_COLUMNS
+    first_row, first_column = divmod(RestaurantLocation.compute_grid_cell(min_lat, min_lng), columns)
+    last_row, last_column = divmod(RestaurantLocation.compute_grid_cell(max_lat, max_lng), columns)
+    return [(row * columns + first_column, row * columns + last_column) for row in range(first_row, last_row + 1)]
+
+
+def in_box(queryset, min_lat, max_lat, min_lng, max_lng):
+    """Restrict a RestaurantLocation queryset to a box: grid cell ranges first, then the exact bounds.
+
+    Longitudes past ±180 wrap around, so a box across the antimeridian is
+    searched as one box on each side of it.
+    """
+    if min_lat > max_lat or min_lng > max_lng:
+        return queryset.none()
+    condition = Q()
+    for west, east in longitude_spans(min_lng, max_lng):
+        span = Q(longitude__gte=west, longitude__lte=east)
+        ranges = cell_ranges(min_lat, max_lat, west, east)
+        if len(ranges) <= MAX_CELL_ROWS:
+            cells = Q()
+            for first, last in ranges:
+                cells |= Q(grid_cell__range=(first, last))
+            span &= cells
+        condition |= span
+    return queryset.filter(condition, latitude__gte=min_lat, latitude__lte=max_lat)
+
+
+def within_radius(queryset, lat, lng, radius):
+    """Locations whose bounding box may hold points within `radius` miles; distances still need checking."""
+    return in_box(queryset, *bounding_box(lat, lng, radius))
+
+
+def annotate_distance(queryset, lat, lng):
+    """Annotate distance_miles (haversine, computed by the database) from a point."""
+    return queryset.annotate(
+        distance_miles=ExpressionWrapper(
+            Value(EARTH_RADIUS_MILES) * ACos(
+                Cos(Radians(Value(lat))) *
+                Cos(Radians(F('latitude'))) *
+                Cos(Radians(F('longitude')) - Radians(Value(lng))) +
+                Sin(Radians(Value(lat))) *
+                Sin(Radians(F('latitude')))
+            ),
+            output_field=FloatField()
+        )
+    )
+
+
+def nearest_location_distances(lat, lng, radius=None):
+    """Map restaurant id -> miles to its nearest active location (within `radius`, when given)."""
+    locations = RestaurantLocation.objects.filter(is_active=True)
+    if radius is not None:
+        locations = within_radius(locations, lat, lng, radius)
+
+    distances = {}
+    for restaurant_id, location_lat, location_lng in locations.values_list('restaurant_id', 'latitude', 'longitude'):
+        miles = haversine_miles(lat, lng, float(location_lat), float(location_lng))
+        if radius is not None and miles > radius:
+            continue
+        if miles < distances.get(restaurant_id, math.inf):
+            distances[restaurant_id] = miles
+    return distances
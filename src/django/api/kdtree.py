@@ -0,0 +1,83 @@
+"""Static KD-tree with per-axis weights, shared by the in-process macro and location indexes."""
+import heapq
+
+LEAF_SIZE = 16
+
+
+class KDTree:
+    """Static KD-tree over points (tuples), searched with per-axis weights."""
+
+    def __init__(self, points, keys):
+        """`keys` are unique, comparable tie-breakers (such as row ids) for equal distances."""
+        self.points = points
+        self.keys = keys
+        self.root = self._build(list(range(len(points))))
+
+    def _build(self, indices):
+        if len(indices) <= LEAF_SIZE:
+            return (None, indices)
+        dims = range(len(self.points[indices[0]]))
+        spread = [
+            max(self.points[i][axis] for i in indices) - min(self.points[i][axis] for i in indices)
+            for axis in dims
+        ]
+        axis = max(dims, key=spread.__getitem__)
+        if spread[axis] == 0:
+            return (None, indices)  # all points identical
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+        split = self.points[indices[middle]][axis]
+        return (axis, split, self._build(indices[:middle]), self._build(indices[middle:]))
+
+    def distance(self, index, target, weights):
+        point = self.points[index]
+        return sum(weight * (point[axis] - value) ** 2 for axis, (value, weight) in enumerate(zip(target, weights)))
+
+    def nearest(self, target, weights, k, accept=None):
+        """Return [(squared distance, index), ...] for the k nearest accepted points."""
+        heap = []  # max-heap of (-distance, -key, index)
+
+        def visit(node):
+            if node[0] is None:
+                for index in node[1]:
+                    if accept is not None and not accept(index):
+                        continue
+                    entry = (-self.distance(index, target, weights), -self.keys[index], index)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+                return
+            axis, split, left, right = node
+            offset = target[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or weights[axis] * offset * offset <= -heap[0][0]:
+                visit(far)
+
+        if k > 0:
+            visit(self.root)
+        return sorted((-distance, index) for distance, _, index in heap)
+
+    def within(self, target, weights, limit, accept=None):
+        """Return [(squared distance, index), ...] for accepted points within squared distance `limit`."""
+        found = []
+
+        def visit(node):
+            if node[0] is None:
+                for index in node[1]:
+                    if accept is not None and not accept(index):
+                        continue
+                    distance = self.distance(index, target, weights)
+                    if distance <= limit:
+                        found.append((distance, self.keys[index], index))
+                return
+            axis, split, left, right = node
+            offset = target[axis] - split
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if weights[axis] * offset * offset <= limit:
+                visit(far)
+
+        visit(self.root)
+        return [(distance, index) for distance, _, index in sorted(found)]
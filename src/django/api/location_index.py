@@ -0,0 +1,131 @@
+"""In-process index of active restaurant locations for radius, bbox and nearest searches.
+
+Each worker keeps every active location as a point on the unit sphere in a
+KD-tree (see api/kdtree.py), rebuilt when the locations DataVersion changes.
+The straight-line (chord) distance between two unit vectors grows with
+their great-circle distance, so a radius in miles becomes a fixed chord
+length and the tree answers radius and k-nearest searches without any
+trigonometry per point. Bbox searches bisect a latitude-sorted column.
+
+Enable with LOCATION_INDEX=True. LocationListView searches with a lat/lng
+and the per-restaurant distances of dish listings then use the index
+instead of SQL.
+"""
+import bisect
+import math
+
+from django.conf import settings
+
+from .geo import EARTH_RADIUS_MILES
+from .kdtree import KDTree
+from .models import DataVersion, RestaurantLocation
+from .versioning import VersionedCache
+
+UNIT_WEIGHTS = (1.0, 1.0, 1.0)
+
+
+def unit_vector(lat, lng):
+    """(x, y, z) of a lat/lng on the unit sphere."""
+    phi, lam = math.radians(lat), math.radians(lng)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_for_miles(miles):
+    """Chord length on the unit sphere spanning a great-circle distance in miles."""
+    return 2 * math.sin(min(miles / EARTH_RADIUS_MILES, math.pi) / 2)
+
+
+def miles_for_chord(chord):
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, chord / 2))
+
+
+class LocationIndex:
+    """KD-tree over the unit vectors of active locations, with restaurant and latitude lookups."""
+
+    def __init__(self, rows):
+        """`rows` are (id, restaurant_id, latitude, longitude) tuples."""
+        rows = list(rows)
+        self.ids = [row[0] for row in rows]
+        self.restaurant_ids = [row[1] for row in rows]
+        self.lats = [float(row[2]) for row in rows]
+        self.lngs = [float(row[3]) for row in rows]
+        self.tree = KDTree([unit_vector(lat, lng) for lat, lng in zip(self.lats, self.lngs)], self.ids)
+        self.lat_order = sorted(range(len(rows)), key=lambda i: (self.lats[i], self.ids[i]))
+        self.sorted_lats = [self.lats[i] for i in self.lat_order]
+        self.by_restaurant = {}
+        for index, restaurant_id in enumerate(self.restaurant_ids):
+            self.by_restaurant.setdefault(restaurant_id, set()).add(index)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls):
+        return cls(RestaurantLocation.objects.filter(is_active=True).values_list(
+            'id', 'restaurant_id', 'latitude', 'longitude',
+        ))
+
+    def candidates(self, restaurant_ids=None):
+        """Indices of the given restaurants' locations, or None when not filtered."""
+        if restaurant_ids is None:
+            return None
+        allowed = set()
+        for restaurant_id in restaurant_ids:
+            allowed |= self.by_restaurant.get(restaurant_id, set())
+        return allowed
+
+    def _matches(self, found):
+        return [(self.ids[index], miles_for_chord(math.sqrt(distance))) for distance, index in found]
+
+    def within(self, lat, lng, radius, restaurant_ids=None):
+        """[(location id, miles), ...] within `radius` miles, nearest first (ties by id)."""
+        allowed = self.candidates(restaurant_ids)
+        accept = None if allowed is None else allowed.__contains__
+        limit = chord_for_miles(radius) ** 2
+        return self._matches(self.tree.within(unit_vector(lat, lng), UNIT_WEIGHTS, limit, accept))
+
+    def nearest(self, lat, lng, k, restaurant_ids=None):
+        """[(location id, miles), ...] for the k nearest locations."""
+        allowed = self.candidates(restaurant_ids)
+        accept = None if allowed is None else allowed.__contains__
+        return self._matches(self.tree.nearest(unit_vector(lat, lng), UNIT_WEIGHTS, k, accept))
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng, restaurant_ids=None):
+        """Indices of locations inside a lat/lng box (bounds inclusive), in no particular order."""
+        allowed = self.candidates(restaurant_ids)
+        start = bisect.bisect_left(self.sorted_lats, min_lat)
+        end = bisect.bisect_right(self.sorted_lats, max_lat)
+        return [
+            index for index in self.lat_order[start:end]
+            if min_lng <= self.lngs[index] <= max_lng and (allowed is None or index in allowed)
+        ]
+
+    def restaurant_distances(self, lat, lng, radius=None):
+        """Restaurant id -> miles to its nearest location (within `radius`, when given)."""
+        point = unit_vector(lat, lng)
+        if radius is None:
+            found = ((self.tree.distance(index, point, UNIT_WEIGHTS), index) for index in range(len(self)))
+        else:
+            found = self.tree.within(point, UNIT_WEIGHTS, chord_for_miles(radius) ** 2)
+        nearest = {}
+        for distance, index in found:
+            restaurant_id = self.restaurant_ids[index]
+            if distance < nearest.get(restaurant_id, math.inf):
+                nearest[restaurant_id] = distance
+        return {restaurant_id: miles_for_chord(math.sqrt(distance)) for restaurant_id, distance in nearest.items()}
+
+    def distances(self, indices, lat, lng):
+        """[(location id, miles), ...] from a point to the given locations, nearest first (ties by id)."""
+        point = unit_vector(lat, lng)
+        found = sorted((self.tree.distance(index, point, UNIT_WEIGHTS), self.ids[index], index) for index in indices)
+        return self._matches((distance, index) for distance, _, index in found)
+
+
+_location_index = VersionedCache(DataVersion.LOCATIONS, LocationIndex.build)
+
+
+def get_location_index():
+    """The current location index, or None when it is disabled."""
+    if not getattr(settings, 'LOCATION_INDEX', False):
+        return None
+    return _location_index.get()
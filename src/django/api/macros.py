@@ -0,0 +1,169 @@
+"""Nearest-neighbour dish search around a macro target ("closest to 50P/40C/15F").
+
+Each worker keeps a KD-tree over the (calories, protein, carbs, fat) matrix of
+available dishes, rebuilt when the catalog DataVersion changes. Every
+dimension is divided by its standard deviation across the catalog, so a
+gram of fat and a calorie are comparable. Queries pass per-dimension
+weights at search time. The tree stays valid because the distance is a sum
+of independent per-axis terms, and a split plane's lower bound is just
+that axis's weighted term.
+
+Restaurant and diet filters are resolved to candidate sets up front. Small
+candidate sets are compared directly, and larger ones are searched in the
+tree with the filter applied at the leaves. A target on a single dimension
+cannot prune on the other axes, so it walks outward from a bisect on that
+dimension's sorted column instead.
+"""
+import bisect
+import heapq
+import math
+import statistics
+
+from rest_framework.exceptions import ValidationError
+
+from .kdtree import KDTree
+from .models import DataVersion, MenuItem, Restaurant
+from .queries import DIET_FIELDS, parse_choices
+from .versioning import VersionedCache
+
+DIMENSIONS = ['calories', 'protein', 'carbs', 'fat']
+DEFAULT_K = 10
+MAX_K = 50
+# Filtered candidate sets up to this size are compared directly instead of searched in the tree
+BRUTE_FORCE_LIMIT = 2000
+
+
+class MacroIndex:
+    """KD-tree over normalized macros of every available dish, with filter lookups."""
+
+    def __init__(self, rows, restaurant_ids):
+        rows = list(rows)
+        self.ids = [row['id'] for row in rows]
+        self.restaurant_ids = restaurant_ids
+        columns = {dim: [float(row[dim]) for row in rows] for dim in DIMENSIONS}
+        self.scales = {
+            dim: (statistics.pstdev(values) if len(values) > 1 else 0.0) or 1.0
+            for dim, values in columns.items()
+        }
+        points = [
+            tuple(float(row[dim]) / self.scales[dim] for dim in DIMENSIONS)
+            for row in rows
+        ]
+        self.tree = KDTree(points, self.ids)
+        self.sorted_axes = []
+        for axis in range(len(DIMENSIONS)):
+            order = sorted(range(len(points)), key=lambda i: (points[i][axis], self.ids[i]))
+            self.sorted_axes.append((order, [points[i][axis] for i in order]))
+
+        self.by_restaurant = {}
+        for index, row in enumerate(rows):
+            self.by_restaurant.setdefault(row['restaurant_id'], set()).add(index)
+        self.by_diet = {
+            diet: {index for index, row in enumerate(rows) if row[field]}
+            for diet, field in DIET_FIELDS.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls):
+        rows = MenuItem.objects.filter(is_available=True).values(
+            'id', 'restaurant_id', *DIMENSIONS, *DIET_FIELDS.values()
+        )
+        return cls(rows, dict(Restaurant.objects.values_list('slug', 'id')))
+
+    def candidates(self, restaurants=(), diets=()):
+        """Indices allowed by the filters, or None when nothing is filtered."""
+        allowed = None
+        if restaurants:
+            allowed = set()
+            for slug in restaurants:
+                allowed |= self.by_restaurant.get(self.restaurant_ids.get(slug), set())
+        for diet in diets:
+            allowed = self.by_diet[diet] if allowed is None else allowed & self.by_diet[diet]
+        return allowed
+
+    def nearest(self, target, weights, k=DEFAULT_K, restaurants=(), diets=()):
+        """Return [(dish id, distance), ...] for the k dishes closest to the target.
+
+        `target` and `weights` map dimension name to value; dimensions missing
+        from `target` are ignored.
+        """
+        point = tuple(target.get(dim, 0.0) / self.scales[dim] for dim in DIMENSIONS)
+        axis_weights = tuple(weights.get(dim, 1.0) if dim in target else 0.0 for dim in DIMENSIONS)
+
+        allowed = self.candidates(restaurants, diets)
+        accept = None if allowed is None else allowed.__contains__
+        active = [axis for axis, weight in enumerate(axis_weights) if weight > 0]
+        if allowed is not None and len(allowed) <= BRUTE_FORCE_LIMIT:
+            scored = ((self.tree.distance(i, point, axis_weights), self.ids[i], i) for i in allowed)
+            found = [(distance, index) for distance, _, index in heapq.nsmallest(k, scored)]
+        elif len(active) == 1:
+            found = self._nearest_on_axis(active[0], point[active[0]], axis_weights[active[0]], k, accept)
+        else:
+            found = self.tree.nearest(point, axis_weights, k, accept)
+        return [(self.ids[index], round(distance ** 0.5, 4)) for distance, index in found]
+
+    def _nearest_on_axis(self, axis, value, weight, k, accept):
+        """k nearest on one dimension: bisect, then walk outward taking the closer side."""
+        order, values = self.sorted_axes[axis]
+        below = bisect.bisect_left(values, value) - 1
+        above = below + 1
+        found = []
+        while len(found) < k and (below >= 0 or above < len(order)):
+            take_below = above >= len(order) or (below >= 0 and (
+                (value - values[below], self.ids[order[below]]) <= (values[above] - value, self.ids[order[above]])
+            ))
+            if take_below:
+                index, below = order[below], below - 1
+            else:
+                index, above = order[above], above + 1
+            if accept is None or accept(index):
+                found.append((weight * (self.tree.points[index][axis] - value) ** 2, index))
+        return found
+
+
+macro_index = VersionedCache(DataVersion.CATALOG, MacroIndex.build)
+
+
+def parse_macro_query(params):
+    """Parse target, weights, k and filters for the nearest-dishes endpoint."""
+    target = {}
+    for dim in DIMENSIONS:
+        value = params.get(dim)
+        if value in (None, ''):
+            continue
+        try:
+            target[dim] = float(value)
+        except ValueError:
+            raise ValidationError({dim: f'{dim} must be a valid number'})
+        if not math.isfinite(target[dim]):
+            raise ValidationError({dim: f'{dim} must be a finite number'})
+        if target[dim] < 0:
+            raise ValidationError({dim: f'{dim} must not be negative'})
+    if not target:
+        raise ValidationError({'target': f"give at least one of: {', '.join(DIMENSIONS)}"})
+
+    # weights=protein:2,fat:0.5 (unlisted dimensions weigh 1)
+    weights = {}
+    for part in filter(None, (p.strip() for p in params.get('weights', '').split(','))):
+        dim, _, value = part.partition(':')
+        try:
+            weight = float(value)
+        except ValueError:
+            weight = -1
+        if dim not in DIMENSIONS or not math.isfinite(weight) or weight < 0:
+            raise ValidationError({'weights': 'weights must look like protein:2,fat:0.5'})
+        weights[dim] = weight
+    if not any(weights.get(dim, 1.0) > 0 for dim in target):
+        raise ValidationError({'weights': 'at least one targeted dimension needs a positive weight'})
+
+    try:
+        k = min(max(int(params.get('k', DEFAULT_K)), 1), MAX_K)
+    except ValueError:
+        k = DEFAULT_K
+
+    restaurants = [s.strip() for s in params.get('restaurants', '').split(',') if s.strip()]
+    diets = parse_choices(params, 'diet', list(DIET_FIELDS))
+    return target, weights, k, restaurants, diets
@@ -0,0 +1,85 @@
+"""Compare /dishes latency between the ORM path and the columnar engine."""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.engine import get_dish_engine, np
+from api.models import MenuItem, Restaurant
+from api.views import DishListView
+
+QUERIES = [
+    {},
+    {'sort': 'protein_desc'},
+    {'sort': 'calories_asc', 'protein_min': '30'},
+    {'sort': 'protein_ratio_desc', 'calories_max': '600', 'carbs_max': '40'},
+    {'sort': 'fat_asc', 'restaurants': 'bench-1,bench-2', 'offset': '200'},
+    {'sort': 'carbs_asc', 'category': 'bowl'},
+]
+# Every request runs the path being measured instead of hitting the response cache
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DishListView on the ORM path vs. the columnar engine (synthetic data, rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20000, help='Synthetic menu items to generate')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per query per path')
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('NumPy is not installed; the columnar engine is unavailable.')
+
+        with transaction.atomic():
+            self._seed(options['items'])
+            results = {engine: self._run(engine, options['repeat']) for engine in ['orm', 'columnar']}
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'path':<10} {'mean ms':>9} {'p95 ms':>9}")
+        for engine, timings in results.items():
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+            self.stdout.write(f'{engine:<10} {statistics.mean(timings):>9.2f} {p95:>9.2f}')
+        speedup = statistics.mean(results['orm']) / statistics.mean(results['columnar'])
+        self.stdout.write(self.style.SUCCESS(f'Columnar engine is {speedup:.1f}x the ORM path'))
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        restaurants = [
+            Restaurant.objects.create(name=f'Bench {i}', slug=f'bench-{i}')
+            for i in range(10)
+        ]
+        categories = ['Bowls', 'Salads', 'Sides', 'Entrees', 'Drinks', 'Burritos']
+        MenuItem.objects.bulk_create([
+            MenuItem(
+                restaurant=rng.choice(restaurants),
+                name=f'Dish {i}',
+                category=rng.choice(categories),
+                calories=rng.randint(50, 1200),
+                protein=Decimal(rng.randint(0, 800)) / 10,
+                carbs=Decimal(rng.randint(0, 1200)) / 10,
+                fat=Decimal(rng.randint(0, 600)) / 10,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        self.stdout.write(f'Seeded {count} synthetic menu items')
+
+    def _run(self, engine, repeat):
+        factory = APIRequestFactory()
+        view = DishListView.as_view()
+        timings = []
+        with override_settings(DISH_QUERY_ENGINE=engine, CACHES=NO_CACHE):
+            # Warm up: builds the columnar snapshot outside the timed loop
+            get_dish_engine()
+            view(factory.get('/api/v1/dishes')).render()
+            for params in QUERIES:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    view(factory.get('/api/v1/dishes', params)).render()
+                    timings.append((time.perf_counter() - start) * 1000)
+        return timings
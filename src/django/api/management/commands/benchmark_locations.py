@@ -0,0 +1,85 @@
+"""Compare location radius searches: full scan, grid cell pruning and the in-process index."""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.geo import annotate_distance, within_radius
+from api.location_index import LocationIndex
+from api.models import Restaurant, RestaurantLocation
+
+# (lat, lng, radius miles): dense metro, suburban, rural and a wide regional search
+SEARCHES = [
+    (40.7128, -74.0060, 5),
+    (41.8781, -87.6298, 25),
+    (39.7392, -104.9903, 50),
+    (34.0522, -118.2437, 150),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark radius searches: SQL scan, grid cells and in-process index (synthetic data, rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=100000, help='Synthetic locations to generate')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per search per path')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['locations'])
+            self.index = LocationIndex.build()
+            results = {path: self._run(path, options['repeat']) for path in ['scan', 'grid', 'index']}
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'path':<10} {'mean ms':>9} {'p95 ms':>9}")
+        for path, timings in results.items():
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+            self.stdout.write(f'{path:<10} {statistics.mean(timings):>9.2f} {p95:>9.2f}')
+        for path in ['grid', 'index']:
+            speedup = statistics.mean(results['scan']) / statistics.mean(results[path])
+            self.stdout.write(self.style.SUCCESS(f'{path} is {speedup:.1f}x the full scan'))
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        restaurants = [
+            Restaurant.objects.create(name=f'Bench {i}', slug=f'bench-{i}')
+            for i in range(10)
+        ]
+        RestaurantLocation.objects.bulk_create([
+            RestaurantLocation(
+                restaurant=rng.choice(restaurants),
+                name=f'Location {i}',
+                latitude=Decimal(rng.uniform(25, 49)).quantize(Decimal('0.0000001')),
+                longitude=Decimal(rng.uniform(-124, -67)).quantize(Decimal('0.0000001')),
+                city='Benchville',
+                state='NY',
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        self.stdout.write(f'Seeded {count} synthetic locations')
+
+    def _search(self, path, lat, lng, radius):
+        """Count and first page of a radius search, as LocationListView runs it."""
+        if path == 'index':
+            matches = self.index.within(lat, lng, radius)
+            return len(matches), matches[:100]
+        queryset = RestaurantLocation.objects.filter(is_active=True)
+        if path == 'grid':
+            queryset = within_radius(queryset, lat, lng, radius)
+        queryset = annotate_distance(queryset, lat, lng).filter(distance_miles__lte=radius)
+        total = queryset.count()
+        rows = list(queryset.order_by('distance_miles').values('id', 'distance_miles')[:100])
+        return total, rows
+
+    def _run(self, path, repeat):
+        timings = []
+        for lat, lng, radius in SEARCHES:
+            self._search(path, lat, lng, radius)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self._search(path, lat, lng, radius)
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
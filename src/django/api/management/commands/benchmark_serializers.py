@@ -0,0 +1,92 @@
+"""Compare list serialization throughput between DRF serializers and the fast path."""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.fast_serializers import FastLocationListSerializer, FastMenuItemListSerializer
+from api.models import MenuItem, Restaurant, RestaurantLocation
+from api.serializers import LocationListSerializer, MenuItemListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF list serializers vs. the fast .values() serializers (synthetic data, rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000], help='Row counts to serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per size; the best run is reported')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        with transaction.atomic():
+            self._seed(max(sizes))
+            self.stdout.write(f"{'list':<10} {'rows':>7} {'drf rows/s':>12} {'fast rows/s':>12} {'speedup':>8}")
+            for size in sizes:
+                self._compare('dishes', size, options['repeat'], self._dishes_drf, self._dishes_fast)
+                self._compare('locations', size, options['repeat'], self._locations_drf, self._locations_fast)
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        restaurants = [
+            Restaurant.objects.create(name=f'Bench {i}', slug=f'bench-{i}', logo=f'restaurants/logos/bench-{i}.png')
+            for i in range(20)
+        ]
+        MenuItem.objects.bulk_create([
+            MenuItem(
+                restaurant=rng.choice(restaurants),
+                name=f'Dish {i}',
+                category='Bowls',
+                calories=rng.randint(50, 1200),
+                protein=Decimal(rng.randint(0, 800)) / 10,
+                carbs=Decimal(rng.randint(0, 1200)) / 10,
+                fat=Decimal(rng.randint(0, 600)) / 10,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        RestaurantLocation.objects.bulk_create([
+            RestaurantLocation(
+                restaurant=rng.choice(restaurants),
+                name=f'Location {i}',
+                latitude=Decimal(rng.uniform(25, 49)).quantize(Decimal('0.0000001')),
+                longitude=Decimal(rng.uniform(-124, -67)).quantize(Decimal('0.0000001')),
+                city='Benchville',
+                state='NY',
+            )
+            for i in range(count)
+        ], batch_size=1000)
+
+    def _compare(self, label, size, repeat, drf, fast):
+        drf_rate = self._rate(drf, size, repeat)
+        fast_rate = self._rate(fast, size, repeat)
+        self.stdout.write(
+            f'{label:<10} {size:>7} {drf_rate:>12,.0f} {fast_rate:>12,.0f} {fast_rate / drf_rate:>7.1f}x'
+        )
+
+    def _rate(self, run, size, repeat):
+        """Rows per second for fetching and serializing `size` rows, best of `repeat` runs."""
+        best = min(self._time(run, size) for _ in range(repeat))
+        return size / best
+
+    def _time(self, run, size):
+        start = time.perf_counter()
+        run(size)
+        return time.perf_counter() - start
+
+    def _dishes_drf(self, size):
+        rows = MenuItem.objects.select_related('restaurant').order_by('id')[:size]
+        return MenuItemListSerializer(rows, many=True).data
+
+    def _dishes_fast(self, size):
+        fast = FastMenuItemListSerializer()
+        return fast.serialize(fast.values(MenuItem.objects.order_by('id'))[:size])
+
+    def _locations_drf(self, size):
+        rows = RestaurantLocation.objects.select_related('restaurant').order_by('id')[:size]
+        return LocationListSerializer(rows, many=True).data
+
+    def _locations_fast(self, size):
+        fast = FastLocationListSerializer()
+        return fast.serialize(fast.values(RestaurantLocation.objects.order_by('id'))[:size])
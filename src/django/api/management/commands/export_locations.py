@@ -0,0 +1,34 @@
+"""Export every active location as GeoJSON or NDJSON, streamed with flat memory use."""
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.export import CHUNK_SIZE, FORMATS, encode, gzip_chunks, location_features
+
+
+class Command(BaseCommand):
+    help = 'Export all active restaurant locations as GeoJSON or NDJSON (optionally gzipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='geojson', help='Output format')
+        parser.add_argument('--output', type=str, default='-', help='Output file path ("-" for stdout)')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output (implied by a .gz output path)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        chunks = encode(location_features(options['chunk_size']), options['format'])
+
+        if output != '-':
+            with open(output, 'wb' if compress else 'w', encoding=None if compress else 'utf-8') as stream:
+                for chunk in gzip_chunks(chunks) if compress else chunks:
+                    stream.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exported locations to {output}'))
+        elif compress:
+            for chunk in gzip_chunks(chunks):
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -2,7 +2,7 @@ import csv
 from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from api.models import Restaurant, MenuItem
+from api.models import DataVersion, Restaurant, MenuItem
 
 
 class Command(BaseCommand):
@@ -14,19 +14,21 @@ class Command(BaseCommand):
         parser.add_argument('--clear', action='store_true', help='Clear existing data')
 
     def handle(self, *args, **options):
-        if options['clear']:
-            MenuItem.objects.all().delete()
-            Restaurant.objects.all().delete()
-            self.stdout.write('Cleared existing data')
+        # One catalog version bump for the whole import instead of one per row
+        with DataVersion.deferred():
+            if options['clear']:
+                MenuItem.objects.all().delete()
+                Restaurant.objects.all().delete()
+                self.stdout.write('Cleared existing data')
 
-        if options['restaurants']:
-            self._import_restaurants(options['restaurants'])
+            if options['restaurants']:
+                self._import_restaurants(options['restaurants'])
 
-        if options['items']:
-            self._import_items(options['items'])
+            if options['items']:
+                self._import_items(options['items'])
 
-        for r in Restaurant.objects.all():
-            r.update_item_count()
+            for r in Restaurant.objects.all():
+                r.update_item_count()
 
         self.stdout.write(self.style.SUCCESS('Import complete'))
 
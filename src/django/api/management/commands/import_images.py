@@ -1,6 +1,6 @@
 import csv
 from django.core.management.base import BaseCommand
-from api.models import Restaurant, MenuItem
+from api.models import DataVersion, Restaurant, MenuItem
 
 
 class Command(BaseCommand):
@@ -21,7 +21,7 @@ class Command(BaseCommand):
         updated = 0
         not_found = []
 
-        with open(options['csv_path'], 'r') as f:
+        with open(options['csv_path'], 'r') as f, DataVersion.deferred():
             for row in csv.DictReader(f):
                 name = row['name'].strip()
                 image_url = row['image_url'].strip()
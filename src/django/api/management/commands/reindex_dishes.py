@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from api.models import MenuItem
+from api.search import index_menu_items
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored protein density and rebuild the dish full-text index'
+
+    def handle(self, *args, **options):
+        # Fixtures (loaddata) and raw SQL bypass MenuItem.save(), so derived columns need a rebuild
+        count = MenuItem.objects.all().refresh_density()
+        self.stdout.write(f'Refreshed protein density for {count} menu items')
+
+        index_menu_items()
+        self.stdout.write(self.style.SUCCESS('Rebuilt dish search index'))
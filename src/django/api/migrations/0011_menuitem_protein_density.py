@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:58
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_protein_density(apps, schema_editor):
+    # Historical models don't carry MenuItem's helpers, so the thresholds are inlined here.
+    MenuItem = apps.get_model('api', 'MenuItem')
+    items = list(MenuItem.objects.only('id', 'protein', 'calories'))
+    for item in items:
+        ratio = round(Decimal(item.protein) * 100 / item.calories, 1) if item.calories else Decimal('0.0')
+        item.protein_per_100cal = ratio
+        if ratio > Decimal('12.0'):
+            item.density_label = 'excellent'
+        elif ratio >= Decimal('8.0'):
+            item.density_label = 'good'
+        elif ratio >= Decimal('5.0'):
+            item.density_label = 'average'
+        else:
+            item.density_label = 'low'
+    MenuItem.objects.bulk_update(items, ['protein_per_100cal', 'density_label'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_add_byo_noun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='density_label',
+            field=models.CharField(choices=[('excellent', 'Excellent'), ('good', 'Good'), ('average', 'Average'), ('low', 'Low')], default='low', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='protein_per_100cal',
+            field=models.DecimalField(decimal_places=1, default=Decimal('0.0'), editable=False, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', '-protein_per_100cal'], name='menuitem_avail_ratio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'density_label'], name='menuitem_avail_density_idx'),
+        ),
+        migrations.RunPython(backfill_protein_density, migrations.RunPython.noop),
+    ]
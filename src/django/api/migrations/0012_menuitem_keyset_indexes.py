@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_menuitem_protein_density'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='menuitem',
+            name='menuitem_avail_ratio_idx',
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', '-protein_per_100cal', '-id'], name='menuitem_ratio_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'protein', 'id'], name='menuitem_protein_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'calories', 'id'], name='menuitem_calories_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'carbs', 'id'], name='menuitem_carbs_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'fat', 'id'], name='menuitem_fat_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'name', 'id'], name='menuitem_name_keyset_idx'),
+        ),
+    ]
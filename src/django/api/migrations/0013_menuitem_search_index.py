@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:01
+
+import django.contrib.postgres.search
+from django.db import OperationalError, migrations
+
+
+# Backend-specific DDL, so it lives here instead of Meta.indexes.
+PG_CREATE = [
+    "CREATE INDEX IF NOT EXISTS menuitem_search_vector_gin ON api_menuitem USING gin (search_vector)",
+    """
+    UPDATE api_menuitem AS m SET search_vector =
+        setweight(to_tsvector('english', coalesce(m.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(m.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(r.name, '')), 'C')
+    FROM api_restaurant AS r
+    WHERE r.id = m.restaurant_id
+    """,
+]
+PG_DROP = ["DROP INDEX IF EXISTS menuitem_search_vector_gin"]
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_menuitem_fts USING fts5(
+        name, category, restaurant,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO api_menuitem_fts (rowid, name, category, restaurant)
+    SELECT m.id, m.name, m.category, r.name
+    FROM api_menuitem AS m JOIN api_restaurant AS r ON r.id = m.restaurant_id
+    """,
+]
+SQLITE_DROP = ["DROP TABLE IF EXISTS api_menuitem_fts"]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, PG_CREATE)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_CREATE)
+        except OperationalError:
+            # SQLite built without FTS5: api.search falls back to icontains
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, PG_DROP)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_menuitem_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
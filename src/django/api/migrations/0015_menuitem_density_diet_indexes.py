@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_dataversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='menuitem',
+            name='menuitem_avail_density_idx',
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'density_label', '-protein_per_100cal', '-id'], name='menuitem_density_ratio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_vegetarian', True)), fields=['density_label', '-protein_per_100cal', '-id'], name='menuitem_vegetarian_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_vegan', True)), fields=['density_label', '-protein_per_100cal', '-id'], name='menuitem_vegan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('is_gluten_free', True)), fields=['density_label', '-protein_per_100cal', '-id'], name='menuitem_gluten_free_idx'),
+        ),
+    ]
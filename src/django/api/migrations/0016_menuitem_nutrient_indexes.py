@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_menuitem_density_diet_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('fiber__isnull', False), ('is_available', True)), fields=['fiber', 'id'], name='menuitem_fiber_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('sodium__isnull', False)), fields=['sodium', 'id'], name='menuitem_sodium_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('sugar__isnull', False)), fields=['sugar', 'id'], name='menuitem_sugar_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True), ('saturated_fat__isnull', False)), fields=['saturated_fat', 'id'], name='menuitem_satfat_keyset_idx'),
+        ),
+    ]
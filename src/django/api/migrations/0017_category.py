@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:29
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.utils.text import slugify
+import django.db.models.deletion
+
+
+# Frozen copies of api.models.category_key and category_slug, so this backfill never changes
+def category_key(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    words = re.findall(r'\w+', text.lower())
+    if words and len(words[-1]) > 3:
+        last = words[-1]
+        if last.endswith('ies'):
+            words[-1] = last[:-3] + 'y'
+        elif last.endswith(('ches', 'shes', 'sses', 'xes')):
+            words[-1] = last[:-2]
+        elif last.endswith('s') and not last.endswith(('ss', 'us')):
+            words[-1] = last[:-1]
+    return ' '.join(words)
+
+
+def category_slug(key):
+    slug = slugify(key, allow_unicode=True)[:100].strip('-')
+    return slug or 'category-' + hashlib.sha1(key.encode()).hexdigest()[:10]
+
+
+def backfill_categories(apps, schema_editor):
+    # One Category (and alias) per distinct normalized key, named after its first spelling
+    Category = apps.get_model('api', 'Category')
+    CategoryAlias = apps.get_model('api', 'CategoryAlias')
+    MenuItem = apps.get_model('api', 'MenuItem')
+    category_ids = {}
+    items = list(MenuItem.objects.only('id', 'category').order_by('id'))
+    for item in items:
+        key = category_key(item.category)
+        if key and key not in category_ids:
+            category, _ = Category.objects.get_or_create(slug=category_slug(key), defaults={'name': item.category.strip()[:100]})
+            CategoryAlias.objects.get_or_create(key=key, defaults={'category': category})
+            category_ids[key] = category.id
+        item.canonical_category_id = category_ids.get(key)
+    MenuItem.objects.bulk_update(items, ['canonical_category'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_menuitem_nutrient_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Normalized text, e.g. "entree"', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'category aliases',
+                'ordering': ['key'],
+            },
+        ),
+        migrations.AddField(
+            model_name='categoryalias',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='api.category'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='canonical_category',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='menu_items', to='api.category'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['is_available', 'canonical_category', '-protein_per_100cal', '-id'], name='menuitem_category_ratio_idx'),
+        ),
+        migrations.RunPython(backfill_categories, migrations.RunPython.noop),
+    ]
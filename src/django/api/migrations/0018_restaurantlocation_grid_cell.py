@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:34
+
+import math
+
+from django.db import migrations, models
+
+# Frozen copy of the grid in RestaurantLocation.compute_grid_cell, so this backfill never changes
+GRID_DEGREES = 0.1
+GRID_ROWS = 1800
+GRID_COLUMNS = 3600
+
+
+def compute_grid_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    row = min(max(math.floor((float(latitude) + 90) / GRID_DEGREES), 0), GRID_ROWS - 1)
+    column = min(max(math.floor((float(longitude) + 180) / GRID_DEGREES), 0), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + column
+
+
+def backfill_grid_cells(apps, schema_editor):
+    RestaurantLocation = apps.get_model('api', 'RestaurantLocation')
+    locations = list(RestaurantLocation.objects.only('id', 'latitude', 'longitude'))
+    for location in locations:
+        location.grid_cell = compute_grid_cell(location.latitude, location.longitude)
+    RestaurantLocation.objects.bulk_update(locations, ['grid_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurantlocation',
+            name='grid_cell',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_grid_cells, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='restaurantlocation',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['grid_cell', 'latitude', 'longitude'], name='location_active_cell_idx'),
+        ),
+    ]
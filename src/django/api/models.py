@@ -1,9 +1,72 @@
 """Database models for Graze API."""
+import hashlib
+import math
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
 from decimal import Decimal
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .search import index_menu_items
+
+# Per-thread set of version names whose bumps are deferred (see DataVersion.deferred)
+_deferred_bumps = threading.local()
+
+CATEGORY_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def category_key(text):
+    """Alias key for a free-text category: folds accents, case, punctuation and a plural last word.
+
+    "Entrees", "entrée" and "Entree" all become "entree".
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    words = CATEGORY_WORD_RE.findall(text.lower())
+    if words:
+        words[-1] = _singular(words[-1])
+    return ' '.join(words)
+
+
+def _singular(word):
+    if len(word) <= 3:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us')):
+        return word[:-1]
+    return word
+
+
+def category_slug(key):
+    """Slug for a category key; keeps non-Latin letters and is never empty."""
+    slug = slugify(key, allow_unicode=True)[:100].strip('-')
+    return slug or 'category-' + hashlib.sha1(key.encode()).hexdigest()[:10]
+
+
+class RestaurantQuerySet(models.QuerySet):
+    """Bumps the catalog version after bulk updates, which skip model signals."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        DataVersion.bump(DataVersion.CATALOG)
+        if Restaurant.LOCATION_SOURCE_FIELDS.intersection(kwargs):
+            DataVersion.bump(DataVersion.LOCATIONS)
+        return rows
 
 
 class Restaurant(models.Model):
+    # Fields copied into location vector tiles (api/tiles.py)
+    LOCATION_SOURCE_FIELDS = frozenset(['slug', 'brand_color'])
+
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
     website_url = models.URLField(blank=True)
@@ -21,12 +84,30 @@ class Restaurant(models.Model):
     last_updated = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = RestaurantQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        # Location tiles carry the slug and brand color, so changing them changes the locations data
+        location_fields_changed = False
+        if not adding and (update_fields is None or self.LOCATION_SOURCE_FIELDS.intersection(update_fields)):
+            stored = Restaurant.objects.filter(pk=self.pk).values(*self.LOCATION_SOURCE_FIELDS).first()
+            location_fields_changed = stored is not None and any(
+                stored[field] != getattr(self, field) for field in self.LOCATION_SOURCE_FIELDS
+            )
+        super().save(*args, **kwargs)
+        if location_fields_changed:
+            DataVersion.bump(DataVersion.LOCATIONS)
+        if not adding and (update_fields is None or 'name' in update_fields):
+            index_menu_items(self.menu_items.values_list('id', flat=True))
+
     def update_item_count(self):
         self.item_count = self.menu_items.filter(is_available=True).count()
         self.save(update_fields=['item_count'])
@@ -36,16 +117,178 @@ class Restaurant(models.Model):
         self.save(update_fields=['location_count'])
 
 
+class Category(models.Model):
+    """Normalized dish category; free-text menu categories map onto it through CategoryAlias."""
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True, allow_unicode=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def resolve_many(cls, texts):
+        """Map each free-text category to a Category id, creating categories for unseen keys.
+
+        Blank text maps to None. New aliases are inserted with bulk_create, so
+        they do not trigger the re-mapping done for aliases edited in the admin.
+        """
+        keys = {text: category_key(text) for text in set(texts)}
+        wanted = set(keys.values()) - {''}
+        found = dict(CategoryAlias.objects.filter(key__in=wanted).values_list('key', 'category_id'))
+        for key in wanted - set(found):
+            category, _ = cls.objects.get_or_create(slug=category_slug(key), defaults={
+                'name': next(text.strip() for text, k in keys.items() if k == key)[:100],
+            })
+            CategoryAlias.objects.bulk_create([CategoryAlias(key=key, category=category)], ignore_conflicts=True)
+            found[key] = category.id
+        return {text: found.get(key) for text, key in keys.items()}
+
+    @classmethod
+    def matching_ids(cls, text):
+        """Ids of categories with an alias that contains the words of `text` as whole words.
+
+        Every word is singularized, so "bowl" matches "Bowls", "Grain Bowls"
+        and "Warm Bowls", and "breakfast" matches "Breakfast Sandwiches",
+        while "entr" matches nothing.
+        """
+        wanted = [_singular(word) for word in category_key(text).split()]
+        if not wanted:
+            return []
+        size = len(wanted)
+        ids = set()
+        # Every plural above is its singular minus at most one final letter, plus a suffix
+        aliases = CategoryAlias.objects.filter(key__contains=wanted[0][:-1] or wanted[0])
+        for key, category_id in aliases.values_list('key', 'category_id'):
+            words = [_singular(word) for word in key.split()]
+            if any(words[start:start + size] == wanted for start in range(len(words) - size + 1)):
+                ids.add(category_id)
+        return sorted(ids)
+
+
+class CategoryAlias(models.Model):
+    """A normalized spelling (see category_key) that belongs to a Category."""
+
+    key = models.CharField(max_length=100, unique=True, help_text='Normalized text, e.g. "entree"')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        ordering = ['key']
+        verbose_name_plural = 'category aliases'
+
+    def __str__(self):
+        return f'{self.key} → {self.category}'
+
+    def save(self, *args, **kwargs):
+        self.key = category_key(self.key)
+        super().save(*args, **kwargs)
+
+
+class MenuItemQuerySet(models.QuerySet):
+    """Keeps the stored density columns, category and search index in sync on bulk writes."""
+
+    def update(self, **kwargs):
+        # auto_now is not applied by update(); stamp it so incremental index refreshes see the rows
+        kwargs.setdefault('updated_at', timezone.now())
+        if 'category' in kwargs:
+            kwargs['canonical_category_id'] = Category.resolve_many([kwargs['category']])[kwargs['category']]
+        touched = set(kwargs)
+        if not (MenuItem.DENSITY_SOURCE_FIELDS | MenuItem.SEARCH_SOURCE_FIELDS) & touched:
+            rows = super().update(**kwargs)
+            DataVersion.bump(DataVersion.CATALOG)
+            return rows
+        pks = list(self.values_list('pk', flat=True))
+        with DataVersion.deferred():
+            rows = super().update(**kwargs)
+            if MenuItem.DENSITY_SOURCE_FIELDS & touched:
+                MenuItem.objects.filter(pk__in=pks).refresh_density()
+            if MenuItem.SEARCH_SOURCE_FIELDS & touched:
+                index_menu_items(pks)
+            DataVersion.bump(DataVersion.CATALOG)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        categories = Category.resolve_many(obj.category for obj in objs)
+        for obj in objs:
+            obj.refresh_density()
+            obj.canonical_category_id = categories[obj.category]
+        created = super().bulk_create(objs, *args, **kwargs)
+        index_menu_items([obj.pk for obj in created if obj.pk is not None])
+        DataVersion.bump(DataVersion.CATALOG)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if MenuItem.DENSITY_SOURCE_FIELDS.intersection(fields):
+            for obj in objs:
+                obj.refresh_density()
+            fields = list(set(fields) | set(MenuItem.DENSITY_FIELDS))
+        if 'category' in fields:
+            categories = Category.resolve_many(obj.category for obj in objs)
+            for obj in objs:
+                obj.canonical_category_id = categories[obj.category]
+            fields = list(set(fields) | {'canonical_category'})
+        if 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if MenuItem.SEARCH_SOURCE_FIELDS.intersection(fields):
+            index_menu_items([obj.pk for obj in objs])
+        DataVersion.bump(DataVersion.CATALOG)
+        return rows
+
+    def refresh_density(self, batch_size=500):
+        """Recompute protein_per_100cal and density_label for every row."""
+        items = list(self.only('id', 'protein', 'calories'))
+        for item in items:
+            item.refresh_density()
+        MenuItem.objects.bulk_update(items, MenuItem.DENSITY_FIELDS, batch_size=batch_size)
+        return len(items)
+
+    def refresh_categories(self, keys=None, batch_size=500):
+        """Re-map rows to categories through the current aliases (only rows whose key is in `keys`)."""
+        items = [
+            item for item in self.only('id', 'category', 'canonical_category')
+            if keys is None or category_key(item.category) in keys
+        ]
+        categories = Category.resolve_many(item.category for item in items)
+        changed = [item for item in items if item.canonical_category_id != categories[item.category]]
+        for item in changed:
+            item.canonical_category_id = categories[item.category]
+        MenuItem.objects.bulk_update(changed, ['canonical_category'], batch_size=batch_size)
+        return len(changed)
+
+
 class MenuItem(models.Model):
     DENSITY_THRESHOLDS = {
         'excellent': Decimal('12.0'),
         'good': Decimal('8.0'),
         'average': Decimal('5.0'),
     }
+    DENSITY_CHOICES = [
+        ('excellent', 'Excellent'),
+        ('good', 'Good'),
+        ('average', 'Average'),
+        ('low', 'Low'),
+    ]
+    DENSITY_SOURCE_FIELDS = frozenset(['protein', 'calories'])
+    DENSITY_FIELDS = ['protein_per_100cal', 'density_label']
+    SEARCH_SOURCE_FIELDS = frozenset(['name', 'category', 'restaurant', 'restaurant_id'])
 
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='menu_items')
     name = models.CharField(max_length=255)
+    # Free text as printed on the menu; canonical_category is what filters and facets use
     category = models.CharField(max_length=100, blank=True)
+    canonical_category = models.ForeignKey(
+        Category, null=True, blank=True, on_delete=models.SET_NULL, related_name='menu_items', editable=False,
+    )
     serving_size = models.CharField(max_length=100, blank=True)
 
     calories = models.PositiveIntegerField()
@@ -58,6 +301,13 @@ class MenuItem(models.Model):
     sugar = models.DecimalField(max_digits=5, decimal_places=1, null=True, blank=True)
     saturated_fat = models.DecimalField(max_digits=5, decimal_places=1, null=True, blank=True)
 
+    # Derived from protein/calories on every write, stored so it can be indexed
+    protein_per_100cal = models.DecimalField(max_digits=5, decimal_places=1, default=Decimal('0.0'), editable=False)
+    density_label = models.CharField(max_length=10, choices=DENSITY_CHOICES, default='low', editable=False)
+
+    # Postgres full-text index (GIN, created in migration 0013); unused on SQLite, see api/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
     is_vegetarian = models.BooleanField(default=False)
     is_vegan = models.BooleanField(default=False)
     is_gluten_free = models.BooleanField(default=False)
@@ -70,29 +320,102 @@ class MenuItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MenuItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['-protein']
+        indexes = [
+            # density= and diet= filters: a range scan already in the default sort order
+            models.Index(
+                fields=['is_available', 'density_label', '-protein_per_100cal', '-id'],
+                name='menuitem_density_ratio_idx',
+            ),
+            models.Index(
+                fields=['density_label', '-protein_per_100cal', '-id'],
+                condition=models.Q(is_available=True, is_vegetarian=True),
+                name='menuitem_vegetarian_idx',
+            ),
+            models.Index(
+                fields=['density_label', '-protein_per_100cal', '-id'],
+                condition=models.Q(is_available=True, is_vegan=True),
+                name='menuitem_vegan_idx',
+            ),
+            models.Index(
+                fields=['density_label', '-protein_per_100cal', '-id'],
+                condition=models.Q(is_available=True, is_gluten_free=True),
+                name='menuitem_gluten_free_idx',
+            ),
+            # Keyset pagination: one (is_available, sort field, id) index per dish sort
+            models.Index(fields=['is_available', '-protein_per_100cal', '-id'], name='menuitem_ratio_keyset_idx'),
+            models.Index(fields=['is_available', 'protein', 'id'], name='menuitem_protein_keyset_idx'),
+            models.Index(fields=['is_available', 'calories', 'id'], name='menuitem_calories_keyset_idx'),
+            models.Index(fields=['is_available', 'carbs', 'id'], name='menuitem_carbs_keyset_idx'),
+            models.Index(fields=['is_available', 'fat', 'id'], name='menuitem_fat_keyset_idx'),
+            models.Index(fields=['is_available', 'name', 'id'], name='menuitem_name_keyset_idx'),
+            models.Index(
+                fields=['is_available', 'canonical_category', '-protein_per_100cal', '-id'],
+                name='menuitem_category_ratio_idx',
+            ),
+            # Optional nutrients: range filters and the known-value part of a sort only touch non-NULL rows
+            models.Index(
+                fields=['fiber', 'id'],
+                condition=models.Q(is_available=True, fiber__isnull=False),
+                name='menuitem_fiber_keyset_idx',
+            ),
+            models.Index(
+                fields=['sodium', 'id'],
+                condition=models.Q(is_available=True, sodium__isnull=False),
+                name='menuitem_sodium_keyset_idx',
+            ),
+            models.Index(
+                fields=['sugar', 'id'],
+                condition=models.Q(is_available=True, sugar__isnull=False),
+                name='menuitem_sugar_keyset_idx',
+            ),
+            models.Index(
+                fields=['saturated_fat', 'id'],
+                condition=models.Q(is_available=True, saturated_fat__isnull=False),
+                name='menuitem_satfat_keyset_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.name}"
 
-    @property
-    def protein_per_100cal(self):
-        if self.calories == 0:
+    def save(self, *args, **kwargs):
+        self.refresh_density()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.DENSITY_SOURCE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(self.DENSITY_FIELDS)
+        if update_fields is None or 'category' in update_fields:
+            self.canonical_category_id = Category.resolve_many([self.category])[self.category]
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'canonical_category'}
+        super().save(*args, **kwargs)
+        if update_fields is None or self.SEARCH_SOURCE_FIELDS.intersection(update_fields):
+            index_menu_items([self.pk])
+
+    @classmethod
+    def compute_protein_per_100cal(cls, protein, calories):
+        if not calories or protein is None:
             return Decimal('0.0')
-        return round(Decimal(self.protein) * 100 / self.calories, 1)
+        return round(Decimal(protein) * 100 / int(calories), 1)
 
-    @property
-    def density_label(self):
-        ratio = self.protein_per_100cal
-        if ratio > self.DENSITY_THRESHOLDS['excellent']:
+    @classmethod
+    def compute_density_label(cls, ratio):
+        if ratio > cls.DENSITY_THRESHOLDS['excellent']:
             return 'excellent'
-        elif ratio >= self.DENSITY_THRESHOLDS['good']:
+        elif ratio >= cls.DENSITY_THRESHOLDS['good']:
             return 'good'
-        elif ratio >= self.DENSITY_THRESHOLDS['average']:
+        elif ratio >= cls.DENSITY_THRESHOLDS['average']:
             return 'average'
         return 'low'
 
+    def refresh_density(self):
+        """Recompute the stored density columns from protein and calories."""
+        self.protein_per_100cal = self.compute_protein_per_100cal(self.protein, self.calories)
+        self.density_label = self.compute_density_label(self.protein_per_100cal)
+
 
 class ByoComponent(models.Model):
     """Individual ingredients for build-your-own meal calculator."""
@@ -151,9 +474,57 @@ class DataFlag(models.Model):
         return f"{self.flag_type}: {item}"
 
 
+class RestaurantLocationQuerySet(models.QuerySet):
+    """Keeps grid_cell in sync and bumps the locations version on bulk writes, which skip model signals."""
+
+    def update(self, **kwargs):
+        if not RestaurantLocation.GRID_SOURCE_FIELDS.intersection(kwargs):
+            rows = super().update(**kwargs)
+            DataVersion.bump(DataVersion.LOCATIONS)
+            return rows
+        pks = list(self.values_list('pk', flat=True))
+        with DataVersion.deferred():
+            rows = super().update(**kwargs)
+            RestaurantLocation.objects.filter(pk__in=pks).refresh_grid_cells()
+            DataVersion.bump(DataVersion.LOCATIONS)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_grid_cell()
+        created = super().bulk_create(objs, *args, **kwargs)
+        DataVersion.bump(DataVersion.LOCATIONS)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if RestaurantLocation.GRID_SOURCE_FIELDS.intersection(fields):
+            for obj in objs:
+                obj.refresh_grid_cell()
+            fields = list(set(fields) | {'grid_cell'})
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        DataVersion.bump(DataVersion.LOCATIONS)
+        return rows
+
+    def refresh_grid_cells(self, batch_size=500):
+        """Recompute grid_cell for every row."""
+        locations = list(self.only('id', 'latitude', 'longitude'))
+        for location in locations:
+            location.refresh_grid_cell()
+        RestaurantLocation.objects.bulk_update(locations, ['grid_cell'], batch_size=batch_size)
+        return len(locations)
+
+
 class RestaurantLocation(models.Model):
     """Physical restaurant locations with geospatial data."""
 
+    # About 7 miles of latitude per cell
+    GRID_DEGREES = 0.1
+    GRID_ROWS = 1800
+    GRID_COLUMNS = 3600
+    GRID_SOURCE_FIELDS = frozenset(['latitude', 'longitude'])
+
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='locations')
     osm_id = models.BigIntegerField(null=True, blank=True, db_index=True, help_text='OpenStreetMap ID')
     name = models.CharField(max_length=255, help_text='Location name (e.g., "Chipotle - Union Square")')
@@ -161,6 +532,9 @@ class RestaurantLocation(models.Model):
     # Coordinates
     latitude = models.DecimalField(max_digits=10, decimal_places=7)
     longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    # Cell of a fixed GRID_DEGREES lat/lng grid, numbered row by row; radius and
+    # bbox searches scan a few contiguous cell ranges (see api/geo.py)
+    grid_cell = models.IntegerField(null=True, blank=True, editable=False)
 
     # Address
     address = models.CharField(max_length=255, blank=True)
@@ -186,17 +560,44 @@ class RestaurantLocation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RestaurantLocationQuerySet.as_manager()
+
     class Meta:
         ordering = ['restaurant__name', 'city']
         indexes = [
             models.Index(fields=['restaurant']),
             models.Index(fields=['latitude', 'longitude']),
             models.Index(fields=['state']),
+            # Spatial access path: cell ranges, with coordinates for the exact bounds check
+            models.Index(
+                fields=['grid_cell', 'latitude', 'longitude'],
+                condition=models.Q(is_active=True),
+                name='location_active_cell_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.city}, {self.state}"
 
+    def save(self, *args, **kwargs):
+        self.refresh_grid_cell()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.GRID_SOURCE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'grid_cell'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def compute_grid_cell(cls, latitude, longitude):
+        """Grid cell holding a point; coordinates outside ±90/±180 are clamped to the edge cells."""
+        if latitude is None or longitude is None:
+            return None
+        row = min(max(math.floor((float(latitude) + 90) / cls.GRID_DEGREES), 0), cls.GRID_ROWS - 1)
+        column = min(max(math.floor((float(longitude) + 180) / cls.GRID_DEGREES), 0), cls.GRID_COLUMNS - 1)
+        return row * cls.GRID_COLUMNS + column
+
+    def refresh_grid_cell(self):
+        self.grid_cell = self.compute_grid_cell(self.latitude, self.longitude)
+
 
 class LocationFlag(models.Model):
     """User-reported issues with restaurant locations."""
@@ -220,3 +621,70 @@ class LocationFlag(models.Model):
 
     def __str__(self):
         return f"{self.flag_type}: {self.location}"
+
+
+class DataVersion(models.Model):
+    """Data version counters used to invalidate caches and in-process indexes.
+
+    Versions only move forward. Bumps use a microsecond timestamp floor so a
+    value is never reused, even after a rolled-back transaction.
+    """
+    CATALOG = 'catalog'
+    LOCATIONS = 'locations'
+    CONFIG = 'config'
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def state(cls, *names):
+        """Return ([version, ...], last_updated) for the named counters in one query.
+
+        Versions follow the order of `names`, with 0 for counters never bumped.
+        """
+        rows = {name: (version, updated_at) for name, version, updated_at in
+                cls.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')}
+        versions = [rows[name][0] if name in rows else 0 for name in names]
+        last_updated = max((updated_at for _, updated_at in rows.values()), default=None)
+        return versions, last_updated
+
+    @classmethod
+    def bump(cls, name):
+        pending = getattr(_deferred_bumps, 'names', None)
+        if pending is not None:
+            pending.add(name)
+            return
+        now = timezone.now()
+        floor = int(now.timestamp() * 1000000)
+        updated = cls.objects.filter(name=name).update(
+            version=Greatest(F('version') + 1, Value(floor)), updated_at=now
+        )
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': floor})
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        """Collapse every bump inside the block into one bump per version on exit.
+
+        Wrap bulk imports and admin bulk actions in this, so a thousand row
+        writes cost one version bump instead of a thousand.
+        """
+        if getattr(_deferred_bumps, 'names', None) is not None:
+            yield
+            return
+        _deferred_bumps.names = set()
+        try:
+            yield
+        finally:
+            names, _deferred_bumps.names = _deferred_bumps.names, None
+            for name in sorted(names):
+                cls.bump(name)
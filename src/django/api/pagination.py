@@ -0,0 +1,99 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Cursors are opaque base64 tokens holding the sort key plus the last row's
+sort value and id, so each page is an index seek instead of an OFFSET scan.
+Rows whose sort value is NULL come last in either direction, ordered by id;
+a cursor inside that tail holds a null value.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPaginator:
+    """Paginate a queryset ordered by a single field with `id` as tie-breaker."""
+
+    tiebreaker = 'id'
+
+    def __init__(self, model, sort_key, ordering):
+        self.model = model
+        self.sort_key = sort_key
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+
+    @property
+    def nullable(self):
+        try:
+            return self.model._meta.get_field(self.field).null
+        except FieldDoesNotExist:
+            return False
+
+    @property
+    def ordering(self):
+        prefix = '-' if self.descending else ''
+        if self.nullable:
+            field = F(self.field).desc(nulls_last=True) if self.descending else F(self.field).asc(nulls_last=True)
+            return [field, f'{prefix}{self.tiebreaker}']
+        return [f'{prefix}{self.field}', f'{prefix}{self.tiebreaker}']
+
+    def order(self, queryset):
+        return queryset.order_by(*self.ordering)
+
+    def encode(self, obj):
+        """Cursor for a row, given as a model instance or a .values() dict."""
+        get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+        value = get(self.field)
+        payload = {
+            's': self.sort_key,
+            'v': None if value is None else str(value),
+            'id': get(self.tiebreaker),
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            if payload['s'] != self.sort_key:
+                raise ValueError('cursor belongs to a different sort')
+            value = payload['v']
+            if value is not None:
+                value = self._parse_value(value)
+            return value, int(payload['id'])
+        except (ValueError, KeyError, TypeError, binascii.Error, DjangoValidationError):
+            raise ValidationError({'cursor': 'cursor is invalid or does not match the requested sort'})
+
+    def _parse_value(self, value):
+        try:
+            field = self.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            # Annotated sort keys such as search_rank are doubles, which str() round-trips exactly
+            return float(value)
+        return field.to_python(value)
+
+    def seek(self, queryset, cursor):
+        """Filter queryset to rows strictly after the cursor position."""
+        value, pk = self.decode(cursor)
+        op = 'lt' if self.descending else 'gt'
+        if value is None:
+            return queryset.filter(**{f'{self.field}__isnull': True, f'{self.tiebreaker}__{op}': pk})
+        after = Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'{self.tiebreaker}__{op}': pk})
+        if self.nullable:
+            after |= Q(**{f'{self.field}__isnull': True})
+        return queryset.filter(after)
+
+    def paginate(self, queryset, cursor, limit):
+        """Return (rows, next_cursor) for one page of an ordered queryset."""
+        queryset = self.order(queryset)
+        if cursor:
+            queryset = self.seek(queryset, cursor)
+        rows = list(queryset[:limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, self.encode(rows[-1])
@@ -0,0 +1,104 @@
+"""Pareto frontier of dishes: most protein for the fewest calories (and optionally carbs/fat).
+
+A dish is on the frontier when no other dish has at least as much protein
+and no more calories (or carbs/fat, when those are minimized too), while
+being strictly better on one of them. Every objective is turned into a
+"smaller is better" key, and the rows are sorted once:
+
+- two objectives: one sweep keeps each row that beats the best second key
+  seen so far, O(n log n) including the sort;
+- three objectives: the sweep keeps a staircase of the last two keys and
+  answers dominance with a bisect. That is O(n log n) comparisons, but the
+  staircase is a Python list, so each insertion also shifts up to |F|
+  entries (a memmove), which is O(n·|F|) in the worst case;
+- four objectives: each row is checked against the frontier found so far,
+  O(n·|F|) where |F| is the frontier size. Sorting first guarantees that
+  no later row dominates an earlier one. Menu frontiers are small, so this
+  stays cheap in practice, but it is not an O(n log n) skyline algorithm.
+
+Frontiers are cached per normalized DishQuery and data version.
+"""
+import bisect
+
+from django.core.cache import cache
+
+from .models import DataVersion, MenuItem
+
+OPTIONAL_OBJECTIVES = ['carbs', 'fat']
+PARETO_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def objective_key(row, minimize):
+    """Smaller-is-better key: calories, negated protein, then the extra minimized macros."""
+    return (row['calories'], -row['protein'], *(row[name] for name in minimize))
+
+
+def pareto_frontier(rows, minimize=()):
+    """Return the non-dominated rows, ordered by calories then protein (descending).
+
+    Rows are dicts with id, calories, protein and each name in `minimize`.
+    Rows that tie on every objective are all kept.
+    """
+    keyed = sorted(((objective_key(row, minimize), row['id'], row) for row in rows), key=lambda entry: entry[:2])
+    if len(minimize) == 0:
+        kept = _sweep_2d(keyed)
+    elif len(minimize) == 1:
+        kept = _sweep_3d(keyed)
+    else:
+        kept = _filter_sorted(keyed)
+    return [row for _, _, row in kept]
+
+
+def _sweep_2d(keyed):
+    kept = []
+    best = None
+    for entry in keyed:
+        key = entry[0]
+        if best is None or key[1] < best[1] or key == best:
+            kept.append(entry)
+            best = key
+    return kept
+
+
+def _sweep_3d(keyed):
+    # Staircase over (key[1], key[2]) of kept rows: key[1] ascending, key[2] strictly descending
+    firsts, seconds, keys = [], [], []
+    kept = []
+    for entry in keyed:
+        key = entry[0]
+        position = bisect.bisect_right(firsts, key[1]) - 1
+        if position >= 0 and seconds[position] <= key[2]:
+            if keys[position] == key:
+                kept.append(entry)  # exact tie with a frontier row
+            continue
+        kept.append(entry)
+        start = bisect.bisect_left(firsts, key[1])
+        end = start
+        while end < len(firsts) and seconds[end] >= key[2]:
+            end += 1
+        firsts[start:end] = [key[1]]
+        seconds[start:end] = [key[2]]
+        keys[start:end] = [key]
+    return kept
+
+
+def _filter_sorted(keyed):
+    frontier = []
+    for entry in keyed:
+        key = entry[0]
+        if not any(other != key and all(a <= b for a, b in zip(other, key)) for other, _, _ in frontier):
+            frontier.append(entry)
+    return frontier
+
+
+def get_pareto_ids(query, minimize):
+    """Frontier dish ids for a DishQuery, cached per normalized query and data version."""
+    key = query.cache_key('dish-pareto', DataVersion.state(*query.version_names)[0], minimize)
+    ids = cache.get(key)
+    if ids is None:
+        rows = query.filter(MenuItem.objects.filter(is_available=True, calories__gt=0)).values(
+            'id', 'calories', 'protein', *minimize
+        )
+        ids = [row['id'] for row in pareto_frontier(rows, minimize)]
+        cache.set(key, ids, PARETO_CACHE_TIMEOUT)
+    return ids
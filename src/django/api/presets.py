@@ -0,0 +1,115 @@
+"""Server-side QuickFilter presets for /dishes?preset=<name>.
+
+A preset's filter_params are merged under the request's own parameters and
+run as a normal DishQuery. When the request does not change the preset's
+result set and the preset does not need a location, the whole ordered
+result is kept as a list of (sort value, id) keys in the cache. It is keyed
+by the catalog and config versions, so it is rebuilt after any catalog or
+preset change. Every page, whether by offset or by cursor, is then a slice
+of that list plus one primary-key query for the page's rows.
+"""
+import bisect
+
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+
+from config.models import QuickFilter
+
+from .models import MenuItem
+from .pagination import KeysetPaginator
+from .queries import DishQuery
+
+PRESET_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def preset_params(filter_params):
+    """Flatten QuickFilter.filter_params into /dishes query parameters.
+
+    Accepts ranges as {'protein': {'min': 40, 'max': None}} as well as plain
+    parameters such as {'protein_min': 40, 'sort': 'carbs_asc'}. A range bound
+    that DishQuery has no filter for (such as carbs min) is a ValidationError,
+    rather than being silently ignored.
+    """
+    supported = {param for param, *_ in DishQuery.RANGE_FILTERS}
+    params = {}
+    for key, value in filter_params.items():
+        if isinstance(value, dict):
+            for bound in ('min', 'max'):
+                if value.get(bound) is not None:
+                    param = f'{key}_{bound}'
+                    if param not in supported:
+                        raise ValidationError({'preset': f'unsupported range in preset: {param}'})
+                    params[param] = str(value[bound])
+        elif isinstance(value, list):
+            params[key] = ','.join(str(item) for item in value)
+        elif value is not None:
+            params[key] = str(value)
+    return params
+
+
+def resolve_preset(params):
+    """Return (params, preset) with the named preset's parameters merged under the request's.
+
+    `preset` is None and `params` unchanged when no preset is requested.
+    """
+    name = params.get('preset', '').strip()
+    if not name:
+        return params, None
+    preset = QuickFilter.objects.filter(name=name, is_active=True).first()
+    if preset is None:
+        raise ValidationError({'preset': f'unknown preset: {name}'})
+    merged = preset_params(preset.filter_params)
+    merged.update((key, params.get(key)) for key in params)
+    return merged, preset
+
+
+class PresetList:
+    """One preset's full ordered result, paged like the columnar engine (see DishListView)."""
+
+    def __init__(self, keys, descending):
+        """`keys` are (sort value, id) pairs in display order."""
+        self.ids = [pk for _, pk in keys]
+        self.positions = {pk: position for position, pk in enumerate(self.ids)}
+        self.descending = descending
+        # Ascending search keys for cursors whose row has left the list
+        self.seek_keys = [self._seek_key(value, pk) for value, pk in keys]
+
+    def _seek_key(self, value, pk):
+        """Ascending key of a position; NULL values come last, and descending sorts are numeric."""
+        if self.descending:
+            return (value is None, 0 if value is None else -value, -pk)
+        return (value is None, 0 if value is None else value, pk)
+
+    def select(self, query, offset, limit, after=None):
+        """Return (ids, total) for one page; `after` is a decoded (value, id) cursor position."""
+        start = offset
+        if after is not None:
+            value, pk = after
+            if pk in self.positions:
+                start += self.positions[pk] + 1
+            else:
+                start += bisect.bisect_right(self.seek_keys, self._seek_key(value, pk))
+        return self.ids[start:start + limit], len(self.ids)
+
+
+def get_preset_list(preset, query, versions):
+    """The cached PresetList for an unmodified preset without location, else None.
+
+    `versions` are the request's data versions (catalog and config), which key the list.
+    """
+    if preset is None or preset.requires_location or query.near_only:
+        return None
+    base = DishQuery(preset_params(preset.filter_params))
+    normalized = query.normalized()
+    normalized['location'] = None  # lat/lng alone only adds distances
+    if normalized != base.normalized():
+        return None
+
+    key = base.cache_key('dish-preset', preset.name, versions)
+    keys = cache.get(key)
+    if keys is None:
+        paginator = KeysetPaginator(MenuItem, base.sort, base.ordering)
+        queryset = paginator.order(base.filter(MenuItem.objects.filter(is_available=True)))
+        keys = list(queryset.values_list(paginator.field, 'id'))
+        cache.set(key, keys, PRESET_CACHE_TIMEOUT)
+    return PresetList(keys, base.ordering.startswith('-'))
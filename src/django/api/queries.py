@@ -0,0 +1,242 @@
+"""Parsed /dishes query parameters shared by every dish listing path."""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, FloatField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from .fuzzy import fuzzy_search_dishes
+from .geo import nearest_location_distances, parse_point
+from .location_index import get_location_index
+from .models import Category, DataVersion, MenuItem, category_key
+from .search import search_dishes
+
+DENSITY_LABELS = [value for value, _ in MenuItem.DENSITY_CHOICES]
+DIET_FIELDS = {'vegetarian': 'is_vegetarian', 'vegan': 'is_vegan', 'gluten_free': 'is_gluten_free'}
+
+
+def parse_choices(params, param, choices):
+    """Parse a comma-separated parameter whose values must all be in `choices`."""
+    values = list(dict.fromkeys(v.strip() for v in params.get(param, '').split(',') if v.strip()))
+    if set(values) - set(choices):
+        raise ValidationError({param: f"{param} supports: {', '.join(choices)}"})
+    return values
+
+
+class DishQuery:
+    """Search, filter and sort parameters for a dish listing.
+
+    Parsing and validation happen once here. The ORM path (filter()) and the
+    columnar engine both execute the same parsed query.
+    """
+
+    SORT_OPTIONS = {
+        'protein_desc': '-protein',
+        'protein_asc': 'protein',
+        'calories_asc': 'calories',
+        'calories_desc': '-calories',
+        'protein_ratio_desc': '-protein_per_100cal',
+        'carbs_asc': 'carbs',
+        'fat_desc': '-fat',
+        'fat_asc': 'fat',
+        'alpha_asc': 'name',
+        'fiber_desc': '-fiber',
+        'sodium_asc': 'sodium',
+        'sugar_asc': 'sugar',
+        'saturated_fat_asc': 'saturated_fat',
+        'distance_asc': 'distance_miles',
+        'relevance': '-search_rank',
+    }
+    DEFAULT_SORT = 'protein_ratio_desc'
+
+    RANGE_FILTERS = [
+        ('calories_min', 'calories', 'gte', int),
+        ('calories_max', 'calories', 'lte', int),
+        ('protein_min', 'protein', 'gte', Decimal),
+        ('protein_max', 'protein', 'lte', Decimal),
+        ('carbs_max', 'carbs', 'lte', Decimal),
+        ('fat_min', 'fat', 'gte', Decimal),
+        ('fat_max', 'fat', 'lte', Decimal),
+        ('fiber_min', 'fiber', 'gte', Decimal),
+        ('fiber_max', 'fiber', 'lte', Decimal),
+        ('sodium_min', 'sodium', 'gte', int),
+        ('sodium_max', 'sodium', 'lte', int),
+        ('sugar_min', 'sugar', 'gte', Decimal),
+        ('sugar_max', 'sugar', 'lte', Decimal),
+        ('saturated_fat_min', 'saturated_fat', 'gte', Decimal),
+        ('saturated_fat_max', 'saturated_fat', 'lte', Decimal),
+    ]
+    # Not every menu lists these. A dish with an unknown value never matches a
+    # range on it, and sorting by one lists it after the dishes where it is known.
+    NULLABLE_FIELDS = frozenset(['fiber', 'sodium', 'sugar', 'saturated_fat'])
+
+    def __init__(self, params):
+        self.filters_applied = {}
+        self.did_you_mean = None
+
+        # QuickFilter preset, already merged into params (see api/presets.py)
+        self.preset = params.get('preset', '').strip()
+        if self.preset:
+            self.filters_applied['preset'] = self.preset
+
+        # Search
+        self.search = params.get('search', '').strip()
+        self.fuzzy = bool(self.search) and params.get('search_mode') == 'fuzzy'
+        if self.fuzzy:
+            self.filters_applied['search_mode'] = 'fuzzy'
+        if self.search:
+            self.filters_applied['search'] = self.search
+
+        # Range filters as (field, lookup, value)
+        self.ranges = []
+        for param, field, lookup, cast in self.RANGE_FILTERS:
+            value = params.get(param)
+            if value:
+                try:
+                    self.ranges.append((field, lookup, cast(value)))
+                    self.filters_applied[param] = float(value) if cast == Decimal else int(value)
+                except (ValueError, InvalidOperation):
+                    raise ValidationError({param: f'{param} must be a valid number'})
+
+        # Category filter: any spelling, name or slug of a normalized Category
+        self.category = params.get('category', '').strip()
+        self._category_ids = None
+        if self.category:
+            self.filters_applied['category'] = self.category
+
+        # Restaurant filter
+        restaurants = params.get('restaurants', '').strip()
+        self.restaurants = [s.strip() for s in restaurants.split(',')] if restaurants else []
+        if self.restaurants:
+            self.filters_applied['restaurants'] = self.restaurants
+
+        # Density labels (any of) and diets (all of)
+        self.density = parse_choices(params, 'density', DENSITY_LABELS)
+        if self.density:
+            self.filters_applied['density'] = self.density
+        self.diets = parse_choices(params, 'diet', list(DIET_FIELDS))
+        if self.diets:
+            self.filters_applied['diet'] = self.diets
+
+        # Location: with a radius, only restaurants with an active location in range
+        self.location = parse_point(params)
+        self.version_names = self.versions_for(params)
+        self._distances = None
+        if self.location:
+            lat, lng, radius = self.location
+            self.filters_applied.update({'lat': lat, 'lng': lng})
+            if radius is not None:
+                self.filters_applied['radius'] = radius
+
+        # Sorting: searches rank by relevance unless a sort is requested
+        sort = params.get('sort', 'relevance' if self.search else self.DEFAULT_SORT)
+        if (
+            sort not in self.SORT_OPTIONS
+            or (sort == 'relevance' and not self.search)
+            or (sort == 'distance_asc' and not self.location)
+        ):
+            sort = self.DEFAULT_SORT
+        self.sort = sort
+        self.filters_applied['sort'] = sort
+
+    @staticmethod
+    def versions_for(params):
+        """DataVersion counters a listing depends on.
+
+        Always the catalog; locations with lat/lng, and config with a preset.
+        """
+        names = [DataVersion.CATALOG]
+        if params.get('lat') or params.get('lng'):
+            names.append(DataVersion.LOCATIONS)
+        if params.get('preset'):
+            names.append(DataVersion.CONFIG)
+        return tuple(names)
+
+    @property
+    def ordering(self):
+        return self.SORT_OPTIONS[self.sort]
+
+    @property
+    def sort_field(self):
+        return self.ordering.lstrip('-')
+
+    @property
+    def near_only(self):
+        """Whether only restaurants with a located (in-radius) branch qualify."""
+        return bool(self.location) and (self.location[2] is not None or self.sort == 'distance_asc')
+
+    @property
+    def category_ids(self):
+        """Ids of the Categories the category parameter names (see Category.matching_ids)."""
+        if self._category_ids is None and self.category:
+            self._category_ids = Category.matching_ids(self.category)
+        return self._category_ids or []
+
+    @property
+    def distances(self):
+        """Restaurant id -> miles to its nearest active location, computed once per query."""
+        if self._distances is None and self.location:
+            index = get_location_index()
+            if index is not None:
+                self._distances = index.restaurant_distances(*self.location)
+            else:
+                self._distances = nearest_location_distances(*self.location)
+        return self._distances
+
+    def normalized(self):
+        """Canonical form of the filters, so equivalent requests share cache entries."""
+        return {
+            'search': ' '.join(self.search.lower().split()),
+            'fuzzy': self.fuzzy,
+            'ranges': sorted((field, lookup, float(value)) for field, lookup, value in self.ranges),
+            'category': category_key(self.category),
+            'restaurants': sorted(set(self.restaurants)),
+            'density': sorted(self.density),
+            'diets': sorted(self.diets),
+            'location': self.location and [round(self.location[0], 6), round(self.location[1], 6), self.location[2]],
+            'sort': self.sort,
+        }
+
+    def cache_key(self, prefix, *extra):
+        """Cache key for this query plus any extra discriminators (versions, pagination)."""
+        payload = json.dumps([self.normalized(), extra], sort_keys=True, default=str)
+        return f'{prefix}:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+    def filter(self, queryset):
+        """Apply search and filters (not ordering) to a MenuItem queryset."""
+        if self.search:
+            if self.fuzzy:
+                queryset, self.did_you_mean = fuzzy_search_dishes(queryset, self.search)
+            else:
+                queryset = search_dishes(queryset, self.search)
+
+        for field, lookup, value in self.ranges:
+            queryset = queryset.filter(**{f'{field}__{lookup}': value})
+
+        if self.category:
+            queryset = queryset.filter(canonical_category_id__in=self.category_ids)
+
+        if self.restaurants:
+            queryset = queryset.filter(restaurant__slug__in=self.restaurants)
+
+        if self.density:
+            queryset = queryset.filter(density_label__in=self.density)
+
+        for diet in self.diets:
+            queryset = queryset.filter(**{DIET_FIELDS[diet]: True})
+
+        if self.near_only:
+            queryset = queryset.filter(restaurant_id__in=list(self.distances))
+        if self.sort == 'distance_asc':
+            # One CASE arm per nearby restaurant; the distances come from a single location query
+            queryset = queryset.annotate(distance_miles=Case(
+                *[When(restaurant_id=pk, then=Value(miles)) for pk, miles in self.distances.items()],
+                default=Value(None),
+                output_field=FloatField(),
+            ))
+
+        if self.sort == 'protein_ratio_desc':
+            queryset = queryset.filter(calories__gt=0)
+
+        return queryset
@@ -0,0 +1,116 @@
+"""Full-text search over menu items.
+
+Production (Postgres) keeps a weighted tsvector in MenuItem.search_vector
+behind a GIN index. Local SQLite keeps an FTS5 shadow table keyed by the
+menu item id. Both cover the dish name, category and restaurant name, and
+both are refreshed by index_menu_items() from the model write paths.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+FTS_TABLE = 'api_menuitem_fts'
+SEARCH_CONFIG = 'english'
+MAX_TERMS = 8
+CHUNK_SIZE = 500
+
+# Column weights: name > category > restaurant name
+FTS5_WEIGHTS = (10.0, 5.0, 2.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_PG_REINDEX_SQL = f"""
+    UPDATE api_menuitem AS m SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(m.name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(m.category, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(r.name, '')), 'C')
+    FROM api_restaurant AS r
+    WHERE r.id = m.restaurant_id
+"""
+
+_FTS5_INSERT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, category, restaurant)
+    SELECT m.id, m.name, m.category, r.name
+    FROM api_menuitem AS m JOIN api_restaurant AS r ON r.id = m.restaurant_id
+"""
+
+
+def search_terms(query):
+    """Split a raw search string into lowercase word tokens."""
+    return TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def fts5_enabled():
+    """Whether the SQLite FTS5 shadow table exists on the current connection."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def search_dishes(queryset, query):
+    """Filter a MenuItem queryset to full-text matches, annotated with `search_rank`.
+
+    Every term is prefix-matched, so "chick bow" finds "Chicken Burrito Bowl".
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(' & '.join(f'{t}:*' for t in terms), search_type='raw', config=SEARCH_CONFIG)
+        # ts_rank is a float4; as a double it survives the cursor's round trip through str(float)
+        # exactly, so the keyset seek's equality branch matches the row it came from
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+
+    if fts5_enabled():
+        match = ' AND '.join(f'"{t}"*' for t in terms)
+        weights = ', '.join(str(w) for w in FTS5_WEIGHTS)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = api_menuitem.id',
+            [match], output_field=FloatField(),
+        ))
+
+    # No full-text index available: fall back to substring matching
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(category__icontains=term) | Q(restaurant__name__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_menu_items(ids=None):
+    """Refresh the full-text index for the given MenuItem ids (all rows when None)."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute(_PG_REINDEX_SQL)
+            for chunk in _chunks(ids):
+                cursor.execute(_PG_REINDEX_SQL + ' AND m.id = ANY(%s)', [chunk])
+    elif fts5_enabled():
+        with connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+                cursor.execute(_FTS5_INSERT_SQL)
+            for chunk in _chunks(ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(_FTS5_INSERT_SQL + f' WHERE m.id IN ({placeholders})', chunk)
+
+
+def _chunks(ids):
+    if ids is None:
+        return
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
@@ -2,7 +2,26 @@ from rest_framework import serializers
 from .models import Restaurant, MenuItem, DataFlag, RestaurantLocation, LocationFlag, ByoComponent
 
 
-class RestaurantListSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Accept `fields` and `restaurant_fields` kwargs and drop every field not listed.
+
+    `restaurant_fields` narrows a nested `restaurant` serializer. A sideloaded
+    `restaurant_id` counts as `restaurant`. See api/fieldsets.py.
+    """
+
+    def __init__(self, *args, fields=None, restaurant_fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            keep = set(fields) | ({'restaurant_id'} if 'restaurant' in fields else set())
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+        if restaurant_fields is not None and 'restaurant' in self.fields:
+            nested = self.fields['restaurant']
+            for name in set(nested.fields) - set(restaurant_fields):
+                nested.fields.pop(name)
+
+
+class RestaurantListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     logo_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -28,7 +47,7 @@ class RestaurantDetailSerializer(serializers.ModelSerializer):
         return obj.logo_url or ''
 
 
-class MenuItemListSerializer(serializers.ModelSerializer):
+class MenuItemListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     restaurant = RestaurantListSerializer(read_only=True)
     protein_per_100cal = serializers.DecimalField(max_digits=4, decimal_places=1, read_only=True)
     density_label = serializers.CharField(read_only=True)
@@ -38,6 +57,14 @@ class MenuItemListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'restaurant', 'category', 'serving_size', 'calories', 'protein', 'carbs', 'fat', 'protein_per_100cal', 'density_label', 'image_url']
 
 
+class MenuItemSideloadSerializer(MenuItemListSerializer):
+    """MenuItemListSerializer with `restaurant_id` in place of the nested restaurant (?include=restaurants)."""
+    restaurant_id = serializers.IntegerField(read_only=True)
+
+    class Meta(MenuItemListSerializer.Meta):
+        fields = ['id', 'name', 'restaurant_id', 'category', 'serving_size', 'calories', 'protein', 'carbs', 'fat', 'protein_per_100cal', 'density_label', 'image_url']
+
+
 class MenuItemDetailSerializer(serializers.ModelSerializer):
     restaurant = RestaurantDetailSerializer(read_only=True)
     protein_per_100cal = serializers.DecimalField(max_digits=4, decimal_places=1, read_only=True)
@@ -61,7 +88,7 @@ class DataFlagSerializer(serializers.ModelSerializer):
         fields = ['menu_item', 'flag_type', 'user_comment']
 
 
-class LocationListSerializer(serializers.ModelSerializer):
+class LocationListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for location list view with nested restaurant."""
     restaurant = RestaurantListSerializer(read_only=True)
     distance_miles = serializers.DecimalField(
@@ -90,6 +117,27 @@ class LocationListSerializer(serializers.ModelSerializer):
         ]
 
 
+class LocationSideloadSerializer(LocationListSerializer):
+    """LocationListSerializer with `restaurant_id` in place of the nested restaurant (?include=restaurants)."""
+    restaurant_id = serializers.IntegerField(read_only=True)
+
+    class Meta(LocationListSerializer.Meta):
+        fields = [
+            'id',
+            'restaurant_id',
+            'name',
+            'latitude',
+            'longitude',
+            'address',
+            'city',
+            'state',
+            'postcode',
+            'phone',
+            'distance_miles',
+            'is_active'
+        ]
+
+
 class LocationDetailSerializer(serializers.ModelSerializer):
     """Serializer for location detail view with all fields."""
     restaurant = RestaurantDetailSerializer(read_only=True)
@@ -0,0 +1,40 @@
+"""Sideloaded related objects for list responses (`?include=restaurants`).
+
+Rows carry `restaurant_id` instead of a nested restaurant, and each
+restaurant on the page is serialized once under `included.restaurants`,
+keyed by id.
+"""
+from rest_framework.exceptions import ValidationError
+
+from .fieldsets import restaurant_columns
+from .models import Restaurant
+from .serializers import RestaurantListSerializer
+
+INCLUDE_OPTIONS = ['restaurants']
+
+
+def parse_include(params):
+    """Return the set of sideloads requested with `include`."""
+    include = {name.strip() for name in params.get('include', '').split(',') if name.strip()}
+    unknown = include - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise ValidationError({'include': f"include supports: {', '.join(INCLUDE_OPTIONS)}"})
+    return include
+
+
+def serialize_restaurants(ids, fields=None):
+    """RestaurantListSerializer payloads by restaurant id, one query for the whole page.
+
+    `fields` is an optional sparse fieldset (see api/fieldsets.py).
+    """
+    restaurants = Restaurant.objects.filter(id__in=ids).order_by('id')
+    if fields is not None:
+        restaurants = restaurants.only(*restaurant_columns(fields))
+    restaurants = list(restaurants)
+    data = RestaurantListSerializer(restaurants, many=True, fields=fields).data
+    return {restaurant.id: payload for restaurant, payload in zip(restaurants, data)}
+
+
+def included_restaurants(ids, fields=None):
+    """The `included` block for a page referencing the given restaurant ids."""
+    return {'restaurants': {str(pk): payload for pk, payload in serialize_restaurants(ids, fields).items()}}
@@ -0,0 +1,44 @@
+"""Model signal handlers that bump data versions on writes."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.models import AppConfiguration, FilterConfiguration, QuickFilter, SortOption
+
+from .models import Category, CategoryAlias, DataVersion, MenuItem, Restaurant, RestaurantLocation
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=CategoryAlias)
+def bump_catalog_version(sender, **kwargs):
+    DataVersion.bump(DataVersion.CATALOG)
+
+
+@receiver(post_save, sender=CategoryAlias)
+def remap_alias_items(sender, instance, **kwargs):
+    """Move dishes whose category text matches an edited alias onto its category."""
+    with DataVersion.deferred():
+        MenuItem.objects.refresh_categories(keys={instance.key})
+        DataVersion.bump(DataVersion.CATALOG)
+
+
+@receiver(post_save, sender=RestaurantLocation)
+@receiver(post_delete, sender=RestaurantLocation)
+def bump_locations_version(sender, **kwargs):
+    DataVersion.bump(DataVersion.LOCATIONS)
+
+
+@receiver(post_save, sender=FilterConfiguration)
+@receiver(post_delete, sender=FilterConfiguration)
+@receiver(post_save, sender=QuickFilter)
+@receiver(post_delete, sender=QuickFilter)
+@receiver(post_save, sender=SortOption)
+@receiver(post_delete, sender=SortOption)
+@receiver(post_save, sender=AppConfiguration)
+@receiver(post_delete, sender=AppConfiguration)
+def bump_config_version(sender, **kwargs):
+    DataVersion.bump(DataVersion.CONFIG)
@@ -0,0 +1,212 @@
+"""Typeahead suggestions from an in-process prefix index.
+
+Dish names, restaurant names and categories are normalized, and every word
+suffix ("chicken burrito bowl", "burrito bowl", "bowl") goes into a sorted
+array, so a completion is a bisect plus a short scan. Prefixes that match
+many keys keep a precomputed top list, so short, hot prefixes never scan.
+
+The index is rebuilt per worker when the catalog DataVersion changes. Only
+dishes whose updated_at moved (or that appeared or disappeared) are
+re-indexed. Restaurants and categories are small and are rebuilt each time.
+"""
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import Counter
+
+from .fast_serializers import decimal_string
+from .models import Category, DataVersion, MenuItem, Restaurant
+from .versioning import VersionedCache
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Prefix ranges longer than this get a precomputed top list instead of a scan
+SCAN_LIMIT = 64
+# Hot prefixes up to this length are precomputed at build time, longer ones on first use
+WARM_LENGTH = 3
+# Re-index everything when more than this share of dishes changed
+REBUILD_RATIO = 0.1
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+DISH_COLUMNS = ['id', 'name', 'category', 'canonical_category_id', 'restaurant_id', 'protein', 'protein_per_100cal',
+                'density_label', 'updated_at']
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(WORD_RE.findall(text.lower()))
+
+
+def suffixes(text):
+    """Every word suffix of the normalized text, so prefixes match at any word."""
+    words = normalize(text).split()
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+class PrefixIndex:
+    """Sorted (key, id) pairs plus a score per id; returns the best ids for a prefix.
+
+    `entries` maps id -> (text, score). Higher scores rank first; ties keep
+    key order, so results are deterministic.
+    """
+
+    def __init__(self, entries):
+        self.texts = {pk: text for pk, (text, _) in entries.items()}
+        self.scores = {pk: score for pk, (_, score) in entries.items()}
+        self.keys = sorted((key, pk) for pk, text in self.texts.items() for key in suffixes(text))
+        self.top = {}
+        for length in range(1, WARM_LENGTH + 1):
+            for prefix in {key[:length] for key, _ in self.keys if len(key) >= length}:
+                self._remember(prefix)
+
+    def _range(self, prefix):
+        return (
+            bisect.bisect_left(self.keys, (prefix,)),
+            bisect.bisect_left(self.keys, (prefix + '\U0010ffff',)),
+        )
+
+    def _best(self, lo, hi, limit):
+        ids = dict.fromkeys(pk for _, pk in self.keys[lo:hi])
+        return heapq.nlargest(limit, ids, key=self.scores.__getitem__)
+
+    def _remember(self, prefix):
+        """Store the top list for a prefix whose range is too long to scan per request."""
+        lo, hi = self._range(prefix)
+        if hi - lo > SCAN_LIMIT:
+            self.top[prefix] = self._best(lo, hi, MAX_LIMIT)
+        else:
+            self.top.pop(prefix, None)
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        if prefix not in self.top:
+            lo, hi = self._range(prefix)
+            if hi - lo <= SCAN_LIMIT:
+                return self._best(lo, hi, limit)
+            self._remember(prefix)
+        return self.top[prefix][:limit]
+
+    def apply(self, removed, added):
+        """Return a new index without the `removed` ids and with `added` (id -> (text, score)).
+
+        Only the precomputed top lists whose prefix covers a touched key change:
+        additions are merged into them, and a list is recomputed from its range
+        only when one of its members was removed.
+        """
+        index = object.__new__(PrefixIndex)
+        index.texts = dict(self.texts)
+        index.scores = dict(self.scores)
+        index.keys = list(self.keys)
+        index.top = dict(self.top)
+
+        removed_keys = set()
+        for pk in removed:
+            for key in suffixes(index.texts.pop(pk, '')):
+                position = bisect.bisect_left(index.keys, (key, pk))
+                if position < len(index.keys) and index.keys[position] == (key, pk):
+                    del index.keys[position]
+                removed_keys.add(key)
+            index.scores.pop(pk, None)
+        additions = {}
+        for pk, (text, score) in added.items():
+            index.texts[pk] = text
+            index.scores[pk] = score
+            for key in suffixes(text):
+                bisect.insort(index.keys, (key, pk))
+                for length in range(1, len(key) + 1):
+                    additions.setdefault(key[:length], []).append(pk)
+
+        stale = {key[:length] for key in removed_keys for length in range(1, len(key) + 1)}
+        for prefix in stale | set(additions):
+            top = index.top.get(prefix)
+            if top is None:
+                continue  # cold prefix: computed on first use
+            if prefix in stale and removed.intersection(top):
+                index._remember(prefix)
+            else:
+                candidates = dict.fromkeys([*top, *additions.get(prefix, [])])
+                index.top[prefix] = heapq.nlargest(MAX_LIMIT, candidates, key=index.scores.__getitem__)
+        return index
+
+
+def dish_score(row):
+    """Dishes rank by protein density, then by protein."""
+    return (row['protein_per_100cal'], row['protein'])
+
+
+class SuggestIndex:
+    """Prefix indexes over available dishes, restaurants and categories."""
+
+    def __init__(self, dishes, dish_index=None):
+        """`dishes` maps id -> .values() row (DISH_COLUMNS) for every available dish."""
+        self.dishes = dishes
+        if dish_index is None:
+            dish_index = PrefixIndex({pk: (row['name'], dish_score(row)) for pk, row in dishes.items()})
+        self.dish_index = dish_index
+
+        self.restaurants = {row['id']: row for row in Restaurant.objects.values('id', 'slug', 'name', 'item_count')}
+        self.restaurant_index = PrefixIndex({
+            pk: (row['name'], (row['item_count'], -pk)) for pk, row in self.restaurants.items()
+        })
+
+        # Canonical categories, so every spelling of one category is a single /dishes?category= value
+        counts = Counter(row['canonical_category_id'] for row in dishes.values() if row['canonical_category_id'])
+        self.categories = {
+            row['id']: {'value': row['slug'], 'name': row['name'], 'count': counts[row['id']]}
+            for row in Category.objects.filter(id__in=counts).values('id', 'slug', 'name')
+        }
+        self.category_index = PrefixIndex({
+            pk: (row['name'], (row['count'], -pk)) for pk, row in self.categories.items()
+        })
+
+    @classmethod
+    def build(cls):
+        rows = MenuItem.objects.filter(is_available=True).values(*DISH_COLUMNS).iterator(chunk_size=2000)
+        return cls({row['id']: row for row in rows})
+
+    def refresh(self):
+        """Return an index for the current catalog, re-indexing only the dishes that changed."""
+        stamps = dict(MenuItem.objects.filter(is_available=True).values_list('id', 'updated_at'))
+        removed = {pk for pk, row in self.dishes.items() if stamps.get(pk) != row['updated_at']}
+        changed = [pk for pk, stamp in stamps.items() if pk not in self.dishes or pk in removed]
+        if len(removed) + len(changed) > REBUILD_RATIO * max(len(stamps), 1):
+            return self.build()
+
+        rows = {row['id']: row for row in MenuItem.objects.filter(id__in=changed).values(*DISH_COLUMNS)}
+        dishes = {pk: row for pk, row in self.dishes.items() if pk not in removed}
+        dishes.update(rows)
+        dish_index = self.dish_index.apply(
+            removed, {pk: (row['name'], dish_score(row)) for pk, row in rows.items()}
+        )
+        return SuggestIndex(dishes, dish_index)
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """Top completions per kind for a raw query string."""
+        prefix = normalize(query)
+        if not prefix:
+            return {'dishes': [], 'restaurants': [], 'categories': []}
+        return {
+            'dishes': [self._dish(pk) for pk in self.dish_index.search(prefix, limit)],
+            'restaurants': [
+                {key: self.restaurants[pk][key] for key in ['slug', 'name', 'item_count']}
+                for pk in self.restaurant_index.search(prefix, limit)
+            ],
+            'categories': [self.categories[pk] for pk in self.category_index.search(prefix, limit)],
+        }
+
+    def _dish(self, pk):
+        row = self.dishes[pk]
+        restaurant = self.restaurants.get(row['restaurant_id'], {})
+        return {
+            'id': pk,
+            'name': row['name'],
+            'category': row['category'],
+            'protein_per_100cal': decimal_string(row['protein_per_100cal']),
+            'density_label': row['density_label'],
+            'restaurant': {'slug': restaurant.get('slug'), 'name': restaurant.get('name')},
+        }
+
+
+suggest_index = VersionedCache(DataVersion.CATALOG, SuggestIndex.build, SuggestIndex.refresh)
@@ -1,10 +1,36 @@
 """Tests for Graze API location endpoints."""
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
 from decimal import Decimal
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from .models import Restaurant, RestaurantLocation, LocationFlag
+from config.models import FilterConfiguration, QuickFilter
+
+from .models import (
+    Category, CategoryAlias, DataVersion, Restaurant, RestaurantLocation, LocationFlag, MenuItem, category_key,
+    category_slug,
+)
+from .engine import DishColumns
+from .management.commands.benchmark_dishes import QUERIES as BENCHMARK_QUERIES
+from .geo import annotate_distance, cell_ranges, haversine_miles, nearest_location_distances
+from .kdtree import KDTree
+from .location_index import LocationIndex
+from .pareto import objective_key, pareto_frontier
+from .queries import DishQuery
+from .suggest import PrefixIndex
+from .views import DishListView
 
 
 class LocationListViewTests(TestCase):
@@ -163,6 +189,517 @@ class LocationListViewTests(TestCase):
         self.assertIn('bbox', response.data)
 
 
+class LocationGridCellTests(TestCase):
+    """Tests for the grid_cell spatial access path of radius and bbox searches."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+
+    def _locations(self, count, seed=7):
+        rng = random.Random(seed)
+        return RestaurantLocation.objects.bulk_create([
+            RestaurantLocation(
+                restaurant=self.restaurant,
+                name=f'Location {i}',
+                latitude=Decimal(rng.uniform(40.0, 41.5)).quantize(Decimal('0.0000001')),
+                longitude=Decimal(rng.uniform(-74.8, -73.2)).quantize(Decimal('0.0000001')),
+            )
+            for i in range(count)
+        ])
+
+    def test_grid_cell_tracks_coordinates(self):
+        """Test that grid_cell is kept in sync by save, bulk_create, bulk_update and update."""
+        location = RestaurantLocation.objects.create(
+            restaurant=self.restaurant, name='A', latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'),
+        )
+        self.assertEqual(location.grid_cell, RestaurantLocation.compute_grid_cell(40.7128, -74.0060))
+        self._locations(5)
+        for cell, lat, lng in RestaurantLocation.objects.values_list('grid_cell', 'latitude', 'longitude'):
+            self.assertEqual(cell, RestaurantLocation.compute_grid_cell(lat, lng))
+
+        RestaurantLocation.objects.filter(pk=location.pk).update(latitude=Decimal('34.05'))
+        location.refresh_from_db()
+        self.assertEqual(location.grid_cell, RestaurantLocation.compute_grid_cell(34.05, -74.0060))
+
+        location.longitude = Decimal('-118.24')
+        RestaurantLocation.objects.bulk_update([location], ['longitude'])
+        location.refresh_from_db()
+        self.assertEqual(location.grid_cell, RestaurantLocation.compute_grid_cell(34.05, -118.24))
+
+    def test_radius_matches_exhaustive_distances(self):
+        """Test that cell pruning finds exactly the locations an all-rows distance check finds."""
+        self._locations(300)
+        everything = annotate_distance(RestaurantLocation.objects.filter(is_active=True), 40.75, -74.0)
+        for radius in ['3', '12', '40']:
+            expected = set(everything.filter(distance_miles__lte=float(radius)).values_list('id', flat=True))
+            response = self.client.get('/api/v1/locations', {'lat': '40.75', 'lng': '-74.0', 'radius': radius})
+            self.assertEqual(response.data['meta']['total'], len(expected), radius)
+            self.assertTrue({location['id'] for location in response.data['data']} <= expected)
+
+    def test_radius_query_uses_cells(self):
+        """Test that radius and bbox searches filter on grid_cell before computing distances."""
+        self._locations(10)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/locations', {'lat': '40.75', 'lng': '-74.0', 'radius': '5'})
+            self.client.get('/api/v1/locations', {'bbox': '40.5,-74.2,40.9,-73.8'})
+        location_queries = [q['sql'] for q in queries.captured_queries if 'api_restaurantlocation' in q['sql']]
+        self.assertTrue(location_queries)
+        self.assertTrue(all('grid_cell' in sql for sql in location_queries))
+
+    def test_radius_across_antimeridian(self):
+        """Test that radius searches and nearest distances find locations on both sides of 180°."""
+        fiji = RestaurantLocation.objects.create(
+            restaurant=self.restaurant, name='Suva', latitude=Decimal('-17.7'), longitude=Decimal('179.95'),
+        )
+        other = Restaurant.objects.create(name='Cava', slug='cava')
+        samoa_side = RestaurantLocation.objects.create(
+            restaurant=other, name='Across', latitude=Decimal('-17.7'), longitude=Decimal('-179.95'),
+        )
+        for lng in ['179.99', '-179.99']:
+            response = self.client.get('/api/v1/locations', {'lat': '-17.7', 'lng': lng, 'radius': '10'})
+            self.assertEqual({location['id'] for location in response.data['data']}, {fiji.id, samoa_side.id}, lng)
+        distances = nearest_location_distances(-17.7, 179.99, 10)
+        self.assertEqual(set(distances), {self.restaurant.id, other.id})
+
+    def test_cell_ranges_cover_box(self):
+        """Test one cell range per grid row, spanning the box's columns."""
+        ranges = cell_ranges(40.05, 40.25, -74.05, -73.85)
+        self.assertEqual(len(ranges), 3)
+        for first, last in ranges:
+            self.assertEqual(last - first, 2)
+        self.assertEqual(ranges[1][0] - ranges[0][0], RestaurantLocation.GRID_COLUMNS)
+
+    def test_non_finite_search_is_rejected(self):
+        """Test that infinite or NaN coordinates are 400s instead of overflowing the grid."""
+        for query in ['lat=40&lng=-74&radius=inf', 'lat=40&lng=-74&radius=NaN', 'lat=inf&lng=0', 'bbox=0,0,1,inf']:
+            response = self.client.get(f'/api/v1/locations?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+
+class LocationIndexTests(TestCase):
+    """Tests for the in-process location index (LOCATION_INDEX=True)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        rng = random.Random(11)
+        self.restaurants = [
+            Restaurant.objects.create(name=f'Chain {i}', slug=f'chain-{i}') for i in range(3)
+        ]
+        RestaurantLocation.objects.bulk_create([
+            RestaurantLocation(
+                restaurant=rng.choice(self.restaurants),
+                name=f'Location {i}',
+                latitude=Decimal(rng.uniform(40.0, 41.5)).quantize(Decimal('0.0000001')),
+                longitude=Decimal(rng.uniform(-74.8, -73.2)).quantize(Decimal('0.0000001')),
+                is_active=i % 10 != 0,
+            )
+            for i in range(400)
+        ])
+
+    def _compare(self, params):
+        """The same request with and without the index, on both serializer paths."""
+        for fast in (False, True):
+            with override_settings(FAST_SERIALIZERS=fast):
+                expected = self.client.get('/api/v1/locations', params).data
+                with override_settings(LOCATION_INDEX=True):
+                    actual = self.client.get('/api/v1/locations', params).data
+            self.assertEqual(actual['meta'], expected['meta'], params)
+            self.assertEqual(
+                [(item['id'], item.get('distance_miles')) for item in actual['data']],
+                [(item['id'], item.get('distance_miles')) for item in expected['data']],
+                params,
+            )
+            self.assertEqual(actual['data'], expected['data'], params)
+
+    def test_matches_sql_searches(self):
+        """Test that radius, bbox and restaurant searches return what the SQL path returns."""
+        self._compare({'lat': '40.75', 'lng': '-74.0', 'radius': '10'})
+        self._compare({'lat': '40.75', 'lng': '-74.0', 'radius': '30', 'limit': '15'})
+        self._compare({'lat': '40.75', 'lng': '-74.0', 'radius': '30', 'restaurants': 'chain-1,chain-2'})
+        self._compare({'lat': '40.75', 'lng': '-74.0', 'bbox': '40.5,-74.2,40.9,-73.8'})
+        self._compare({'lat': '40.75', 'lng': '-74.0', 'radius': '20', 'fields': 'name', 'include': 'restaurants'})
+
+    def test_nearest(self):
+        """Test k-nearest against a brute-force sort, with and without a restaurant filter."""
+        index = LocationIndex.build()
+        self.assertEqual(len(index), 360)
+        locations = list(RestaurantLocation.objects.filter(is_active=True))
+        for restaurant_ids in (None, [self.restaurants[0].id]):
+            expected = sorted(
+                (haversine_miles(40.75, -74.0, float(loc.latitude), float(loc.longitude)), loc.id)
+                for loc in locations if restaurant_ids is None or loc.restaurant_id in restaurant_ids
+            )[:7]
+            found = index.nearest(40.75, -74.0, 7, restaurant_ids)
+            self.assertEqual([pk for pk, _ in found], [pk for _, pk in expected])
+            for (_, miles), (expected_miles, _) in zip(found, expected):
+                self.assertAlmostEqual(miles, expected_miles, places=6)
+
+    def test_rebuilds_on_location_writes(self):
+        """Test that the index picks up location changes through the locations version."""
+        params = {'lat': '40.75', 'lng': '-74.0', 'radius': '0.5'}
+        with override_settings(LOCATION_INDEX=True):
+            before = self.client.get('/api/v1/locations', params).data['meta']['total']
+            RestaurantLocation.objects.create(
+                restaurant=self.restaurants[0], name='New', latitude=Decimal('40.75'), longitude=Decimal('-74.0'),
+            )
+            response = self.client.get('/api/v1/locations', params)
+        self.assertEqual(response.data['meta']['total'], before + 1)
+        self.assertEqual(response.data['data'][0]['name'], 'New')
+
+    def test_dish_distances(self):
+        """Test that dish listings get the same per-restaurant distances from the index."""
+        for restaurant in self.restaurants:
+            MenuItem.objects.create(restaurant=restaurant, name=f'{restaurant.name} Bowl', calories=500,
+                                    protein=Decimal('40'), carbs=Decimal('40'), fat=Decimal('10'))
+        params = {'lat': '40.75', 'lng': '-74.0', 'radius': '15', 'sort': 'distance_asc'}
+        expected = self.client.get('/api/v1/dishes', params).data['data']
+        cache.clear()
+        with override_settings(LOCATION_INDEX=True):
+            self.assertEqual(self.client.get('/api/v1/dishes', params).data['data'], expected)
+
+
+class LocationClusterViewTests(TestCase):
+    """Tests for GET /api/v1/locations/clusters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        rng = random.Random(5)
+        self.restaurants = [Restaurant.objects.create(name=f'Chain {i}', slug=f'chain-{i}') for i in range(3)]
+        # Two metro areas plus a few locations across the antimeridian
+        centers = [(40.75, -74.0)] * 150 + [(34.05, -118.25)] * 100
+        RestaurantLocation.objects.bulk_create([
+            RestaurantLocation(
+                restaurant=rng.choice(self.restaurants),
+                name=f'Location {i}',
+                latitude=Decimal(lat + rng.uniform(-0.3, 0.3)).quantize(Decimal('0.0000001')),
+                longitude=Decimal(lng + rng.uniform(-0.3, 0.3)).quantize(Decimal('0.0000001')),
+            )
+            for i, (lat, lng) in enumerate(centers)
+        ] + [
+            RestaurantLocation(restaurant=self.restaurants[0], name='Fiji', latitude=Decimal('-17.7'),
+                               longitude=Decimal('179.9')),
+            RestaurantLocation(restaurant=self.restaurants[0], name='Samoa', latitude=Decimal('-13.8'),
+                               longitude=Decimal('-171.8')),
+            RestaurantLocation(restaurant=self.restaurants[1], name='Closed', latitude=Decimal('40.75'),
+                               longitude=Decimal('-74.0'), is_active=False),
+        ])
+
+    def _get(self, **params):
+        return self.client.get('/api/v1/locations/clusters', params)
+
+    def test_every_location_counted_at_every_zoom(self):
+        """Test that clusters cover all active locations at any zoom, with consistent breakdowns."""
+        previous = 0
+        for zoom in [0, 3, 6, 9, 12, 17]:
+            response = self._get(zoom=zoom)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['meta']['locations'], 252)
+            self.assertGreaterEqual(len(response.data['data']), previous)
+            previous = len(response.data['data'])
+            for item in response.data['data']:
+                self.assertEqual(sum(entry['count'] for entry in item['restaurants']), item['count'])
+                self.assertEqual(item['cluster'], item['count'] > 1)
+        self.assertLessEqual(len(self._get(zoom=0).data['data']), 4)
+
+        points = self._get(zoom=20).data
+        self.assertFalse(points['meta']['clusters'])
+        active = set(RestaurantLocation.objects.filter(is_active=True).values_list('id', flat=True))
+        self.assertEqual({item['id'] for item in points['data']}, active)
+        self.assertEqual(set(points['included']['restaurants']), {str(r.id) for r in self.restaurants})
+
+    def test_bbox(self):
+        """Test that only nodes inside the bbox are returned, including across the antimeridian."""
+        response = self._get(zoom=5, bbox='30,-125,45,-110')
+        self.assertEqual(response.data['meta']['locations'], 100)
+        for item in response.data['data']:
+            self.assertTrue(30 <= item['latitude'] <= 45 and -125 <= item['longitude'] <= -110)
+
+        pacific = self._get(zoom=12, bbox='-20,175,-10,190').data
+        self.assertEqual(pacific['meta']['locations'], 2)
+
+    def test_expansion_zoom_splits_cluster(self):
+        """Test that a cluster's expansion zoom shows its locations as more than one node."""
+        cluster = next(item for item in self._get(zoom=4).data['data'] if item['cluster'])
+        lat, lng = cluster['latitude'], cluster['longitude']
+        bbox = f'{lat - 1},{lng - 1},{lat + 1},{lng + 1}'
+        expanded = self._get(zoom=cluster['expansion_zoom'], bbox=bbox).data
+        self.assertGreater(len(expanded['data']), 1)
+        self.assertEqual(expanded['meta']['locations'], cluster['count'])
+
+    def test_cluster_ids(self):
+        """Test that cluster ids never collide with location ids and survive a rebuild."""
+        location_ids = set(RestaurantLocation.objects.values_list('id', flat=True))
+        for zoom in [0, 3, 8]:
+            items = self._get(zoom=zoom).data['data']
+            clusters = [item['id'] for item in items if item['cluster']]
+            self.assertTrue(clusters)
+            self.assertTrue(all(isinstance(pk, str) and pk.startswith('c') for pk in clusters))
+            self.assertFalse(location_ids.intersection(clusters))
+            self.assertEqual(len(set(clusters)), len(clusters))
+
+        before = [item['id'] for item in self._get(zoom=3).data['data']]
+        RestaurantLocation.objects.filter(name='Closed').update(name='Still closed')
+        self.assertEqual([item['id'] for item in self._get(zoom=3).data['data']], before)
+
+    def test_rebuilds_on_location_writes(self):
+        """Test that the cluster index follows the locations version."""
+        RestaurantLocation.objects.filter(name='Fiji').update(is_active=False)
+        self.assertEqual(self._get(zoom=0).data['meta']['locations'], 251)
+
+    def test_invalid_params(self):
+        """Test that a missing zoom and malformed bboxes are 400s."""
+        for params in [{}, {'zoom': 'x'}, {'zoom': '30'}, {'zoom': '3', 'bbox': '1,2,3'}, {'zoom': '3', 'bbox': '50,0,40,10'}]:
+            response = self._get(**params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+def _protobuf_fields(data):
+    """Decode a protobuf message into [(field number, int or bytes), ...]."""
+    fields, position = [], 0
+
+    def varint():
+        nonlocal position
+        result = shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            result |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                return result
+
+    while position < len(data):
+        key = varint()
+        if key & 7 == 0:
+            fields.append((key >> 3, varint()))
+        else:
+            length = varint()
+            fields.append((key >> 3, data[position:position + length]))
+            position += length
+    return fields
+
+
+def _read_varints(data):
+    values, result, shift = [], 0, 0
+    for byte in data:
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            values.append(result)
+            result = shift = 0
+    return values
+
+
+def decode_tile(data):
+    """The single layer of an MVT as {'name', 'extent', 'features': {id: (x, y, properties)}}."""
+    (number, layer), = _protobuf_fields(data)
+    layer = _protobuf_fields(layer)
+    keys = [value.decode() for number, value in layer if number == 3]
+    values = [_protobuf_fields(value)[0][1].decode() for number, value in layer if number == 4]
+    features = {}
+    for feature in (value for number, value in layer if number == 2):
+        feature = dict(_protobuf_fields(feature))
+        tags = _read_varints(feature[2])
+        command, x, y = _read_varints(feature[4])
+        properties = {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)}
+        features[feature[1]] = ((x >> 1) ^ -(x & 1), (y >> 1) ^ -(y & 1), properties)
+    fields = dict(layer)
+    return {'name': fields[1].decode(), 'version': fields[15], 'extent': fields[5], 'features': features}
+
+
+class LocationTileViewTests(TestCase):
+    """Tests for the location vector tiles and their on-disk cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.tile_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tile_root, ignore_errors=True)
+        settings_override = override_settings(LOCATION_TILE_ROOT=self.tile_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle', brand_color='#A81612')
+        cava = Restaurant.objects.create(name='Cava', slug='cava', brand_color='')
+        self.union_square = RestaurantLocation.objects.create(
+            restaurant=chipotle, name='Union Square', latitude=Decimal('40.7359'), longitude=Decimal('-73.9911'),
+        )
+        self.soho = RestaurantLocation.objects.create(
+            restaurant=cava, name='SoHo', latitude=Decimal('40.7233'), longitude=Decimal('-74.0030'),
+        )
+        self.la = RestaurantLocation.objects.create(
+            restaurant=chipotle, name='LA', latitude=Decimal('34.0522'), longitude=Decimal('-118.2437'),
+        )
+
+    def test_tile_contents(self):
+        """Test that a tile holds its locations as points with restaurant attributes."""
+        # Zoom 12 tile containing lower Manhattan
+        response = self.client.get('/api/v1/locations/tiles/12/1206/1539.mvt')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        layer = decode_tile(response.content)
+        self.assertEqual((layer['name'], layer['version'], layer['extent']), ('locations', 2, 4096))
+        self.assertEqual(set(layer['features']), {self.union_square.id, self.soho.id})
+        x, y, properties = layer['features'][self.union_square.id]
+        self.assertTrue(0 <= x < 4096 and 0 <= y < 4096)
+        self.assertEqual(properties, {'restaurant_slug': 'chipotle', 'brand_color': '#A81612'})
+        # Blank attributes are left out
+        self.assertEqual(layer['features'][self.soho.id][2], {'restaurant_slug': 'cava'})
+        # Union Square is north-east of SoHo
+        soho_x, soho_y, _ = layer['features'][self.soho.id]
+        self.assertTrue(x > soho_x and y < soho_y)
+
+        world = decode_tile(self.client.get('/api/v1/locations/tiles/0/0/0.mvt').content)
+        self.assertEqual(len(world['features']), 3)
+
+    def test_disk_cache_by_version(self):
+        """Test that tiles are stored per data version, read back without queries, and pruned on changes."""
+        tilejson = self.client.get('/api/v1/locations/tiles.json').data
+        template = tilejson['tiles'][0]
+        self.assertTrue(template.endswith('/{z}/{x}/{y}.mvt'))
+        version = template.split('/tiles/')[1].split('/')[0]
+
+        url = f'/api/v1/locations/tiles/{version}/12/1206/1539.mvt'
+        first = self.client.get(url)
+        self.assertEqual(first['Cache-Control'], 'public, max-age=31536000, immutable')
+        path = os.path.join(self.tile_root, version, '12', '1206', '1539.mvt')
+        with open(path, 'rb') as tile:
+            self.assertEqual(tile.read(), first.content)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertFalse([q for q in queries.captured_queries if 'api_restaurantlocation' in q['sql']])
+
+        self.soho.delete()
+        stale = self.client.get(url)
+        self.assertEqual(stale.status_code, status.HTTP_302_FOUND)
+        self.assertNotIn(version, stale['Location'])
+        fresh = self.client.get(stale['Location'])
+        self.assertEqual(set(decode_tile(fresh.content)['features']), {self.union_square.id})
+        self.assertFalse(os.path.exists(os.path.join(self.tile_root, version)))
+
+    def test_version_follows_locations_and_tile_attributes(self):
+        """Test that dish edits keep the tile version while restaurant tile attributes bump it."""
+        def version():
+            return self.client.get('/api/v1/locations/tiles.json').data['tiles'][0].split('/tiles/')[1].split('/')[0]
+
+        first = version()
+        chipotle = self.union_square.restaurant
+        MenuItem.objects.create(
+            restaurant=chipotle, name='Bowl', calories=500, protein=Decimal('30'), carbs=Decimal('40'), fat=Decimal('20'),
+        )
+        chipotle.name = 'Chipotle Mexican Grill'
+        chipotle.save()
+        self.assertEqual(version(), first)
+
+        chipotle.brand_color = '#000000'
+        chipotle.save()
+        second = version()
+        self.assertNotEqual(second, first)
+        Restaurant.objects.filter(pk=chipotle.pk).update(slug='chipotle-grill')
+        self.assertNotEqual(version(), second)
+
+    def test_out_of_range_tile(self):
+        """Test that tiles outside the zoom's grid are 404s."""
+        for url in ['/api/v1/locations/tiles/2/4/0.mvt', '/api/v1/locations/tiles/23/0/0.mvt']:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tile_accept_headers(self):
+        """Test that clients asking for vector tiles or protobuf get the tile, not a 406."""
+        for accept in ['application/vnd.mapbox-vector-tile', 'application/x-protobuf', '*/*']:
+            response = self.client.get('/api/v1/locations/tiles/12/1206/1539.mvt', HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, accept)
+            self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+
+
+class LocationExportViewTests(TestCase):
+    """Tests for the streamed GeoJSON / NDJSON location export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        self.union_square = RestaurantLocation.objects.create(
+            restaurant=chipotle, name='Union Square', latitude=Decimal('40.7359'), longitude=Decimal('-73.9911'),
+            city='New York', state='NY',
+        )
+        self.la = RestaurantLocation.objects.create(
+            restaurant=chipotle, name='LA', latitude=Decimal('34.0522'), longitude=Decimal('-118.2437'),
+        )
+        RestaurantLocation.objects.create(
+            restaurant=chipotle, name='Closed', latitude=Decimal('40.0'), longitude=Decimal('-75.0'), is_active=False,
+        )
+
+    def test_geojson(self):
+        """Test that the GeoJSON export is a FeatureCollection of active locations."""
+        response = self.client.get('/api/v1/locations/export.geojson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        self.assertIn('locations.geojson', response['Content-Disposition'])
+        collection = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual([f['id'] for f in collection['features']], [self.union_square.id, self.la.id])
+        feature = collection['features'][0]
+        self.assertEqual(feature['geometry'], {'type': 'Point', 'coordinates': [-73.9911, 40.7359]})
+        self.assertEqual(feature['properties']['restaurant_slug'], 'chipotle')
+        self.assertEqual(feature['properties']['city'], 'New York')
+
+    def test_ndjson(self):
+        """Test that the NDJSON export has one feature per line."""
+        response = self.client.get('/api/v1/locations/export.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['properties']['name'] for line in lines], ['Union Square', 'LA'])
+
+    def test_gzip(self):
+        """Test that the export is gzipped when the client accepts it."""
+        response = self.client.get('/api/v1/locations/export.ndjson', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_gzip_refused(self):
+        """Test that q=0 refuses gzip, explicitly or through the wildcard."""
+        for accept_encoding in ['gzip;q=0', 'gzip; q=0.0, deflate', '*;q=0', 'identity', '']:
+            response = self.client.get('/api/v1/locations/export.ndjson', HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'), accept_encoding)
+            self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 2)
+        response = self.client.get('/api/v1/locations/export.ndjson', HTTP_ACCEPT_ENCODING='br, *;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_accept_headers(self):
+        """Test that clients asking for the served media types get them, not a 406."""
+        for export_format, accept in [('geojson', 'application/geo+json'), ('ndjson', 'application/x-ndjson')]:
+            response = self.client.get(f'/api/v1/locations/export.{export_format}', HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, accept)
+            self.assertEqual(response['Content-Type'], accept)
+
+    def test_empty(self):
+        """Test that an empty export is still valid GeoJSON."""
+        RestaurantLocation.objects.all().delete()
+        response = self.client.get('/api/v1/locations/export.geojson')
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['features'], [])
+
+    def test_unknown_format(self):
+        """Test that unknown export formats return 404."""
+        response = self.client.get('/api/v1/locations/export.csv')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_command(self):
+        """Test that export_locations writes the same export to stdout or a gzipped file."""
+        stdout = io.StringIO()
+        call_command('export_locations', format='ndjson', chunk_size=1, stdout=stdout)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 2)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'locations.geojson.gz')
+        call_command('export_locations', output=path, stderr=io.StringIO())
+        with gzip.open(path, 'rt') as export:
+            self.assertEqual(len(json.load(export)['features']), 2)
+
+
 class LocationDetailViewTests(TestCase):
     """Tests for GET /api/v1/locations/<id> endpoint."""
 
@@ -298,3 +835,1354 @@ class LocationFlagCreateViewTests(TestCase):
         response = self.client.post('/api/v1/location-flags', data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MenuItemDensityTests(TestCase):
+    """Tests for the stored protein_per_100cal / density_label columns."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Test Chipotle', slug='chipotle')
+
+    def _item(self, name, calories, protein, **kwargs):
+        return MenuItem.objects.create(
+            restaurant=self.restaurant, name=name, calories=calories,
+            protein=Decimal(protein), carbs=Decimal('10'), fat=Decimal('5'), **kwargs
+        )
+
+    def test_save_computes_density(self):
+        """Test that saving an item stores its ratio and label."""
+        item = self._item('Chicken Bowl', 400, '52')
+        item.refresh_from_db()
+        self.assertEqual(item.protein_per_100cal, Decimal('13.0'))
+        self.assertEqual(item.density_label, 'excellent')
+
+        item.calories = 1000
+        item.save(update_fields=['calories'])
+        item.refresh_from_db()
+        self.assertEqual(item.protein_per_100cal, Decimal('5.2'))
+        self.assertEqual(item.density_label, 'average')
+
+    def test_zero_calories(self):
+        """Test that zero-calorie items get a zero ratio instead of an error."""
+        item = self._item('Water', 0, '0')
+        self.assertEqual(item.protein_per_100cal, Decimal('0.0'))
+        self.assertEqual(item.density_label, 'low')
+
+    def test_queryset_update_refreshes_density(self):
+        """Test that bulk .update() of protein/calories keeps stored values correct."""
+        item = self._item('Steak Bowl', 500, '20')
+        MenuItem.objects.filter(pk=item.pk).update(protein=Decimal('50'))
+        item.refresh_from_db()
+        self.assertEqual(item.protein_per_100cal, Decimal('10.0'))
+        self.assertEqual(item.density_label, 'good')
+
+    def test_bulk_create_computes_density(self):
+        """Test that bulk_create fills the stored columns."""
+        MenuItem.objects.bulk_create([
+            MenuItem(restaurant=self.restaurant, name='Salad', calories=200, protein=Decimal('8'),
+                     carbs=Decimal('10'), fat=Decimal('5')),
+        ])
+        item = MenuItem.objects.get(name='Salad')
+        self.assertEqual(item.protein_per_100cal, Decimal('4.0'))
+        self.assertEqual(item.density_label, 'low')
+
+    def test_default_sort_uses_stored_ratio(self):
+        """Test that the default dish sort orders by stored protein density."""
+        self._item('Low', 500, '10')
+        self._item('High', 200, '30')
+        self._item('Mid', 400, '36')
+
+        response = self.client.get('/api/v1/dishes')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [dish['name'] for dish in response.data['data']]
+        self.assertEqual(names, ['High', 'Mid', 'Low'])
+        self.assertEqual(response.data['data'][0]['protein_per_100cal'], '15.0')
+        self.assertEqual(response.data['data'][0]['density_label'], 'excellent')
+
+
+class DishCursorPaginationTests(TestCase):
+    """Tests for cursor mode on GET /api/v1/dishes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Test Chipotle', slug='chipotle')
+        # Duplicate protein values so the id tie-breaker matters
+        for i, protein in enumerate(['30', '30', '30', '20', '20', '10', '40']):
+            MenuItem.objects.create(
+                restaurant=self.restaurant, name=f'Dish {i}', calories=300 + i * 10,
+                protein=Decimal(protein), carbs=Decimal('10'), fat=Decimal('5'),
+            )
+
+    def _walk(self, sort, limit):
+        ids, cursor, pages = [], '', 0
+        while True:
+            response = self.client.get('/api/v1/dishes', {'sort': sort, 'limit': limit, 'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(dish['id'] for dish in response.data['data'])
+            pages += 1
+            cursor = response.data['meta']['next_cursor']
+            if not cursor:
+                self.assertFalse(response.data['meta']['has_more'])
+                return ids, pages
+
+    def test_cursor_walk_matches_offset_order(self):
+        """Test that following next_cursor visits every dish once, in sort order."""
+        for sort in ['protein_desc', 'protein_asc', 'protein_ratio_desc', 'alpha_asc']:
+            ids, pages = self._walk(sort, 2)
+            expected = [d['id'] for d in self.client.get('/api/v1/dishes', {'sort': sort, 'limit': 100}).data['data']]
+            self.assertEqual(ids, expected)
+            self.assertEqual(len(set(ids)), 7)
+            self.assertEqual(pages, 4)
+
+    def test_first_page_includes_total(self):
+        """Test that only the first cursor page pays for the count."""
+        first = self.client.get('/api/v1/dishes', {'limit': 3, 'cursor': ''})
+        self.assertEqual(first.data['meta']['total'], 7)
+
+        second = self.client.get('/api/v1/dishes', {'limit': 3, 'cursor': first.data['meta']['next_cursor']})
+        self.assertNotIn('total', second.data['meta'])
+
+    def test_invalid_cursor(self):
+        """Test error handling for malformed or mismatched cursors."""
+        response = self.client.get('/api/v1/dishes', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+        cursor = self.client.get('/api/v1/dishes', {'limit': 2, 'cursor': '', 'sort': 'protein_desc'}).data['meta']['next_cursor']
+        response = self.client.get('/api/v1/dishes', {'cursor': cursor, 'sort': 'calories_asc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_positive_limit(self):
+        """Test that limit=0 or below returns one-row pages instead of failing."""
+        for engine in ['orm', 'columnar']:
+            with override_settings(DISH_QUERY_ENGINE=engine):
+                cache.clear()
+                for limit in [0, -5]:
+                    response = self.client.get('/api/v1/dishes', {'limit': limit, 'cursor': ''})
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(len(response.data['data']), 1)
+                    self.assertEqual(response.data['meta']['limit'], 1)
+                    self.assertTrue(response.data['meta']['has_more'])
+
+
+class DishSearchTests(TestCase):
+    """Tests for full-text search on GET /api/v1/dishes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        self.cava = Restaurant.objects.create(name='Cava', slug='cava')
+        self._item(self.chipotle, 'Chicken Burrito Bowl', 'Entrées')
+        self._item(self.chipotle, 'Steak Salad', 'Salads')
+        self._item(self.cava, 'Chicken Pita', 'Pitas')
+        self._item(self.cava, 'Harissa Bowl', 'Bowls')
+
+    def _item(self, restaurant, name, category):
+        return MenuItem.objects.create(
+            restaurant=restaurant, name=name, category=category, calories=500,
+            protein=Decimal('30'), carbs=Decimal('40'), fat=Decimal('15'),
+        )
+
+    def _names(self, **params):
+        response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [dish['name'] for dish in response.data['data']]
+
+    def test_prefix_terms_match_all_words(self):
+        """Test that every term is prefix-matched across name and restaurant."""
+        self.assertEqual(self._names(search='chick bow'), ['Chicken Burrito Bowl'])
+        self.assertCountEqual(self._names(search='chipot'), ['Chicken Burrito Bowl', 'Steak Salad'])
+
+    def test_category_and_accents(self):
+        """Test that categories are searchable and accents are folded."""
+        self.assertEqual(self._names(search='entree'), ['Chicken Burrito Bowl'])
+
+    def test_relevance_ranking(self):
+        """Test that name matches outrank restaurant-name matches by default."""
+        self._item(self.chipotle, 'Cava Style Bowl', 'Bowls')
+        names = self._names(search='cava')
+        self.assertEqual(names[0], 'Cava Style Bowl')
+        self.assertEqual(len(names), 3)
+
+    def test_index_follows_renames(self):
+        """Test that item and restaurant renames are reflected in search."""
+        item = MenuItem.objects.get(name='Steak Salad')
+        item.name = 'Carne Asada Salad'
+        item.save()
+        self.assertEqual(self._names(search='asada'), ['Carne Asada Salad'])
+
+        self.cava.name = 'Cava Grill'
+        self.cava.save()
+        self.assertCountEqual(self._names(search='grill'), ['Chicken Pita', 'Harissa Bowl'])
+
+    def test_relevance_cursor_pagination(self):
+        """Test that relevance-sorted results can be paged with cursors."""
+        first = self.client.get('/api/v1/dishes', {'search': 'chicken', 'limit': 1, 'cursor': ''})
+        self.assertEqual(first.data['filters_applied']['sort'], 'relevance')
+        second = self.client.get('/api/v1/dishes', {'search': 'chicken', 'limit': 1, 'cursor': first.data['meta']['next_cursor']})
+        names = [first.data['data'][0]['name'], second.data['data'][0]['name']]
+        self.assertCountEqual(names, ['Chicken Burrito Bowl', 'Chicken Pita'])
+        self.assertIsNone(second.data['meta']['next_cursor'])
+
+
+class DishFuzzySearchTests(TestCase):
+    """Tests for search_mode=fuzzy on GET /api/v1/dishes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name in [
+            (chipotle, 'Chicken Burrito Bowl'),
+            (chipotle, 'Steak Salad'),
+            (cava, 'Chicken Pita'),
+            (cava, 'Harissa Bowl'),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, calories=500,
+                protein=Decimal('30'), carbs=Decimal('40'), fat=Decimal('15'),
+            )
+
+    def _search(self, query):
+        response = self.client.get('/api/v1/dishes', {'search': query, 'search_mode': 'fuzzy'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_typos_still_match(self):
+        """Test that misspelled dish and restaurant names return ranked results."""
+        response = self._search('chiken bowl')
+        names = [dish['name'] for dish in response.data['data']]
+        self.assertEqual(names[0], 'Chicken Burrito Bowl')
+        self.assertEqual(response.data['meta']['did_you_mean'], 'chicken bowl')
+
+        response = self._search('chipolte')
+        names = [dish['name'] for dish in response.data['data']]
+        self.assertCountEqual(names, ['Chicken Burrito Bowl', 'Steak Salad'])
+        self.assertEqual(response.data['meta']['did_you_mean'], 'chipotle')
+
+    def test_no_suggestion_for_known_words(self):
+        """Test that correctly spelled queries have no did_you_mean."""
+        response = self._search('harissa')
+        self.assertEqual([dish['name'] for dish in response.data['data']], ['Harissa Bowl'])
+        self.assertNotIn('did_you_mean', response.data['meta'])
+
+    def test_index_rebuilds_on_catalog_change(self):
+        """Test that new items are searchable without restarting the worker."""
+        self._search('quesadilla')
+        MenuItem.objects.create(
+            restaurant=Restaurant.objects.get(slug='chipotle'), name='Quesadilla', calories=900,
+            protein=Decimal('40'), carbs=Decimal('70'), fat=Decimal('45'),
+        )
+        response = self._search('quesadila')
+        self.assertEqual([dish['name'] for dish in response.data['data']], ['Quesadilla'])
+
+
+class DishColumnarEngineTests(TestCase):
+    """Tests that DISH_QUERY_ENGINE=columnar matches the ORM path."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        cava = Restaurant.objects.create(name='Cava', slug='cava')
+        dishes = [
+            (chipotle, 'Chicken Bowl', 'Bowls', 600, '45', '50', '20'),
+            (chipotle, 'Steak Bowl', 'Bowls', 550, '45', '48', '18'),
+            (chipotle, 'Chips', 'Sides', 540, '7', '73', '25'),
+            (chipotle, 'Water', 'Drinks', 0, '0', '0', '0'),
+            (cava, 'Harissa Bowl', 'Bowls', 700, '38', '60', '35'),
+            (cava, 'Greek Salad', 'Salads', 400, '30', '20', '22'),
+            (cava, 'Pita Chips', 'Sides', 540, '7', '60', '28'),
+        ]
+        for restaurant, name, category, calories, protein, carbs, fat in dishes:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category=category, calories=calories,
+                protein=Decimal(protein), carbs=Decimal(carbs), fat=Decimal(fat),
+            )
+        MenuItem.objects.filter(name__in=['Chips', 'Pita Chips', 'Greek Salad']).update(is_vegetarian=True)
+        MenuItem.objects.filter(name__in=['Chips', 'Greek Salad']).update(is_vegan=True)
+        MenuItem.objects.filter(category='Bowls').update(is_gluten_free=True)
+        MenuItem.objects.filter(category='Bowls').update(sodium=1100, fiber=Decimal('8'))
+        MenuItem.objects.filter(name__in=['Chips', 'Greek Salad']).update(sodium=390)
+
+    def _get(self, engine, params):
+        with override_settings(DISH_QUERY_ENGINE=engine):
+            response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_engine_matches_orm(self):
+        """Test that filters, sorts and offset pages are identical on both paths."""
+        cases = [
+            {},
+            {'sort': 'protein_desc', 'limit': 3, 'offset': 2},
+            {'sort': 'calories_asc', 'protein_min': '10'},
+            {'sort': 'alpha_asc', 'restaurants': 'cava'},
+            {'sort': 'fat_asc', 'category': 'bowl', 'calories_max': '650'},
+            {'sort': 'carbs_asc', 'limit': 2},
+            {'density': 'excellent,good'},
+            {'sort': 'calories_asc', 'diet': 'vegetarian,vegan'},
+            {'diet': 'gluten_free', 'density': 'good', 'restaurants': 'chipotle'},
+            {'sort': 'sodium_asc'},
+            {'sort': 'fiber_desc', 'sodium_max': '1200'},
+            {'sodium_max': '1000'},
+        ]
+        for params in cases:
+            self.assertEqual(self._get('columnar', params), self._get('orm', params), params)
+
+    def test_benchmark_runs_each_engine(self):
+        """Test that benchmark_dishes times each path rather than responses cached by the other."""
+        with mock.patch.object(
+            DishListView, '_queryset_page', autospec=True, side_effect=DishListView._queryset_page,
+        ) as queryset_page, mock.patch.object(
+            DishListView, '_engine_page', autospec=True, side_effect=DishListView._engine_page,
+        ) as engine_page:
+            call_command('benchmark_dishes', items=50, repeat=2, stdout=io.StringIO())
+        # A warm-up request plus every query on each path
+        self.assertEqual(queryset_page.call_count, 1 + len(BENCHMARK_QUERIES) * 2)
+        self.assertEqual(engine_page.call_count, 1 + len(BENCHMARK_QUERIES) * 2)
+
+    def test_name_sort_uses_orm(self):
+        """Test that alpha_asc is left to the database, whose collation orders the names."""
+        engine = DishColumns.build()
+        self.assertFalse(engine.supports(DishQuery({'sort': 'alpha_asc'})))
+        self.assertTrue(engine.supports(DishQuery({'sort': 'protein_desc'})))
+
+    def test_engine_cursor_walk(self):
+        """Test that cursors work across both paths."""
+        ids = []
+        cursor = ''
+        while cursor is not None:
+            data = self._get('columnar', {'sort': 'protein_desc', 'limit': 2, 'cursor': cursor})
+            ids.extend(dish['id'] for dish in data['data'])
+            cursor = data['meta']['next_cursor']
+        expected = [dish['id'] for dish in self._get('orm', {'sort': 'protein_desc', 'limit': 100})['data']]
+        self.assertEqual(ids, expected)
+
+    def test_engine_sees_new_items(self):
+        """Test that the engine snapshot is rebuilt when the catalog changes."""
+        self._get('columnar', {})
+        MenuItem.objects.filter(name='Chips').update(is_available=False)
+        names = [dish['name'] for dish in self._get('columnar', {'limit': 100})['data']]
+        self.assertNotIn('Chips', names)
+
+
+class DishDensityDietFilterTests(TestCase):
+    """Tests for the density= and diet= filters on GET /api/v1/dishes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        restaurant = Restaurant.objects.create(name='Cava', slug='cava')
+        dishes = [
+            ('Chicken Bowl', 500, '65', False, False),   # excellent
+            ('Lentil Bowl', 500, '62', True, True),      # excellent
+            ('Falafel Wrap', 500, '45', True, True),     # good
+            ('Feta Salad', 400, '34', True, False),      # good
+            ('Fries', 400, '4', True, True),             # low
+        ]
+        for name, calories, protein, vegetarian, vegan in dishes:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, calories=calories, protein=Decimal(protein),
+                carbs=Decimal('30'), fat=Decimal('10'), is_vegetarian=vegetarian, is_vegan=vegan,
+            )
+
+    def _names(self, params):
+        response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [dish['name'] for dish in response.data['data']]
+
+    def test_density_filter(self):
+        """Test that density= accepts several labels."""
+        self.assertEqual(self._names({'density': 'excellent'}), ['Chicken Bowl', 'Lentil Bowl'])
+        self.assertEqual(
+            self._names({'density': 'good,excellent'}),
+            ['Chicken Bowl', 'Lentil Bowl', 'Falafel Wrap', 'Feta Salad'],
+        )
+
+    def test_diet_filters_combine(self):
+        """Test that every listed diet must match, alongside density."""
+        self.assertEqual(self._names({'diet': 'vegan'}), ['Lentil Bowl', 'Falafel Wrap', 'Fries'])
+        self.assertEqual(self._names({'diet': 'vegetarian', 'density': 'good'}), ['Falafel Wrap', 'Feta Salad'])
+        self.assertEqual(self._names({'diet': 'vegan,vegetarian', 'density': 'excellent'}), ['Lentil Bowl'])
+
+    def test_filters_applied(self):
+        """Test that the parsed filters are echoed back."""
+        response = self.client.get('/api/v1/dishes', {'density': 'good', 'diet': 'vegan'})
+        self.assertEqual(response.data['filters_applied']['density'], ['good'])
+        self.assertEqual(response.data['filters_applied']['diet'], ['vegan'])
+
+    def test_unknown_values_rejected(self):
+        """Test that unknown density labels and diets are 400s."""
+        for params in ({'density': 'great'}, {'diet': 'keto'}):
+            response = self.client.get('/api/v1/dishes', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
+
+
+class DishNutrientFilterTests(TestCase):
+    """Tests for fiber/sodium/sugar/saturated fat ranges and sorts, which may be NULL."""
+
+    def setUp(self):
+        self.client = APIClient()
+        restaurant = Restaurant.objects.create(name='Sweetgreen', slug='sweetgreen')
+        dishes = [
+            ('Harvest Bowl', 1200, '12', '9'),
+            ('Kale Caesar', 450, '3', '6'),
+            ('Shroomami', 900, '9', None),
+            ('Lemonade', None, None, '30'),
+        ]
+        for name, sodium, fiber, sugar in dishes:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, calories=500, protein=Decimal('20'), carbs=Decimal('40'),
+                fat=Decimal('20'), sodium=sodium, fiber=fiber and Decimal(fiber), sugar=sugar and Decimal(sugar),
+            )
+
+    def _names(self, params):
+        response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [dish['name'] for dish in response.data['data']]
+
+    def test_ranges_skip_unknown_values(self):
+        """Test that a dish with no sodium listed is not treated as low sodium."""
+        self.assertEqual(self._names({'sodium_max': '1000', 'sort': 'alpha_asc'}), ['Kale Caesar', 'Shroomami'])
+        self.assertEqual(self._names({'fiber_min': '5', 'sugar_max': '10'}), ['Harvest Bowl'])
+
+    def test_sorts_list_unknown_values_last(self):
+        """Test that nutrient sorts keep every dish, with unknown values last in either direction."""
+        expected = {
+            'sodium_asc': ['Kale Caesar', 'Shroomami', 'Harvest Bowl', 'Lemonade'],
+            'fiber_desc': ['Harvest Bowl', 'Shroomami', 'Kale Caesar', 'Lemonade'],
+            'sugar_asc': ['Kale Caesar', 'Harvest Bowl', 'Lemonade', 'Shroomami'],
+        }
+        for engine in ['orm', 'columnar']:
+            with override_settings(DISH_QUERY_ENGINE=engine):
+                cache.clear()
+                for sort, names in expected.items():
+                    self.assertEqual(self._names({'sort': sort}), names, (engine, sort))
+                    response = self.client.get('/api/v1/dishes', {'sort': sort})
+                    self.assertEqual(response.data['meta']['total'], 4)
+
+    def test_cursor_walk_on_nullable_sort(self):
+        """Test that keyset cursors page through a nutrient sort, into the NULL tail."""
+        MenuItem.objects.create(
+            restaurant=Restaurant.objects.get(), name='Iced Tea', calories=500, protein=Decimal('20'),
+            carbs=Decimal('40'), fat=Decimal('20'),
+        )
+        for engine in ['orm', 'columnar']:
+            for sort, expected in [
+                ('sodium_asc', ['Kale Caesar', 'Shroomami', 'Harvest Bowl', 'Lemonade', 'Iced Tea']),
+                ('fiber_desc', ['Harvest Bowl', 'Shroomami', 'Kale Caesar', 'Iced Tea', 'Lemonade']),
+            ]:
+                with override_settings(DISH_QUERY_ENGINE=engine):
+                    cache.clear()
+                    names = []
+                    cursor = ''
+                    while cursor is not None:
+                        response = self.client.get('/api/v1/dishes', {'sort': sort, 'limit': 1, 'cursor': cursor})
+                        names.extend(dish['name'] for dish in response.data['data'])
+                        cursor = response.data['meta']['next_cursor']
+                    self.assertEqual(names, expected, (engine, sort))
+
+    def test_preset_on_nullable_sort(self):
+        """Test that a cached preset list pages into the NULL tail too."""
+        QuickFilter.objects.create(
+            name='low_sodium', label='Low Sodium', icon='Heart', description='Least sodium first',
+            filter_params={'sort': 'sodium_asc'},
+        )
+        first = self.client.get('/api/v1/dishes', {'preset': 'low_sodium', 'limit': 3, 'cursor': ''})
+        self.assertEqual([d['name'] for d in first.data['data']], ['Kale Caesar', 'Shroomami', 'Harvest Bowl'])
+        second = self.client.get(
+            '/api/v1/dishes', {'preset': 'low_sodium', 'limit': 3, 'cursor': first.data['meta']['next_cursor']},
+        )
+        self.assertEqual([d['name'] for d in second.data['data']], ['Lemonade'])
+
+    def test_invalid_number(self):
+        """Test that non-numeric nutrient bounds are 400s."""
+        response = self.client.get('/api/v1/dishes', {'sodium_max': 'low'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sodium_max', response.data)
+
+
+class DishLocationTests(TestCase):
+    """Tests for lat/lng/radius and distance_asc on GET /api/v1/dishes."""
+
+    CENTER = {'lat': '40.7128', 'lng': '-74.0060'}
+
+    def setUp(self):
+        self.client = APIClient()
+        near = Restaurant.objects.create(name='Near', slug='near')
+        far = Restaurant.objects.create(name='Far', slug='far')
+        nowhere = Restaurant.objects.create(name='Nowhere', slug='nowhere')
+        for restaurant, lat in [(near, '40.7228'), (far, '40.8578'), (far, '41.1000')]:
+            RestaurantLocation.objects.create(
+                restaurant=restaurant, name=restaurant.name, latitude=Decimal(lat), longitude=Decimal('-74.0060'),
+                city='New York', state='NY',
+            )
+        RestaurantLocation.objects.create(
+            restaurant=nowhere, name='Closed', latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'),
+            city='New York', state='NY', is_active=False,
+        )
+        for restaurant, protein in [(near, '20'), (near, '30'), (far, '50'), (nowhere, '60')]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=f'{restaurant.name} {protein}', calories=500,
+                protein=Decimal(protein), carbs=Decimal('40'), fat=Decimal('20'),
+            )
+
+    def _get(self, params):
+        cache.clear()
+        response = self.client.get('/api/v1/dishes', {**self.CENTER, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_radius_limits_to_nearby_restaurants(self):
+        """Test that radius keeps only restaurants with an active location in range."""
+        data = self._get({'radius': '5', 'sort': 'protein_desc'})
+        self.assertEqual([dish['name'] for dish in data['data']], ['Near 30', 'Near 20'])
+        self.assertEqual([dish['distance_miles'] for dish in data['data']], ['0.7', '0.7'])
+        self.assertEqual(data['filters_applied']['radius'], 5.0)
+
+    def test_distance_without_radius(self):
+        """Test that lat/lng alone annotates distances without filtering."""
+        data = self._get({'sort': 'protein_desc'})
+        distances = {dish['name']: dish['distance_miles'] for dish in data['data']}
+        self.assertEqual(distances, {'Nowhere 60': None, 'Far 50': '10.0', 'Near 30': '0.7', 'Near 20': '0.7'})
+
+    def test_distance_sort_and_cursor(self):
+        """Test that distance_asc orders by nearest location and pages with cursors."""
+        names = []
+        cursor = ''
+        while cursor is not None:
+            data = self._get({'sort': 'distance_asc', 'limit': 1, 'cursor': cursor})
+            names.extend(dish['name'] for dish in data['data'])
+            cursor = data['meta']['next_cursor']
+        self.assertEqual(names, ['Near 20', 'Near 30', 'Far 50'])
+
+    def test_location_writes_refresh_results(self):
+        """Test that cached located listings and ETags change when a location moves."""
+        params = {**self.CENTER, 'radius': '5'}
+        response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(len(response.data['data']), 2)
+        RestaurantLocation.objects.filter(name='Near').update(latitude=Decimal('41.5'))
+        response = self.client.get('/api/v1/dishes', params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [])
+
+    def test_distance_sort_needs_location(self):
+        """Test that distance_asc falls back to the default sort without lat/lng."""
+        response = self.client.get('/api/v1/dishes', {'sort': 'distance_asc'})
+        self.assertEqual(response.data['filters_applied']['sort'], DishQuery.DEFAULT_SORT)
+
+    def test_paths_agree(self):
+        """Test that sparse, fast and columnar paths return the same distances."""
+        params = {'radius': '15', 'sort': 'distance_asc', 'fields': 'name,distance_miles'}
+        expected = self._get(params)
+        self.assertEqual(expected['data'][0], {'id': expected['data'][0]['id'], 'name': 'Near 20',
+                                               'distance_miles': '0.7'})
+        for overrides in ({'FAST_SERIALIZERS': True}, {'DISH_QUERY_ENGINE': 'columnar'}):
+            with override_settings(**overrides):
+                self.assertEqual(self._get(params), expected, overrides)
+
+    def test_invalid_location(self):
+        """Test that bad coordinates are 400s."""
+        for params in (
+            {'lat': 'north', 'lng': '-74'}, {'lat': '40.7', 'lng': '-74', 'radius': '-1'},
+            {'lat': '40.7', 'lng': '-74', 'radius': 'inf'}, {'lat': '40.7', 'lng': '-74', 'radius': '1e400'},
+            {'lat': 'nan', 'lng': '-74'}, {'lat': '40.7', 'lng': 'nan'},
+        ):
+            response = self.client.get('/api/v1/dishes', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DishPresetTests(TestCase):
+    """Tests for GET /api/v1/dishes?preset=<name>."""
+
+    def setUp(self):
+        self.client = APIClient()
+        restaurant = Restaurant.objects.create(name='Cava', slug='cava')
+        for protein in range(20, 60, 5):
+            MenuItem.objects.create(
+                restaurant=restaurant, name=f'Bowl {protein}', calories=600,
+                protein=Decimal(protein), carbs=Decimal(80 - protein), fat=Decimal('20'),
+            )
+        self.preset = QuickFilter.objects.create(
+            name='high_protein', label='High Protein', icon='Zap', description='40g+',
+            filter_params={'protein': {'min': 40, 'max': None}, 'sort': 'protein_desc'},
+        )
+
+    def _names(self, params):
+        response = self.client.get('/api/v1/dishes', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [dish['name'] for dish in response.data['data']]
+
+    def test_preset_matches_expanded_query(self):
+        """Test that a preset returns what its filter_params would as plain parameters."""
+        response = self.client.get('/api/v1/dishes', {'preset': 'high_protein'})
+        self.assertEqual(response.data['filters_applied']['preset'], 'high_protein')
+        self.assertEqual(
+            [dish['name'] for dish in response.data['data']],
+            self._names({'protein_min': '40', 'sort': 'protein_desc'}),
+        )
+        self.assertEqual(response.data['meta']['total'], 4)
+
+    def test_unsupported_range_is_rejected(self):
+        """Test that a preset range with no matching filter is an error, not an unfiltered list."""
+        for filter_params, param in [({'carbs': {'min': 30}}, 'carbs_min'), ({'potassium': {'max': 500}}, 'potassium_max')]:
+            QuickFilter.objects.update_or_create(
+                name='broken', defaults={'label': 'Broken', 'icon': 'Zap', 'filter_params': filter_params},
+            )
+            response = self.client.get('/api/v1/dishes', {'preset': 'broken'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, filter_params)
+            self.assertIn(param, str(response.data['preset']))
+
+    def test_seeded_presets_resolve(self):
+        """Test that every preset from seed_config only uses supported filters."""
+        call_command('seed_config', stdout=io.StringIO())
+        for name in QuickFilter.objects.values_list('name', flat=True):
+            params = {'preset': name, 'lat': '40.7', 'lng': '-74'}
+            self.assertEqual(self.client.get('/api/v1/dishes', params).status_code, status.HTTP_200_OK, name)
+
+    def test_pages_slice_the_cached_list(self):
+        """Test that later pages are served from the cached id list plus one row query."""
+        self.assertEqual(self._names({'preset': 'high_protein', 'limit': 2}), ['Bowl 55', 'Bowl 50'])
+        with CaptureQueriesContext(connection) as queries:
+            names = self._names({'preset': 'high_protein', 'limit': 2, 'offset': 2})
+        self.assertEqual(names, ['Bowl 45', 'Bowl 40'])
+        menu_queries = [q['sql'] for q in queries.captured_queries if 'api_menuitem' in q['sql']]
+        self.assertEqual(len(menu_queries), 1)
+        self.assertIn('IN (', menu_queries[0])
+
+    def test_cursor_walk(self):
+        """Test that cursors page through a preset."""
+        names = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get('/api/v1/dishes', {'preset': 'high_protein', 'limit': 3, 'cursor': cursor})
+            names.extend(dish['name'] for dish in response.data['data'])
+            cursor = response.data['meta']['next_cursor']
+        self.assertEqual(names, ['Bowl 55', 'Bowl 50', 'Bowl 45', 'Bowl 40'])
+
+    def test_catalog_and_preset_changes_refresh(self):
+        """Test that the list is rebuilt after catalog and preset writes."""
+        self._names({'preset': 'high_protein'})
+        MenuItem.objects.filter(name='Bowl 55').update(is_available=False)
+        self.assertEqual(self._names({'preset': 'high_protein'}), ['Bowl 50', 'Bowl 45', 'Bowl 40'])
+        self.preset.filter_params = {'protein_min': 45, 'sort': 'protein_asc'}
+        self.preset.save()
+        self.assertEqual(self._names({'preset': 'high_protein'}), ['Bowl 45', 'Bowl 50'])
+
+    def test_request_params_override_preset(self):
+        """Test that explicit parameters win over the preset's."""
+        self.assertEqual(
+            self._names({'preset': 'high_protein', 'sort': 'protein_asc', 'protein_max': '45'}),
+            ['Bowl 40', 'Bowl 45'],
+        )
+
+    def test_unknown_preset(self):
+        """Test that unknown or inactive presets are 400s."""
+        self.preset.is_active = False
+        self.preset.save()
+        response = self.client.get('/api/v1/dishes', {'preset': 'high_protein'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('preset', response.data)
+
+
+class CategoryTests(TestCase):
+    """Tests for normalized categories, category= filtering and GET /api/v1/categories."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        self.cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name, category in [
+            (self.chipotle, 'Burrito', 'Entrees'),
+            (self.cava, 'Plate', 'entrée'),
+            (self.cava, 'Pita Chips', 'Sides'),
+            (self.chipotle, 'Barbacoa Special', 'Mains'),
+        ]:
+            self._item(restaurant, name, category)
+
+    def _item(self, restaurant, name, category):
+        return MenuItem.objects.create(
+            restaurant=restaurant, name=name, category=category, calories=500,
+            protein=Decimal('30'), carbs=Decimal('40'), fat=Decimal('20'),
+        )
+
+    def _names(self, params):
+        response = self.client.get('/api/v1/dishes', {'sort': 'alpha_asc', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [dish['name'] for dish in response.data['data']]
+
+    def test_category_key(self):
+        """Test that spelling, accents and plurals fold to one key."""
+        for text in ['Entrees', 'entrée', ' Entree ', 'ENTRÉES']:
+            self.assertEqual(category_key(text), 'entree')
+        self.assertEqual(category_key('Sandwiches'), 'sandwich')
+        self.assertEqual(category_key('Burrito Bowls'), 'burrito bowl')
+        self.assertEqual(category_key('Hummus'), 'hummus')
+
+    def test_spellings_share_a_category(self):
+        """Test that writes map free text onto one Category, keeping the printed text."""
+        burrito, plate = MenuItem.objects.filter(name__in=['Burrito', 'Plate']).order_by('name')
+        self.assertEqual(burrito.canonical_category_id, plate.canonical_category_id)
+        self.assertEqual(plate.category, 'entrée')
+        self.assertEqual(Category.objects.get(id=plate.canonical_category_id).slug, 'entree')
+
+    def test_filter_matches_normalized_words(self):
+        """Test that category= accepts any spelling or slug, but not partial words."""
+        self.assertEqual(self._names({'category': 'ENTRÉES'}), ['Burrito', 'Plate'])
+        self.assertEqual(self._names({'category': 'entree'}), ['Burrito', 'Plate'])
+        self.assertEqual(self._names({'category': 'entr'}), [])
+        with override_settings(DISH_QUERY_ENGINE='columnar'):
+            cache.clear()
+            self.assertEqual(self._names({'category': 'Entree'}), ['Burrito', 'Plate'])
+
+    def test_category_pill_ids(self):
+        """Test that the frontend's category pill ids match every category containing them."""
+        for restaurant, name, category in [
+            (self.chipotle, 'Egg Sandwich', 'Breakfast Sandwiches'),
+            (self.cava, 'Harvest Bowl', 'Grain Bowls'),
+            (self.cava, 'Chicken Bowl', 'Warm Bowls'),
+            (self.chipotle, 'Burrito Bowl', 'Bowls'),
+            (self.cava, 'Lentil Soup', 'Soups & Salads'),
+            (self.chipotle, 'Bowling Special', 'Bowling Night'),
+        ]:
+            self._item(restaurant, name, category)
+        self.assertEqual(self._names({'category': 'breakfast'}), ['Egg Sandwich'])
+        self.assertEqual(self._names({'category': 'bowl'}), ['Burrito Bowl', 'Chicken Bowl', 'Harvest Bowl'])
+        self.assertEqual(self._names({'category': 'sandwich'}), ['Egg Sandwich'])
+        self.assertEqual(self._names({'category': 'soup'}), ['Lentil Soup'])
+        self.assertEqual(self._names({'category': 'side'}), ['Pita Chips'])
+        self.assertEqual(self._names({'category': 'plate'}), [])
+        with override_settings(DISH_QUERY_ENGINE='columnar'):
+            cache.clear()
+            self.assertEqual(self._names({'category': 'bowl'}), ['Burrito Bowl', 'Chicken Bowl', 'Harvest Bowl'])
+
+    def test_non_latin_categories(self):
+        """Test that non-Latin categories keep distinct, non-empty slugs."""
+        self._item(self.cava, 'Hot and Sour', '汤')
+        self._item(self.cava, 'Tea', '饮料')
+        slugs = Category.objects.filter(name__in=['汤', '饮料']).values_list('slug', flat=True)
+        self.assertEqual(sorted(slugs), ['汤', '饮料'])
+        self.assertEqual(self._names({'category': '汤'}), ['Hot and Sour'])
+        self.assertTrue(category_slug('_').startswith('category-'))
+
+    def test_alias_remaps_existing_dishes(self):
+        """Test that adding an alias moves dishes with that text onto the category."""
+        entrees = Category.objects.get(slug='entree')
+        CategoryAlias.objects.filter(key='main').delete()
+        CategoryAlias.objects.create(key='Mains', category=entrees)
+        self.assertEqual(self._names({'category': 'entrees'}), ['Barbacoa Special', 'Burrito', 'Plate'])
+
+    def test_bulk_writes_resolve_categories(self):
+        """Test that bulk_create and update() keep the category link in sync."""
+        MenuItem.objects.bulk_create([
+            MenuItem(restaurant=self.cava, name='Lentil Soup', category='Soups', calories=300,
+                     protein=Decimal('12'), carbs=Decimal('40'), fat=Decimal('5')),
+        ])
+        self.assertEqual(self._names({'category': 'soup'}), ['Lentil Soup'])
+        MenuItem.objects.filter(name='Pita Chips').update(category='Entrée')
+        self.assertEqual(self._names({'category': 'entree'}), ['Burrito', 'Pita Chips', 'Plate'])
+
+    def test_category_list(self):
+        """Test distinct categories with counts, optionally per restaurant."""
+        response = self.client.get('/api/v1/categories')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(c['slug'], c['count']) for c in response.data['data']],
+            [('entree', 2), ('main', 1), ('side', 1)],
+        )
+        response = self.client.get('/api/v1/categories', {'restaurants': 'cava'})
+        self.assertEqual([(c['slug'], c['count']) for c in response.data['data']], [('entree', 1), ('side', 1)])
+
+
+class DishBatchViewTests(TestCase):
+    """Tests for GET /api/v1/dishes/batch."""
+
+    def setUp(self):
+        self.client = APIClient()
+        restaurant = Restaurant.objects.create(name='Cava', slug='cava')
+        self.bowl = MenuItem.objects.create(
+            restaurant=restaurant, name='Bowl', calories=600, protein=Decimal('40'), carbs=Decimal('50'),
+            fat=Decimal('20'), sodium=1000,
+        )
+        self.salad = MenuItem.objects.create(
+            restaurant=restaurant, name='Salad', calories=400, protein=Decimal('30'), carbs=Decimal('20'),
+            fat=Decimal('22.5'),
+        )
+        self.hidden = MenuItem.objects.create(
+            restaurant=restaurant, name='Retired', calories=400, protein=Decimal('30'), carbs=Decimal('20'),
+            fat=Decimal('20'), is_available=False,
+        )
+
+    def test_order_and_missing_ids(self):
+        """Test that payloads follow the requested order in one query, and missing ids are reported."""
+        ids = f'{self.salad.id},999999,{self.bowl.id},{self.hidden.id},{self.salad.id}'
+        self.client.get('/api/v1/dishes/batch', {'ids': ids})  # warm version lookups
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/dishes/batch', {'ids': ids})
+        self.assertEqual(len([q for q in queries.captured_queries if 'api_menuitem' in q['sql']]), 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([dish['name'] for dish in response.data['data']], ['Salad', 'Bowl'])
+        self.assertEqual(response.data['data'][0], self.client.get(f'/api/v1/dishes/{self.salad.id}').data)
+        self.assertEqual(response.data['meta'], {'requested': 4, 'found': 2, 'missing': [999999, self.hidden.id]})
+
+    def test_compare_deltas(self):
+        """Test side-by-side deltas against the first dish or a chosen baseline."""
+        params = {'ids': f'{self.bowl.id},{self.salad.id}', 'compare': 'true'}
+        deltas = self.client.get('/api/v1/dishes/batch', params).data['deltas']
+        self.assertEqual(deltas['baseline'], self.bowl.id)
+        salad = deltas['dishes'][str(self.salad.id)]
+        self.assertEqual((salad['calories'], salad['protein'], salad['fat']), (-200, '-10.0', '2.5'))
+        self.assertIsNone(salad['sodium'])
+
+        params['baseline'] = str(self.salad.id)
+        deltas = self.client.get('/api/v1/dishes/batch', params).data['deltas']
+        self.assertEqual(deltas['dishes'][str(self.bowl.id)]['calories'], 200)
+
+    def test_invalid_ids(self):
+        """Test that empty, malformed and oversized id lists are 400s."""
+        for ids in ['', 'a,b', ','.join(str(i) for i in range(1, 52))]:
+            response = self.client.get('/api/v1/dishes/batch', {'ids': ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, ids)
+            self.assertIn('ids', response.data)
+
+
+class DishFacetsViewTests(TestCase):
+    """Tests for GET /api/v1/dishes/facets endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name, category, calories, protein in [
+            (chipotle, 'Chicken Bowl', 'Bowls', 600, '45'),
+            (chipotle, 'Chips', 'Sides', 540, '7'),
+            (cava, 'Harissa Bowl', 'Bowls', 700, '38'),
+            (cava, 'Greek Salad', 'Salads', 250, '30'),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category=category, calories=calories,
+                protein=Decimal(protein), carbs=Decimal('20'), fat=Decimal('10'),
+            )
+        FilterConfiguration.objects.create(name='calories', label='Calories', unit='kcal', options=[
+            {'label': 'Any', 'min': 0, 'max': None},
+            {'label': 'Under 300', 'min': 0, 'max': 300},
+            {'label': '500-700', 'min': 500, 'max': 700},
+        ])
+
+    def test_facet_counts(self):
+        """Test counts per restaurant, category, density label and range bucket."""
+        response = self.client.get('/api/v1/dishes/facets')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['total'], 4)
+        self.assertEqual({r['slug']: r['count'] for r in data['restaurants']}, {'chipotle': 2, 'cava': 2})
+        self.assertEqual({c['value']: c['count'] for c in data['categories']}, {'Bowls': 2, 'Sides': 1, 'Salads': 1})
+        self.assertEqual({c['slug'] for c in data['categories']}, {'bowl', 'side', 'salad'})
+        self.assertEqual(data['density'], {'excellent': 0, 'good': 1, 'average': 2, 'low': 1})
+        self.assertEqual([b['count'] for b in data['ranges']['calories']], [4, 1, 3])
+
+    def test_facets_respect_filters(self):
+        """Test that facet counts use the same filters as the dish list."""
+        response = self.client.get('/api/v1/dishes/facets', {'restaurants': 'cava', 'protein_min': '35'})
+
+        data = response.data['data']
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['restaurants'], [{'slug': 'cava', 'name': 'Cava', 'count': 1}])
+        listed = self.client.get('/api/v1/dishes', {'restaurants': 'cava', 'protein_min': '35'})
+        self.assertEqual(listed.data['meta']['total'], data['total'])
+
+    def test_facets_refresh_after_catalog_change(self):
+        """Test that cached facets are invalidated by catalog writes."""
+        self.assertEqual(self.client.get('/api/v1/dishes/facets').data['data']['total'], 4)
+        MenuItem.objects.filter(name='Chips').update(is_available=False)
+        self.assertEqual(self.client.get('/api/v1/dishes/facets').data['data']['total'], 3)
+
+
+class DishListCacheTests(TestCase):
+    """Tests for the shared /api/v1/dishes response cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        for name, protein in [('Chicken Bowl', '45'), ('Steak Bowl', '40'), ('Chips', '7')]:
+            MenuItem.objects.create(
+                restaurant=self.restaurant, name=name, category='Bowls', calories=600,
+                protein=Decimal(protein), carbs=Decimal('20'), fat=Decimal('10'),
+            )
+
+    def test_equivalent_queries_hit_cache(self):
+        """Test that a repeated or reordered query is served without touching the menu tables."""
+        first = self.client.get('/api/v1/dishes', {'restaurants': 'chipotle', 'category': 'Bowls'})
+        with self.assertNumQueries(1):  # catalog version lookup only
+            second = self.client.get('/api/v1/dishes', {'category': 'bowls', 'restaurants': 'chipotle'})
+        self.assertEqual(first.data['data'], second.data['data'])
+
+    def test_cached_response_echoes_own_filters(self):
+        """Test that a cache hit reports the filters as this request spelled them."""
+        self.client.get('/api/v1/dishes', {'category': 'Bowls', 'search': 'chicken'})
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/dishes', {'category': 'bowl', 'search': '  CHICKEN '})
+        self.assertEqual(response.data['filters_applied']['category'], 'bowl')
+        self.assertEqual(response.data['filters_applied']['search'], 'CHICKEN')
+
+    def test_writes_invalidate_cache(self):
+        """Test that saves, queryset updates and restaurant updates all refresh cached listings."""
+        self.assertEqual(self.client.get('/api/v1/dishes').data['meta']['total'], 3)
+
+        MenuItem.objects.filter(name='Chips').update(is_available=False)
+        self.assertEqual(self.client.get('/api/v1/dishes').data['meta']['total'], 2)
+
+        item = MenuItem.objects.get(name='Steak Bowl')
+        item.protein = Decimal('50')
+        item.save()
+        self.assertEqual(self.client.get('/api/v1/dishes').data['data'][0]['name'], 'Steak Bowl')
+
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(name='Chipotle Mexican Grill')
+        restaurant = self.client.get('/api/v1/dishes').data['data'][0]['restaurant']
+        self.assertEqual(restaurant['name'], 'Chipotle Mexican Grill')
+
+    def test_deferred_bumps_coalesce(self):
+        """Test that a bulk write inside DataVersion.deferred() bumps the catalog once, at the end."""
+        before = DataVersion.current(DataVersion.CATALOG)
+        with DataVersion.deferred():
+            for item in MenuItem.objects.all():
+                item.protein += 1
+                item.save()
+            self.assertEqual(DataVersion.current(DataVersion.CATALOG), before)
+        self.assertGreater(DataVersion.current(DataVersion.CATALOG), before)
+
+
+class ConditionalGetTests(TestCase):
+    """Tests for ETag / Last-Modified revalidation on read endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        MenuItem.objects.create(
+            restaurant=self.restaurant, name='Chicken Bowl', category='Bowls', calories=600,
+            protein=Decimal('45'), carbs=Decimal('20'), fat=Decimal('10'),
+        )
+        RestaurantLocation.objects.create(
+            restaurant=self.restaurant, name='Chipotle - Union Square',
+            latitude=Decimal('40.7359'), longitude=Decimal('-73.9911'), city='New York', state='NY',
+        )
+
+    def test_endpoints_send_validators(self):
+        """Test that every read endpoint sends an ETag and Last-Modified."""
+        for url in ['/api/v1/dishes', '/api/v1/restaurants', '/api/v1/restaurants/chipotle',
+                    '/api/v1/stats', '/api/v1/locations', '/api/v1/config/all/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertTrue(response['ETag'].startswith('"'), url)
+            self.assertIn('Last-Modified', response, url)
+
+    def test_matching_etag_short_circuits(self):
+        """Test that a matching If-None-Match returns 304 after only the version lookup."""
+        etag = self.client.get('/api/v1/dishes', {'protein_min': '30'})['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/dishes', {'protein_min': '30'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_varies_by_query(self):
+        """Test that different query strings get different ETags."""
+        first = self.client.get('/api/v1/dishes', {'sort': 'protein_desc'})['ETag']
+        second = self.client.get('/api/v1/dishes', {'sort': 'calories_asc'})['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_writes_change_etag(self):
+        """Test that catalog, location and config writes each invalidate the right ETags."""
+        dishes = self.client.get('/api/v1/dishes')['ETag']
+        locations = self.client.get('/api/v1/locations')['ETag']
+        config = self.client.get('/api/v1/config/all/')['ETag']
+
+        RestaurantLocation.objects.update(city='Brooklyn')
+        self.assertEqual(self.client.get('/api/v1/dishes', HTTP_IF_NONE_MATCH=dishes).status_code, 304)
+        self.assertEqual(self.client.get('/api/v1/locations', HTTP_IF_NONE_MATCH=locations).status_code, 200)
+
+        FilterConfiguration.objects.create(name='protein', label='Protein', unit='g', options=[])
+        self.assertEqual(self.client.get('/api/v1/config/all/', HTTP_IF_NONE_MATCH=config).status_code, 200)
+
+        MenuItem.objects.update(calories=650)
+        self.assertEqual(self.client.get('/api/v1/dishes', HTTP_IF_NONE_MATCH=dishes).status_code, 200)
+
+
+class FastSerializerParityTests(TestCase):
+    """Tests that FAST_SERIALIZERS produces the same JSON as the DRF serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(
+            name='Chipotle', slug='chipotle', logo='restaurants/logos/chipotle.png', has_byo=True,
+        )
+        cava = Restaurant.objects.create(name='Cava', slug='cava', logo_url='https://example.com/cava.png')
+        for restaurant, name, calories, protein, fat in [
+            (chipotle, 'Chicken Bowl', 600, '45', '21.5'),
+            (chipotle, 'Chips', 540, '7', '25'),
+            (chipotle, 'Water', 0, '0', '0'),
+            (cava, 'Harissa Bowl', 700, '38.2', '30'),
+            (cava, 'Greek Salad', 250, '30', '12.25'),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category='Bowls', calories=calories,
+                protein=Decimal(protein), carbs=Decimal('20'), fat=Decimal(fat), image_url='https://example.com/a.png',
+            )
+        for restaurant, lat, lng in [
+            (chipotle, '40.7359000', '-73.9911000'),
+            (chipotle, '40.7505000', '-73.9934000'),
+            (cava, '40.7128000', '-74.0060000'),
+        ]:
+            RestaurantLocation.objects.create(
+                restaurant=restaurant, name=f'{restaurant.name} {lat}', latitude=Decimal(lat),
+                longitude=Decimal(lng), city='New York', state='NY', postcode='10003',
+            )
+
+    def assert_same_json(self, url, params):
+        responses = []
+        for fast in [False, True]:
+            cache.clear()  # the dish response cache would otherwise answer the second request
+            with self.settings(FAST_SERIALIZERS=fast):
+                responses.append(self.client.get(url, params, HTTP_ACCEPT='application/json').content)
+        self.assertEqual(responses[1], responses[0], params)
+
+    def test_dish_list_parity(self):
+        """Test dish listings across sorts, search and cursor pages."""
+        for params in [{}, {'sort': 'fat_desc'}, {'search': 'bowl'}, {'cursor': '', 'limit': '2'},
+                       {'sort': 'alpha_asc', 'offset': '1', 'limit': '2'}]:
+            self.assert_same_json('/api/v1/dishes', params)
+
+    def test_location_list_parity(self):
+        """Test location listings with and without the distance annotation."""
+        for params in [{}, {'lat': '40.7359', 'lng': '-73.9911', 'radius': '5'}]:
+            self.assert_same_json('/api/v1/locations', params)
+
+
+class SideloadedRestaurantTests(TestCase):
+    """Tests for ?include=restaurants on dish and location listings."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        self.cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name in [(self.chipotle, 'Chicken Bowl'), (self.chipotle, 'Steak Bowl'), (self.cava, 'Harissa Bowl')]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category='Bowls', calories=600,
+                protein=Decimal('40'), carbs=Decimal('20'), fat=Decimal('10'),
+            )
+            RestaurantLocation.objects.create(
+                restaurant=restaurant, name=name, latitude=Decimal('40.7359'), longitude=Decimal('-73.9911'),
+            )
+
+    def test_dishes_sideload(self):
+        """Test that rows carry restaurant_id and each restaurant is included once."""
+        for fast in [False, True]:
+            cache.clear()
+            with self.settings(FAST_SERIALIZERS=fast):
+                response = self.client.get('/api/v1/dishes', {'include': 'restaurants'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(all('restaurant' not in row for row in response.data['data']))
+            self.assertEqual({row['restaurant_id'] for row in response.data['data']}, {self.chipotle.id, self.cava.id})
+            restaurants = response.data['included']['restaurants']
+            self.assertEqual(set(restaurants), {str(self.chipotle.id), str(self.cava.id)})
+            self.assertEqual(restaurants[str(self.cava.id)]['slug'], 'cava')
+
+    def test_locations_sideload(self):
+        """Test the same shape on the location listing, including only restaurants on the page."""
+        for fast in [False, True]:
+            with self.settings(FAST_SERIALIZERS=fast):
+                response = self.client.get('/api/v1/locations', {'include': 'restaurants', 'restaurants': 'cava'})
+            self.assertEqual([row['restaurant_id'] for row in response.data['data']], [self.cava.id])
+            self.assertEqual(list(response.data['included']['restaurants']), [str(self.cava.id)])
+
+    def test_default_shape_unchanged(self):
+        """Test that the nested restaurant is still returned without include."""
+        response = self.client.get('/api/v1/dishes')
+        self.assertNotIn('included', response.data)
+        self.assertEqual({row['restaurant']['slug'] for row in response.data['data']}, {'chipotle', 'cava'})
+
+    def test_unknown_include(self):
+        """Test that unsupported include values are rejected."""
+        response = self.client.get('/api/v1/locations', {'include': 'menu'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('include', response.data)
+
+
+class SparseFieldsetTests(TestCase):
+    """Tests for fields= and restaurant.fields= on dish and location listings."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.restaurant = Restaurant.objects.create(name='Chipotle', slug='chipotle', logo_url='https://example.com/c.png')
+        MenuItem.objects.create(
+            restaurant=self.restaurant, name='Chicken Bowl', category='Bowls', serving_size='1 bowl', calories=600,
+            protein=Decimal('45'), carbs=Decimal('20'), fat=Decimal('10'),
+        )
+        RestaurantLocation.objects.create(
+            restaurant=self.restaurant, name='Union Square', latitude=Decimal('40.7359'),
+            longitude=Decimal('-73.9911'), address='1 Union Sq', city='New York', state='NY',
+        )
+
+    def get(self, url, params, fast):
+        cache.clear()
+        with self.settings(FAST_SERIALIZERS=fast), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_dish_fields(self):
+        """Test that fields= narrows the output and the selected columns."""
+        params = {'fields': 'name,protein,restaurant', 'restaurant.fields': 'slug'}
+        for fast in [False, True]:
+            response, sql = self.get('/api/v1/dishes', params, fast)
+            self.assertEqual(response.data['data'], [
+                {'id': response.data['data'][0]['id'], 'name': 'Chicken Bowl', 'restaurant': {
+                    'id': self.restaurant.id, 'slug': 'chipotle'}, 'protein': '45.0'},
+            ])
+            self.assertEqual(list(response.data['data'][0]), ['id', 'name', 'restaurant', 'protein'])
+            self.assertNotIn('serving_size', sql)
+            self.assertNotIn('logo_url', sql)
+
+    def test_location_fields(self):
+        """Test the map's minimal location shape, with sideloaded restaurants narrowed too."""
+        params = {'fields': 'latitude,longitude,restaurant', 'restaurant.fields': 'name', 'include': 'restaurants'}
+        for fast in [False, True]:
+            response, sql = self.get('/api/v1/locations', params, fast)
+            row = response.data['data'][0]
+            self.assertEqual(set(row), {'id', 'restaurant_id', 'latitude', 'longitude'})
+            self.assertEqual(response.data['included']['restaurants'][str(self.restaurant.id)],
+                             {'id': self.restaurant.id, 'name': 'Chipotle'})
+            self.assertNotIn('address', sql)
+
+    def test_unknown_field(self):
+        """Test that unknown field names are rejected."""
+        response = self.client.get('/api/v1/dishes', {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        response = self.client.get('/api/v1/locations', {'restaurant.fields': 'menu'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('restaurant.fields', response.data)
+
+
+class SearchSuggestTests(TestCase):
+    """Tests for GET /api/v1/search/suggest endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle', item_count=3)
+        self.chick = Restaurant.objects.create(name='Chick-fil-A', slug='chick-fil-a', item_count=1)
+        for restaurant, name, category, calories, protein in [
+            (self.chipotle, 'Chicken Burrito Bowl', 'Bowls', 600, '45'),
+            (self.chipotle, 'Chicken Quesadilla', 'Entrées', 1000, '50'),
+            (self.chipotle, 'Chips', 'Sides', 540, '7'),
+            (self.chick, 'Grilled Chicken Nuggets', 'Entrées', 130, '25'),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category=category, calories=calories,
+                protein=Decimal(protein), carbs=Decimal('20'), fat=Decimal('10'),
+            )
+
+    def _suggest(self, q, **params):
+        response = self.client.get('/api/v1/search/suggest', {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['data']
+
+    def test_dishes_ranked_by_density(self):
+        """Test that word-prefix matches rank by protein per 100 calories."""
+        dishes = self._suggest('chick')['dishes']
+        self.assertEqual([d['name'] for d in dishes],
+                         ['Grilled Chicken Nuggets', 'Chicken Burrito Bowl', 'Chicken Quesadilla'])
+        self.assertEqual(dishes[0]['restaurant'], {'slug': 'chick-fil-a', 'name': 'Chick-fil-A'})
+        self.assertEqual([d['name'] for d in self._suggest('chicken bu')['dishes']], ['Chicken Burrito Bowl'])
+
+    def test_restaurants_and_categories(self):
+        """Test restaurant and category completions, ignoring case and accents."""
+        data = self._suggest('CHI')
+        self.assertEqual([r['slug'] for r in data['restaurants']], ['chipotle', 'chick-fil-a'])
+        self.assertEqual(self._suggest('entree')['categories'], [{'value': 'entree', 'name': 'Entrées', 'count': 2}])
+
+    def test_category_spellings_share_one_suggestion(self):
+        """Test that every spelling of a category completes to its canonical name and filter value."""
+        MenuItem.objects.create(
+            restaurant=self.chick, name='Spicy Sandwich', category='Entree', calories=450,
+            protein=Decimal('28'), carbs=Decimal('40'), fat=Decimal('19'),
+        )
+        self.assertEqual(self._suggest('entr')['categories'], [{'value': 'entree', 'name': 'Entrées', 'count': 3}])
+        response = self.client.get('/api/v1/dishes', {'category': 'entree'})
+        self.assertEqual(response.data['meta']['total'], 3)
+
+    def test_limit_and_empty_query(self):
+        """Test the limit parameter and that a blank query returns nothing."""
+        self.assertEqual(len(self._suggest('c', limit=1)['dishes']), 1)
+        self.assertEqual(self._suggest('  '), {'dishes': [], 'restaurants': [], 'categories': []})
+
+    def test_refreshes_after_catalog_change(self):
+        """Test that renamed, new and unavailable dishes show up after a write."""
+        self._suggest('chi')
+        MenuItem.objects.filter(name='Chips').update(name='Tortilla Chips')
+        MenuItem.objects.filter(name='Chicken Quesadilla').update(is_available=False)
+        MenuItem.objects.create(
+            restaurant=self.chipotle, name='Chicken Salad', category='Salads', calories=400,
+            protein=Decimal('40'), carbs=Decimal('20'), fat=Decimal('10'),
+        )
+        names = [d['name'] for d in self._suggest('chi')['dishes']]
+        self.assertEqual(names, ['Grilled Chicken Nuggets', 'Chicken Salad', 'Chicken Burrito Bowl', 'Tortilla Chips'])
+
+
+class PrefixIndexTests(TestCase):
+    """Tests for incremental updates of the suggestion prefix index."""
+
+    def test_apply_matches_rebuild(self):
+        """Test that applying changes gives the same results as building from scratch."""
+        entries = {pk: (f'Chicken Dish {pk}', (pk % 7, pk)) for pk in range(200)}
+        index = PrefixIndex(entries)
+        added = {pk: (f'Chicken Bowl {pk}', (9, pk)) for pk in range(300, 310)}
+        added[5] = ('Steak Plate', (8, 5))
+        updated = index.apply({5, 6, 7}, added)
+
+        expected_entries = {pk: entry for pk, entry in entries.items() if pk not in {5, 6, 7}}
+        expected_entries.update(added)
+        expected = PrefixIndex(expected_entries)
+        for prefix in ['c', 'chicken', 'chicken d', 'chicken bowl', 'dish 1', 'steak', 's']:
+            self.assertEqual(updated.search(prefix, 20), expected.search(prefix, 20), prefix)
+        self.assertEqual(index.search('steak'), [])
+
+
+class DishNearestViewTests(TestCase):
+    """Tests for GET /api/v1/dishes/nearest endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name, calories, protein, carbs, fat, vegetarian in [
+            (chipotle, 'Chicken Bowl', 600, '50', '40', '15', False),
+            (chipotle, 'Sofritas Bowl', 550, '20', '60', '20', True),
+            (chipotle, 'Chips', 540, '7', '73', '25', True),
+            (cava, 'Steak Plate', 700, '52', '45', '30', False),
+            (cava, 'Falafel Bowl', 650, '22', '70', '28', True),
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category='Bowls', calories=calories,
+                protein=Decimal(protein), carbs=Decimal(carbs), fat=Decimal(fat), is_vegetarian=vegetarian,
+            )
+
+    def _names(self, **params):
+        response = self.client.get('/api/v1/dishes/nearest', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['data']]
+
+    def test_closest_to_target(self):
+        """Test that results are ordered by distance to the macro target."""
+        response = self.client.get('/api/v1/dishes/nearest', {'protein': 50, 'carbs': 40, 'fat': 15, 'k': 2})
+        data = response.data['data']
+        self.assertEqual([item['name'] for item in data], ['Chicken Bowl', 'Sofritas Bowl'])
+        self.assertEqual(data[0]['distance'], 0)
+        self.assertLess(data[0]['distance'], data[1]['distance'])
+
+    def test_single_dimension_and_weights(self):
+        """Test a protein-only target and that weights shift the ranking."""
+        self.assertEqual(self._names(protein=21, k=2), ['Sofritas Bowl', 'Falafel Bowl'])
+        self.assertEqual(self._names(protein=50, fat=30, k=1), ['Steak Plate'])
+        self.assertEqual(self._names(protein=50, fat=30, k=1, weights='fat:0'), ['Chicken Bowl'])
+
+    def test_filters(self):
+        """Test that restaurant and diet filters are honoured."""
+        self.assertEqual(self._names(protein=50, carbs=40, fat=15, k=1, restaurants='cava'), ['Steak Plate'])
+        self.assertEqual(self._names(protein=50, k=5, diet='vegetarian', restaurants='chipotle'),
+                         ['Sofritas Bowl', 'Chips'])
+
+    def test_validation(self):
+        """Test missing targets and malformed parameters."""
+        for params in [
+            {}, {'protein': 'lots'}, {'protein': 30, 'weights': 'sugar:2'}, {'protein': 30, 'diet': 'keto'},
+            {'protein': 'nan', 'calories': 500}, {'protein': 'inf'}, {'protein': 30, 'weights': 'protein:nan'},
+            {'protein': 30, 'weights': 'protein:inf'}, {'protein': 30, 'weights': 'protein:-1'},
+        ]:
+            response = self.client.get('/api/v1/dishes/nearest', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class KDTreeTests(TestCase):
+    """Tests that the macro KD-tree agrees with a brute-force scan."""
+
+    def test_matches_brute_force(self):
+        """Test weighted searches, including a single active dimension."""
+        import random
+        rng = random.Random(7)
+        points = [tuple(rng.random() for _ in range(4)) for _ in range(2000)]
+        tree = KDTree(points, list(range(len(points))))
+        for weights in [(1, 1, 1, 1), (0, 2, 1, 0.5), (0, 1, 0, 0)]:
+            target = tuple(rng.random() for _ in range(4))
+            expected = sorted(
+                (sum(w * (p[a] - target[a]) ** 2 for a, w in enumerate(weights)), i) for i, p in enumerate(points)
+            )[:10]
+            self.assertEqual([i for _, i in tree.nearest(target, weights, 10)], [i for _, i in expected])
+
+
+class DishParetoViewTests(TestCase):
+    """Tests for GET /api/v1/dishes/pareto endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        chipotle = Restaurant.objects.create(name='Chipotle', slug='chipotle')
+        cava = Restaurant.objects.create(name='Cava', slug='cava')
+        for restaurant, name, calories, protein, carbs in [
+            (chipotle, 'Chicken Salad', 300, '30', '10'),
+            (chipotle, 'Chicken Bowl', 600, '50', '40'),
+            (chipotle, 'Chips', 540, '7', '73'),        # dominated by Chicken Salad
+            (cava, 'Steak Plate', 700, '45', '20'),     # dominated by Chicken Bowl unless carbs count
+            (cava, 'Double Chicken', 900, '80', '45'),
+            (cava, 'Water', 0, '0', '0'),               # zero-calorie items are excluded
+        ]:
+            MenuItem.objects.create(
+                restaurant=restaurant, name=name, category='Bowls', calories=calories,
+                protein=Decimal(protein), carbs=Decimal(carbs), fat=Decimal('10'),
+            )
+
+    def _names(self, **params):
+        response = self.client.get('/api/v1/dishes/pareto', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['data']]
+
+    def test_protein_vs_calories(self):
+        """Test the two-objective frontier, ordered by calories."""
+        self.assertEqual(self._names(), ['Chicken Salad', 'Chicken Bowl', 'Double Chicken'])
+
+    def test_extra_objectives(self):
+        """Test that minimizing carbs brings back dishes that win on carbs."""
+        self.assertEqual(self._names(minimize='carbs'), ['Chicken Salad', 'Chicken Bowl', 'Steak Plate', 'Double Chicken'])
+        self.assertEqual(self._names(minimize='carbs,fat'), self._names(minimize='carbs'))
+
+    def test_respects_filters(self):
+        """Test that DishListView filters scope the frontier."""
+        self.assertEqual(self._names(restaurants='cava'), ['Steak Plate', 'Double Chicken'])
+        self.assertEqual(self._names(calories_max=650), ['Chicken Salad', 'Chicken Bowl'])
+
+    def test_invalid_objective(self):
+        """Test that only carbs and fat can be added as objectives."""
+        response = self.client.get('/api/v1/dishes/pareto', {'minimize': 'sugar'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ParetoFrontierTests(TestCase):
+    """Tests that the frontier sweeps agree with a pairwise dominance check."""
+
+    def test_matches_pairwise(self):
+        """Test two, three and four objectives on random integer macros (with ties)."""
+        import random
+        rng = random.Random(11)
+        rows = [
+            {'id': i, 'calories': rng.randint(100, 1200), 'protein': rng.randint(0, 60),
+             'carbs': rng.randint(0, 100), 'fat': rng.randint(0, 50)}
+            for i in range(400)
+        ]
+        for minimize in [(), ('carbs',), ('carbs', 'fat')]:
+            keys = {row['id']: objective_key(row, minimize) for row in rows}
+            expected = {
+                pk for pk, key in keys.items()
+                if not any(other != key and all(a <= b for a, b in zip(other, key)) for other in keys.values())
+            }
+            self.assertEqual({row['id'] for row in pareto_frontier(rows, minimize)}, expected, minimize)
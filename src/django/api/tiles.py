@@ -0,0 +1,185 @@
+"""Mapbox Vector Tiles (MVT 2.1) of active restaurant locations.
+
+Each tile has one `locations` layer of points, with the location id as the
+feature id and the restaurant's slug and brand color as attributes. Only
+points are encoded, so the protobuf is written by hand instead of pulling
+in a vector tile library.
+
+Rendered tiles are written to LOCATION_TILE_ROOT/<version>/<z>/<x>/<y>.mvt,
+where the version is the locations DataVersion, which restaurant slug and
+brand color edits also bump, so menu changes keep the cache. A
+versioned tile never changes, so nginx serves those files directly and
+only the first request for each tile reaches Django. Directories of older
+versions are removed when a new version is first written.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from .clusters import project
+from .geo import in_box
+from .models import RestaurantLocation
+
+LAYER_NAME = 'locations'
+EXTENT = 4096
+# Points this far outside a tile (in tile units) are included, so markers on an edge are not clipped
+BUFFER = 64
+MAX_ZOOM = 22
+ATTRIBUTES = ['restaurant_slug', 'brand_color']
+
+
+def tile_bounds(z, x, y, buffer=0.0):
+    """(min_lat, max_lat, min_lng, max_lng) of a tile, widened by `buffer` tile widths on each side."""
+    n = 2 ** z
+
+    def lat(row):
+        row = min(max(row, 0), n)
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1 + buffer), lat(y - buffer), (x - buffer) / n * 360 - 180, (x + 1 + buffer) / n * 360 - 180
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, wire_type):
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes(number, payload):
+    """A length-delimited field."""
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _uint(number, value):
+    return _field(number, 0) + _varint(value)
+
+
+def _packed(number, values):
+    return _bytes(number, b''.join(_varint(value) for value in values))
+
+
+def encode_tile(features):
+    """Encode [(id, x, y, {attribute: string}), ...] (tile coordinates) as an MVT with one layer."""
+    keys = {}
+    values = {}
+    encoded = []
+    for pk, x, y, attributes in features:
+        tags = []
+        for key, value in attributes.items():
+            if value in (None, ''):
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(value, len(values)))
+        # One MoveTo command (id 1, count 1) with the zigzag-encoded position
+        geometry = [(1 << 3) | 1, _zigzag(x), _zigzag(y)]
+        encoded.append(_bytes(2, _uint(1, pk) + _packed(2, tags) + _uint(3, 1) + _packed(4, geometry)))
+
+    layer = (
+        _uint(15, 2)
+        + _bytes(1, LAYER_NAME.encode())
+        + b''.join(encoded)
+        + b''.join(_bytes(3, key.encode()) for key in keys)
+        + b''.join(_bytes(4, _bytes(1, value.encode())) for value in values)
+        + _uint(5, EXTENT)
+    )
+    return _bytes(3, layer)
+
+
+def render_tile(z, x, y):
+    """MVT bytes for one tile, from the active locations inside it (plus BUFFER)."""
+    n = 2 ** z
+    min_lat, max_lat, min_lng, max_lng = tile_bounds(z, x, y, BUFFER / EXTENT)
+    locations = in_box(RestaurantLocation.objects.filter(is_active=True), min_lat, max_lat, min_lng, max_lng)
+    rows = locations.order_by('id').values_list(
+        'id', 'latitude', 'longitude', 'restaurant__slug', 'restaurant__brand_color',
+    )
+    features = []
+    for pk, lat, lng, slug, color in rows:
+        mercator_x, mercator_y = project(float(lat), float(lng))
+        tile_x = mercator_x * n - x
+        # Buffer points from across the antimeridian belong just outside this tile's edge
+        if tile_x > n / 2:
+            tile_x -= n
+        elif tile_x < -n / 2:
+            tile_x += n
+        features.append((
+            pk,
+            round(tile_x * EXTENT),
+            round((mercator_y * n - y) * EXTENT),
+            dict(zip(ATTRIBUTES, [slug, color])),
+        ))
+    return encode_tile(features)
+
+
+def tile_root():
+    return settings.LOCATION_TILE_ROOT
+
+
+def get_tile(version, z, x, y):
+    """The tile for `version` from disk, rendering and storing it on first use."""
+    path = os.path.join(tile_root(), version, str(z), str(x), f'{y}.mvt')
+    try:
+        with open(path, 'rb') as tile:
+            return tile.read()
+    except FileNotFoundError:
+        pass
+
+    data = render_tile(z, x, y)
+    try:
+        if not os.path.isdir(os.path.join(tile_root(), version)) and not _remove_old_versions(version):
+            return data  # a newer version is already on disk; do not recreate this one
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so nginx never serves a partial file
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(handle, 'wb') as tile:
+            tile.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except OSError:
+        pass  # a concurrent cleanup or a read-only disk only costs the cache
+    return data
+
+
+def tile_version(versions):
+    """Directory name for a list of DataVersion values."""
+    return '-'.join(str(version) for version in versions)
+
+
+def _version_key(name):
+    try:
+        return [int(part) for part in name.split('-')]
+    except ValueError:
+        return None
+
+
+def _remove_old_versions(version):
+    """Delete directories of versions older than `version`; False if a newer one exists."""
+    current = _version_key(version)
+    if not os.path.isdir(tile_root()):
+        return True
+    for name in os.listdir(tile_root()):
+        key = _version_key(name)
+        if key is None or key == current:
+            continue
+        if all(old <= new for old, new in zip(key, current)):
+            shutil.rmtree(os.path.join(tile_root(), name), ignore_errors=True)
+        else:
+            return False
+    return True
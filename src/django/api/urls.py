@@ -1,18 +1,34 @@
 from django.urls import path
 from .views import (
-    DishListView, DishDetailView,
+    DishListView, DishFacetsView, DishNearestView, DishParetoView, DishDetailView, DishBatchView,
     RestaurantListView, RestaurantDetailView,
     StatsView, DataFlagCreateView,
-    LocationListView, LocationDetailView, LocationFlagCreateView,
-    ByoComponentListView,
+    LocationListView, LocationClusterView, LocationTileView, LocationTileJSONView, LocationDetailView,
+    LocationExportView, LocationFlagCreateView,
+    ByoComponentListView, SearchSuggestView, CategoryListView,
 )
 
 urlpatterns = [
     path('dishes', DishListView.as_view(), name='dish-list'),
+    path('dishes/facets', DishFacetsView.as_view(), name='dish-facets'),
+    path('dishes/nearest', DishNearestView.as_view(), name='dish-nearest'),
+    path('dishes/pareto', DishParetoView.as_view(), name='dish-pareto'),
+    path('dishes/batch', DishBatchView.as_view(), name='dish-batch'),
     path('dishes/<int:pk>', DishDetailView.as_view(), name='dish-detail'),
+    path('categories', CategoryListView.as_view(), name='category-list'),
+    path('search/suggest', SearchSuggestView.as_view(), name='search-suggest'),
     path('restaurants', RestaurantListView.as_view(), name='restaurant-list'),
     path('restaurants/<slug:slug>', RestaurantDetailView.as_view(), name='restaurant-detail'),
     path('locations', LocationListView.as_view(), name='location-list'),
+    path('locations/clusters', LocationClusterView.as_view(), name='location-clusters'),
+    path('locations/tiles.json', LocationTileJSONView.as_view(), name='location-tilejson'),
+    path('locations/tiles/<int:z>/<int:x>/<int:y>.mvt', LocationTileView.as_view(), name='location-tile'),
+    path(
+        'locations/tiles/<slug:version>/<int:z>/<int:x>/<int:y>.mvt',
+        LocationTileView.as_view(),
+        name='location-tile-versioned',
+    ),
+    path('locations/export.<str:export_format>', LocationExportView.as_view(), name='location-export'),
     path('locations/<int:pk>', LocationDetailView.as_view(), name='location-detail'),
     path('stats', StatsView.as_view(), name='stats'),
     path('flags', DataFlagCreateView.as_view(), name='flag-create'),
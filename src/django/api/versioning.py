@@ -0,0 +1,39 @@
+"""Per-worker in-process caches keyed by a DataVersion counter."""
+import threading
+
+from .models import DataVersion
+
+
+class VersionedCache:
+    """Hold one value built from the database, rebuilt when its data version moves.
+
+    Each request pays a single indexed lookup on DataVersion. The value is only
+    rebuilt by the first request that sees a new version. With `refresher`,
+    a value that already exists is passed to it instead, so indexes can apply
+    just the rows that changed.
+    """
+
+    def __init__(self, version_name, builder, refresher=None):
+        self.version_name = version_name
+        self.builder = builder
+        self.refresher = refresher
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def get(self):
+        version = DataVersion.current(self.version_name)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._value is not None and self.refresher is not None:
+                        self._value = self.refresher(self._value)
+                    else:
+                        self._value = self.builder()
+                    self._version = version
+        return self._value
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._value = None
@@ -1,118 +1,331 @@
 from decimal import Decimal, InvalidOperation
-from django.db.models import Q, Max, F, ExpressionWrapper, DecimalField, FloatField, Value
-from django.db.models.functions import ACos, Cos, Radians, Sin
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.db.models import Count, Max
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 
-from .models import Restaurant, MenuItem, DataFlag, RestaurantLocation, LocationFlag, ByoComponent
+from .models import (
+    Category, DataVersion, Restaurant, MenuItem, DataFlag, RestaurantLocation, LocationFlag, ByoComponent,
+)
 from .serializers import (
     RestaurantListSerializer, RestaurantDetailSerializer,
-    MenuItemListSerializer, MenuItemDetailSerializer, DataFlagSerializer,
-    LocationListSerializer, LocationDetailSerializer, LocationFlagSerializer,
+    MenuItemListSerializer, MenuItemSideloadSerializer, MenuItemDetailSerializer, DataFlagSerializer,
+    LocationListSerializer, LocationSideloadSerializer, LocationDetailSerializer, LocationFlagSerializer,
     ByoComponentSerializer,
 )
+from .conditional import data_versions, versioned
+from .fast_serializers import (
+    FastLocationListSerializer, FastMenuItemListSerializer,
+    decimal_string, fast_serializers_enabled, rounded_string,
+)
+from .pagination import KeysetPaginator
+from .fieldsets import RESTAURANT_FIELDS, Fieldset, parse_fields
+from .export import FORMATS as EXPORT_FORMATS, accepts_gzip, encode, gzip_chunks, location_features
+from .geo import annotate_distance, in_box, within_radius
+from .clusters import cluster_index, parse_cluster_query, unproject
+from .location_index import get_location_index
+from .sideload import included_restaurants, parse_include
+from .queries import DishQuery
+from .engine import get_dish_engine
+from .facets import get_dish_facets
+from .macros import macro_index, parse_macro_query
+from .pareto import OPTIONAL_OBJECTIVES, get_pareto_ids
+from .presets import get_preset_list, resolve_preset
+from .suggest import DEFAULT_LIMIT as SUGGEST_LIMIT, MAX_LIMIT as SUGGEST_MAX_LIMIT, suggest_index
+from .tiles import (
+    ATTRIBUTES as TILE_ATTRIBUTES, LAYER_NAME as TILE_LAYER, MAX_ZOOM as TILE_MAX_ZOOM, get_tile, tile_version,
+)
+
+# Same format as LocationListSerializer.distance_miles
+format_miles = rounded_string(1)
+
+# Restaurant slug and brand color edits bump LOCATIONS too, so dish edits leave tiles alone
+LOCATION_TILE_VERSIONS = (DataVersion.LOCATIONS,)
+TILE_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
 
+def dish_versions(request):
+    return DishQuery.versions_for(request.GET)
 
+
+@method_decorator(versioned(dish_versions), name='get')
 class DishListView(APIView):
-    SORT_OPTIONS = {
-        'protein_desc': '-protein',
-        'protein_asc': 'protein',
-        'calories_asc': 'calories',
-        'calories_desc': '-calories',
-        'protein_ratio_desc': '-protein_per_100cal_sort',
-        'carbs_asc': 'carbs',
-        'fat_desc': '-fat',
-        'fat_asc': 'fat',
-        'alpha_asc': 'name',
-    }
+    SORT_OPTIONS = DishQuery.SORT_OPTIONS
+    # Keys embed the catalog version, so entries never go stale; the timeout only evicts
+    CACHE_TIMEOUT = 60 * 60 * 24
 
     def get(self, request):
-        queryset = MenuItem.objects.filter(is_available=True).select_related('restaurant')
-        filters_applied = {}
-
-        # Search
-        search = request.query_params.get('search', '').strip()
-        if search:
-            queryset = queryset.filter(Q(name__icontains=search) | Q(restaurant__name__icontains=search))
-            filters_applied['search'] = search
-
-        # Filters
-        for param, field, cast in [
-            ('calories_min', 'calories__gte', int),
-            ('calories_max', 'calories__lte', int),
-            ('protein_min', 'protein__gte', Decimal),
-            ('protein_max', 'protein__lte', Decimal),
-            ('carbs_max', 'carbs__lte', Decimal),
-            ('fat_min', 'fat__gte', Decimal),
-            ('fat_max', 'fat__lte', Decimal),
-        ]:
-            value = request.query_params.get(param)
-            if value:
-                try:
-                    queryset = queryset.filter(**{field: cast(value)})
-                    filters_applied[param] = float(value) if cast == Decimal else int(value)
-                except (ValueError, InvalidOperation):
-                    raise ValidationError({param: f'{param} must be a valid number'})
-
-        # Category filter
-        category = request.query_params.get('category', '').strip()
-        if category:
-            queryset = queryset.filter(category__icontains=category)
-            filters_applied['category'] = category
-
-        # Restaurant filter
-        restaurants = request.query_params.get('restaurants', '').strip()
-        if restaurants:
-            slugs = [s.strip() for s in restaurants.split(',')]
-            queryset = queryset.filter(restaurant__slug__in=slugs)
-            filters_applied['restaurants'] = slugs
-
-        # Sorting
-        sort_param = request.query_params.get('sort', 'protein_ratio_desc')
-        if sort_param not in self.SORT_OPTIONS:
-            sort_param = 'protein_ratio_desc'
-        filters_applied['sort'] = sort_param
-
-        if sort_param == 'protein_ratio_desc':
-            queryset = queryset.filter(calories__gt=0).annotate(
-                protein_per_100cal_sort=ExpressionWrapper(
-                    F('protein') * 100.0 / F('calories'),
-                    output_field=DecimalField(max_digits=5, decimal_places=2)
-                )
-            )
-        queryset = queryset.order_by(self.SORT_OPTIONS[sort_param])
-
-        total = queryset.count()
+        params, preset = resolve_preset(request.query_params)
+        query = DishQuery(params)
+        paginator = KeysetPaginator(MenuItem, query.sort, query.ordering)
 
         # Pagination
         try:
-            limit = min(int(request.query_params.get('limit', 20)), 100)
+            # At least one row, so every cursor page has a last row to continue from
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
             offset = max(int(request.query_params.get('offset', 0)), 0)
         except ValueError:
             limit, offset = 20, 0
 
-        queryset = queryset[offset:offset + limit]
-        serializer = MenuItemListSerializer(queryset, many=True, context={'request': request})
+        # Cursor mode: pass `cursor` (empty for the first page) and follow `next_cursor`
+        cursor_mode = 'cursor' in request.query_params
+        cursor = request.query_params.get('cursor', '').strip()
+
+        # Sideloading: rows carry restaurant_id, restaurants are listed once under `included`
+        sideload = 'restaurants' in parse_include(request.query_params)
+        fieldset = Fieldset(request.query_params, [*MenuItemListSerializer.Meta.fields, 'distance_miles'])
+        # With lat/lng, each dish carries the distance to its restaurant's nearest location
+        with_distance = query.location is not None and 'distance_miles' in fieldset
+        extra = [paginator.field, 'restaurant_id'] if with_distance else [paginator.field]
+
+        versions = data_versions(request, *query.version_names)[0]
+        cache_key = query.cache_key(
+            'dish-list',
+            versions,
+            getattr(settings, 'DISH_QUERY_ENGINE', 'orm'),
+            limit,
+            ['cursor', cursor] if cursor_mode else ['offset', offset],
+            sideload,
+            fieldset.key,
+        )
+        # filters_applied echoes this request's own spelling, so it is not cached
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return Response({**payload, 'filters_applied': query.filters_applied})
+
+        fast = None
+        if fast_serializers_enabled():
+            fast = FastMenuItemListSerializer(sideload, **fieldset.serializer_kwargs)
+
+        def narrow(queryset):
+            if fast:
+                return fast.values(queryset, *extra)
+            return fieldset.narrow(queryset, nested=not sideload, extra=extra)
+
+        # Presets page through a cached id list; the columnar engine through its column arrays
+        preset_list = get_preset_list(preset, query, versions)
+        engine = get_dish_engine()
+        if preset_list is not None:
+            rows, meta = self._engine_page(preset_list, query, paginator, cursor_mode, cursor, limit, offset, narrow)
+        elif engine is not None and engine.supports(query):
+            rows, meta = self._engine_page(engine, query, paginator, cursor_mode, cursor, limit, offset, narrow)
+        else:
+            queryset = narrow(paginator.order(query.filter(MenuItem.objects.filter(is_available=True))))
+            rows, meta = self._queryset_page(queryset, paginator, cursor_mode, cursor, limit, offset)
+        if query.did_you_mean:
+            meta['did_you_mean'] = query.did_you_mean
+
+        rows = list(rows)
+        if fast:
+            data = fast.serialize(rows)
+        else:
+            serializer_class = MenuItemSideloadSerializer if sideload else MenuItemListSerializer
+            data = serializer_class(rows, many=True, context={'request': request}, **fieldset.serializer_kwargs).data
+        if with_distance:
+            distances = query.distances
+            for row, item in zip(rows, data):
+                restaurant_id = row['restaurant_id'] if isinstance(row, dict) else row.restaurant_id
+                item['distance_miles'] = format_miles(distances.get(restaurant_id))
+
+        payload = {'data': data}
+        if sideload:
+            ids = {item['restaurant_id'] for item in data if 'restaurant_id' in item}
+            payload['included'] = included_restaurants(ids, fieldset.restaurant_fields)
+        payload['meta'] = meta
+        cache.set(cache_key, payload, self.CACHE_TIMEOUT)
+        return Response({**payload, 'filters_applied': query.filters_applied})
+
+    def _queryset_page(self, queryset, paginator, cursor_mode, cursor, limit, offset):
+        if cursor_mode:
+            rows, next_cursor = paginator.paginate(queryset, cursor, limit)
+            meta = {'limit': limit, 'next_cursor': next_cursor, 'has_more': next_cursor is not None}
+            if not cursor:
+                meta['total'] = queryset.count()
+            return rows, meta
+
+        total = queryset.count()
+        rows = queryset[offset:offset + limit]
+        return rows, {'total': total, 'limit': limit, 'offset': offset, 'has_more': offset + limit < total}
+
+    def _engine_page(self, engine, query, paginator, cursor_mode, cursor, limit, offset, narrow):
+        if cursor_mode:
+            after = paginator.decode(cursor) if cursor else None
+            ids, total = engine.select(query, 0, limit + 1, after)
+        else:
+            ids, total = engine.select(query, offset, limit)
+
+        rows_by_id = {}
+        for row in narrow(MenuItem.objects.filter(id__in=ids)):
+            rows_by_id[row['id'] if isinstance(row, dict) else row.id] = row
+        rows = [rows_by_id[pk] for pk in ids if pk in rows_by_id]
+
+        if cursor_mode:
+            next_cursor = paginator.encode(rows[limit - 1]) if len(rows) > limit else None
+            meta = {'limit': limit, 'next_cursor': next_cursor, 'has_more': next_cursor is not None}
+            if not cursor:
+                meta['total'] = total
+            return rows[:limit], meta
+        return rows, {'total': total, 'limit': limit, 'offset': offset, 'has_more': offset + limit < total}
+
+
+@method_decorator(versioned(dish_versions, DataVersion.CONFIG), name='get')
+class DishFacetsView(APIView):
+    """Per-option dish counts for the filter drawer, for the same params as DishListView."""
 
+    def get(self, request):
+        query = DishQuery(request.query_params)
+        return Response({
+            'data': get_dish_facets(query),
+            'filters_applied': query.filters_applied,
+        })
+
+
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
+class DishNearestView(APIView):
+    """Dishes closest to a macro target (calories/protein/carbs/fat) in normalized macro space."""
+
+    def get(self, request):
+        target, weights, k, restaurants, diets = parse_macro_query(request.query_params)
+        matches = macro_index.get().nearest(target, weights, k, restaurants, diets)
+
+        rows = MenuItem.objects.select_related('restaurant').in_bulk([pk for pk, _ in matches])
+        data = []
+        for pk, distance in matches:
+            if pk in rows:
+                item = MenuItemListSerializer(rows[pk], context={'request': request}).data
+                item['distance'] = distance
+                data.append(item)
+
+        return Response({
+            'data': data,
+            'meta': {
+                'target': target,
+                'weights': {dim: weights.get(dim, 1.0) for dim in target},
+                'k': k,
+                'restaurants': restaurants,
+                'diet': diets,
+            },
+        })
+
+
+@method_decorator(versioned(dish_versions), name='get')
+class DishParetoView(APIView):
+    """Dishes not dominated on protein vs. calories (and optionally carbs/fat), for DishListView filters."""
+
+    def get(self, request):
+        query = DishQuery(request.query_params)
+        minimize = [name.strip() for name in request.query_params.get('minimize', '').split(',') if name.strip()]
+        if set(minimize) - set(OPTIONAL_OBJECTIVES):
+            raise ValidationError({'minimize': f"minimize supports: {', '.join(OPTIONAL_OBJECTIVES)}"})
+        minimize = [name for name in OPTIONAL_OBJECTIVES if name in minimize]
+
+        ids = get_pareto_ids(query, minimize)
+        rows = MenuItem.objects.select_related('restaurant').in_bulk(ids)
+        dishes = [rows[pk] for pk in ids if pk in rows]
+
+        filters_applied = {key: value for key, value in query.filters_applied.items() if key != 'sort'}
         return Response({
-            'data': serializer.data,
-            'meta': {'total': total, 'limit': limit, 'offset': offset, 'has_more': offset + limit < total},
+            'data': MenuItemListSerializer(dishes, many=True, context={'request': request}).data,
+            'meta': {'total': len(dishes), 'objectives': ['protein', 'calories', *minimize]},
             'filters_applied': filters_applied,
         })
 
 
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
+class SearchSuggestView(APIView):
+    """Typeahead completions for the SearchBar from the in-process prefix index."""
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', SUGGEST_LIMIT)), SUGGEST_MAX_LIMIT)
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        return Response({
+            'data': suggest_index.get().suggest(query, max(limit, 1)),
+            'meta': {'q': query, 'limit': limit},
+        })
+
+
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
 class DishDetailView(generics.RetrieveAPIView):
     queryset = MenuItem.objects.filter(is_available=True).select_related('restaurant')
     serializer_class = MenuItemDetailSerializer
 
 
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
+class DishBatchView(APIView):
+    """Detail payloads for several dishes in one query, in the requested order.
+
+    With compare=true, `deltas` gives each dish's nutrient differences from the
+    baseline dish (the first found, or baseline=<id>).
+    """
+    MAX_IDS = 50
+    DELTA_FIELDS = ['calories', 'protein', 'carbs', 'fat', 'fiber', 'sodium', 'sugar', 'saturated_fat',
+                    'protein_per_100cal']
+
+    def get(self, request):
+        ids = self._parse_ids(request.query_params.get('ids', ''))
+        dishes = MenuItem.objects.filter(is_available=True, id__in=ids).select_related('restaurant')
+        by_id = {dish.id: dish for dish in dishes}
+        found = [by_id[pk] for pk in ids if pk in by_id]
+
+        payload = {
+            'data': MenuItemDetailSerializer(found, many=True, context={'request': request}).data,
+            'meta': {
+                'requested': len(ids),
+                'found': len(found),
+                'missing': [pk for pk in ids if pk not in by_id],
+            },
+        }
+        if request.query_params.get('compare', '').lower() in ('1', 'true') and found:
+            payload['deltas'] = self._deltas(found, request.query_params.get('baseline'))
+        return Response(payload)
+
+    def _parse_ids(self, raw):
+        try:
+            ids = list(dict.fromkeys(int(part) for part in raw.split(',') if part.strip()))
+        except ValueError:
+            raise ValidationError({'ids': 'ids must be comma-separated dish ids'})
+        if not ids:
+            raise ValidationError({'ids': 'give at least one dish id'})
+        if len(ids) > self.MAX_IDS:
+            raise ValidationError({'ids': f'at most {self.MAX_IDS} ids per request'})
+        return ids
+
+    def _deltas(self, dishes, baseline_id):
+        """{'baseline': id, 'dishes': {id: {field: difference}}}; None where either value is unknown."""
+        baseline = dishes[0]
+        if baseline_id:
+            baseline = next((dish for dish in dishes if str(dish.id) == baseline_id.strip()), None)
+            if baseline is None:
+                raise ValidationError({'baseline': 'baseline must be one of the found ids'})
+        deltas = {}
+        for dish in dishes:
+            deltas[str(dish.id)] = {}
+            for field in self.DELTA_FIELDS:
+                value, reference = getattr(dish, field), getattr(baseline, field)
+                delta = None if value is None or reference is None else value - reference
+                deltas[str(dish.id)][field] = decimal_string(delta) if isinstance(delta, Decimal) else delta
+        return {'baseline': baseline.id, 'dishes': deltas}
+
+
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
 class RestaurantListView(generics.ListAPIView):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantListSerializer
 
 
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
 class RestaurantDetailView(generics.RetrieveAPIView):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantDetailSerializer
@@ -126,6 +339,30 @@ class RestaurantDetailView(generics.RetrieveAPIView):
         return response
 
 
+@method_decorator(versioned(DataVersion.CATALOG), name='get')
+class CategoryListView(APIView):
+    """Normalized categories that have available dishes, with counts (optionally per restaurants=)."""
+
+    def get(self, request):
+        dishes = MenuItem.objects.filter(is_available=True, canonical_category__isnull=False)
+        restaurants = [s.strip() for s in request.query_params.get('restaurants', '').split(',') if s.strip()]
+        if restaurants:
+            dishes = dishes.filter(restaurant__slug__in=restaurants)
+        counts = (
+            dishes.values('canonical_category_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        counts = {row['canonical_category_id']: row['count'] for row in counts}
+        categories = Category.objects.filter(id__in=counts).values('id', 'slug', 'name')
+        data = sorted(
+            ({'slug': row['slug'], 'name': row['name'], 'count': counts[row['id']]} for row in categories),
+            key=lambda category: (-category['count'], category['name']),
+        )
+        return Response({'data': data})
+
+
+@method_decorator(versioned(DataVersion.CATALOG, DataVersion.LOCATIONS), name='get')
 class StatsView(APIView):
     def get(self, request):
         total_dishes = MenuItem.objects.filter(is_available=True).count()
@@ -134,9 +371,9 @@ class StatsView(APIView):
         last_updated = MenuItem.objects.aggregate(last=Max('updated_at'))['last']
 
         top_protein = MenuItem.objects.filter(is_available=True).order_by('-protein').first()
-        best_ratio = MenuItem.objects.filter(is_available=True, calories__gt=0, calories__gte=200).annotate(
-            ratio=ExpressionWrapper(F('protein') * 100.0 / F('calories'), output_field=DecimalField(max_digits=5, decimal_places=2))
-        ).order_by('-ratio').first()
+        best_ratio = MenuItem.objects.filter(
+            is_available=True, calories__gte=200
+        ).order_by('-protein_per_100cal').first()
 
         return Response({
             'total_dishes': total_dishes,
@@ -161,11 +398,12 @@ class DataFlagCreateView(generics.CreateAPIView):
         return Response({'message': 'Thank you for your report.'}, status=status.HTTP_201_CREATED)
 
 
+@method_decorator(versioned(DataVersion.LOCATIONS, DataVersion.CATALOG), name='get')
 class LocationListView(APIView):
     """List restaurant locations with geospatial filtering and distance calculation."""
 
     def get(self, request):
-        queryset = RestaurantLocation.objects.filter(is_active=True).select_related('restaurant')
+        queryset = RestaurantLocation.objects.filter(is_active=True)
 
         # Parse query params
         user_lat = request.query_params.get('lat')
@@ -180,66 +418,89 @@ class LocationListView(APIView):
         except ValueError:
             limit = 100
 
-        # Filter by restaurant slugs
-        if restaurants:
-            slugs = [s.strip() for s in restaurants.split(',')]
-            queryset = queryset.filter(restaurant__slug__in=slugs)
-
-        # Bounding box filtering
         if bbox:
             try:
                 sw_lat, sw_lng, ne_lat, ne_lng = [Decimal(x.strip()) for x in bbox.split(',')]
-                queryset = queryset.filter(
-                    latitude__gte=sw_lat,
-                    latitude__lte=ne_lat,
-                    longitude__gte=sw_lng,
-                    longitude__lte=ne_lng
-                )
             except (ValueError, InvalidOperation):
                 raise ValidationError({'bbox': 'bbox must be 4 comma-separated numbers: sw_lat,sw_lng,ne_lat,ne_lng'})
+            if not all(value.is_finite() for value in (sw_lat, sw_lng, ne_lat, ne_lng)):
+                raise ValidationError({'bbox': 'bbox values must be finite numbers'})
 
-        # Distance calculation and radius filtering
         distance_calculated = False
         if user_lat and user_lng:
             try:
                 user_lat = Decimal(user_lat)
                 user_lng = Decimal(user_lng)
                 radius_miles = Decimal(radius)
-
-                # Haversine formula for distance calculation (in miles)
-                # distance = 3959 * acos(cos(radians(lat1)) * cos(radians(lat2)) * cos(radians(lng2) - radians(lng1)) + sin(radians(lat1)) * sin(radians(lat2)))
-                queryset = queryset.annotate(
-                    distance_miles=ExpressionWrapper(
-                        Value(3959.0) * ACos(
-                            Cos(Radians(Value(float(user_lat)))) *
-                            Cos(Radians(F('latitude'))) *
-                            Cos(Radians(F('longitude')) - Radians(Value(float(user_lng)))) +
-                            Sin(Radians(Value(float(user_lat)))) *
-                            Sin(Radians(F('latitude')))
-                        ),
-                        output_field=FloatField()
-                    )
+            except (ValueError, InvalidOperation):
+                raise ValidationError({'lat/lng': 'lat, lng, and radius must be valid numbers'})
+            if not all(value.is_finite() for value in (user_lat, user_lng, radius_miles)):
+                raise ValidationError({'lat/lng': 'lat, lng, and radius must be finite numbers'})
+            distance_calculated = True
+
+        slugs = [s.strip() for s in restaurants.split(',')] if restaurants else []
+        location_index = get_location_index() if distance_calculated else None
+        if location_index is not None:
+            # In-process index: ids and distances in order, then one query for the page's rows
+            restaurant_ids = None
+            if slugs:
+                restaurant_ids = list(Restaurant.objects.filter(slug__in=slugs).values_list('id', flat=True))
+            if bbox:
+                indices = location_index.in_box(
+                    float(sw_lat), float(ne_lat), float(sw_lng), float(ne_lng), restaurant_ids,
                 )
-                distance_calculated = True
+                matches = location_index.distances(indices, float(user_lat), float(user_lng))
+            else:
+                matches = location_index.within(float(user_lat), float(user_lng), float(radius_miles), restaurant_ids)
+            total = len(matches)
+            distances = dict(matches[:limit])
+            queryset = queryset.filter(id__in=list(distances))
+        else:
+            # Filter by restaurant slugs
+            if slugs:
+                queryset = queryset.filter(restaurant__slug__in=slugs)
 
-                # Filter by radius if not using bbox
+            # Bounding box filtering
+            if bbox:
+                queryset = in_box(queryset, sw_lat, ne_lat, sw_lng, ne_lng)
+
+            # Distance calculation and radius filtering
+            if distance_calculated:
+                # Filter by radius if not using bbox: prune by grid cell, then check exact distances
+                if not bbox:
+                    queryset = within_radius(queryset, float(user_lat), float(user_lng), float(radius_miles))
+                queryset = annotate_distance(queryset, float(user_lat), float(user_lng))
                 if not bbox:
                     queryset = queryset.filter(distance_miles__lte=float(radius_miles))
 
                 # Order by distance
                 queryset = queryset.order_by('distance_miles')
+            else:
+                # No distance calculation, order by restaurant name and city
+                queryset = queryset.order_by('restaurant__name', 'city')
+            total = queryset.count()
 
-            except (ValueError, InvalidOperation):
-                raise ValidationError({'lat/lng': 'lat, lng, and radius must be valid numbers'})
-        else:
-            # No distance calculation, order by restaurant name and city
-            queryset = queryset.order_by('restaurant__name', 'city')
+        sideload = 'restaurants' in parse_include(request.query_params)
+        fieldset = Fieldset(request.query_params, LocationListSerializer.Meta.fields)
 
         # Apply limit
-        total = queryset.count()
-        queryset = queryset[:limit]
-
-        serializer = LocationListSerializer(queryset, many=True, context={'request': request})
+        if fast_serializers_enabled():
+            fast = FastLocationListSerializer(sideload, **fieldset.serializer_kwargs)
+            if location_index is not None:
+                rows = self._index_page(fast.values(queryset), distances)
+            else:
+                rows = fast.values(queryset, *(['distance_miles'] if distance_calculated else []))[:limit]
+            data = fast.serialize(rows)
+        else:
+            serializer_class = LocationSideloadSerializer if sideload else LocationListSerializer
+            queryset = fieldset.narrow(queryset, nested=not sideload)
+            if location_index is not None:
+                page = self._index_page(queryset, distances)
+            else:
+                page = queryset[:limit]
+            data = serializer_class(
+                page, many=True, context={'request': request}, **fieldset.serializer_kwargs
+            ).data
 
         # Build meta response
         meta = {
@@ -252,12 +513,140 @@ class LocationListView(APIView):
             meta['center_lng'] = float(user_lng)
             meta['radius_miles'] = float(radius)
 
+        payload = {'data': data}
+        if sideload:
+            ids = {item['restaurant_id'] for item in data if 'restaurant_id' in item}
+            payload['included'] = included_restaurants(ids, fieldset.restaurant_fields)
+        payload['meta'] = meta
+        return Response(payload)
+
+    def _index_page(self, rows, distances):
+        """Rows (dicts or instances) in index order, carrying the index's distance_miles."""
+        rows_by_id = {}
+        for row in rows:
+            if isinstance(row, dict):
+                rows_by_id[row['id']] = row
+                row['distance_miles'] = distances[row['id']]
+            else:
+                rows_by_id[row.id] = row
+                row.distance_miles = distances[row.id]
+        return [rows_by_id[pk] for pk in distances if pk in rows_by_id]
+
+
+@method_decorator(versioned(DataVersion.LOCATIONS, DataVersion.CATALOG), name='get')
+class LocationClusterView(APIView):
+    """Map clusters and single locations inside a bbox at one zoom level (see api/clusters.py).
+
+    Every active location is counted at any zoom; there is no limit. Each
+    item carries a per-restaurant breakdown, and the restaurants are
+    sideloaded under `included`.
+    """
+
+    def get(self, request):
+        zoom, bbox = parse_cluster_query(request.query_params)
+        restaurant_fields = parse_fields(request.query_params, 'restaurant.fields', RESTAURANT_FIELDS)
+        nodes = cluster_index.get().clusters(zoom, bbox)
+
+        data = []
+        restaurant_ids = set()
+        for node in nodes:
+            lat, lng = unproject(node.x, node.y)
+            item = {
+                'id': node.id,
+                'cluster': node.is_cluster,
+                'count': node.count,
+                'latitude': round(lat, 7),
+                'longitude': round(lng, 7),
+            }
+            if node.is_cluster:
+                item['expansion_zoom'] = node.expansion_zoom
+            item['restaurants'] = [
+                {'restaurant_id': restaurant_id, 'count': count}
+                for restaurant_id, count in sorted(node.restaurants.items(), key=lambda entry: (-entry[1], entry[0]))
+            ]
+            restaurant_ids.update(node.restaurants)
+            data.append(item)
+
         return Response({
-            'data': serializer.data,
-            'meta': meta,
+            'data': data,
+            'included': included_restaurants(restaurant_ids, restaurant_fields),
+            'meta': {
+                'zoom': zoom,
+                'clusters': sum(1 for node in nodes if node.is_cluster),
+                'locations': sum(node.count for node in nodes),
+            },
         })
 
 
+@method_decorator(versioned(*LOCATION_TILE_VERSIONS), name='get')
+class LocationTileView(View):
+    """Mapbox Vector Tile of active locations (see api/tiles.py).
+
+    tiles/{z}/{x}/{y}.mvt serves the current data. tiles/{version}/{z}/{x}/{y}.mvt,
+    the template listed by tiles.json, is immutable and can be served from
+    disk by nginx; a stale version redirects to the current one. A plain
+    Django view, since DRF content negotiation would refuse tile Accept headers.
+    """
+
+    def get(self, request, z, x, y, version=None):
+        if z > TILE_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            raise Http404('No such tile')
+        current = tile_version(data_versions(request, *LOCATION_TILE_VERSIONS)[0])
+        if version is not None and version != current:
+            return redirect('location-tile-versioned', version=current, z=z, x=x, y=y)
+        response = HttpResponse(get_tile(current, z, x, y), content_type=TILE_CONTENT_TYPE)
+        if version is not None:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
+@method_decorator(versioned(*LOCATION_TILE_VERSIONS), name='get')
+class LocationTileJSONView(APIView):
+    """TileJSON for the location tiles, pointing at the current immutable tile URLs."""
+
+    def get(self, request):
+        current = tile_version(data_versions(request, *LOCATION_TILE_VERSIONS)[0])
+        template = request.build_absolute_uri(
+            reverse('location-tile-versioned', kwargs={'version': current, 'z': 0, 'x': 0, 'y': 0})
+        ).replace('/0/0/0.mvt', '/{z}/{x}/{y}.mvt')
+        return Response({
+            'tilejson': '3.0.0',
+            'tiles': [template],
+            'minzoom': 0,
+            'maxzoom': TILE_MAX_ZOOM,
+            'vector_layers': [{
+                'id': TILE_LAYER,
+                'fields': {name: 'String' for name in TILE_ATTRIBUTES},
+            }],
+        })
+
+
+class LocationExportView(View):
+    """Every active location as a streamed GeoJSON FeatureCollection or NDJSON (see api/export.py).
+
+    Gzipped when the client accepts it. There is no limit, and rows are
+    streamed from a database cursor instead of being built into a list.
+    A plain Django view, since DRF content negotiation would refuse the
+    GeoJSON and NDJSON Accept headers.
+    """
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404(f"export formats: {', '.join(EXPORT_FORMATS)}")
+        chunks = encode(location_features(), export_format)
+        gzipped = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        response = StreamingHttpResponse(
+            gzip_chunks(chunks) if gzipped else chunks,
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Content-Disposition'] = f'attachment; filename="locations.{export_format}"'
+        return response
+
+
+@method_decorator(versioned(DataVersion.LOCATIONS, DataVersion.CATALOG), name='get')
 class LocationDetailView(generics.RetrieveAPIView):
     """Retrieve detailed information about a single restaurant location."""
     queryset = RestaurantLocation.objects.filter(is_active=True).select_related('restaurant')
@@ -72,7 +72,64 @@ class Command(BaseCommand):
             ]
         )
 
-        self.stdout.write(self.style.SUCCESS('✓ Created 4 filter configurations'))
+        # Optional nutrients: 'Any' has no min, so dishes with unknown values still count
+        FilterConfiguration.objects.create(
+            name='fiber',
+            label='Fiber',
+            unit='g',
+            order=5,
+            options=[
+                {'label': 'Any', 'min': None, 'max': None},
+                {'label': 'Under 3g', 'min': 0, 'max': 3},
+                {'label': '3-6g', 'min': 3, 'max': 6},
+                {'label': '6-10g', 'min': 6, 'max': 10},
+                {'label': 'Over 10g', 'min': 10, 'max': None}
+            ]
+        )
+
+        FilterConfiguration.objects.create(
+            name='sodium',
+            label='Sodium',
+            unit='mg',
+            order=6,
+            options=[
+                {'label': 'Any', 'min': None, 'max': None},
+                {'label': 'Under 500mg', 'min': 0, 'max': 500},
+                {'label': '500-1000mg', 'min': 500, 'max': 1000},
+                {'label': '1000-1500mg', 'min': 1000, 'max': 1500},
+                {'label': 'Over 1500mg', 'min': 1500, 'max': None}
+            ]
+        )
+
+        FilterConfiguration.objects.create(
+            name='sugar',
+            label='Sugar',
+            unit='g',
+            order=7,
+            options=[
+                {'label': 'Any', 'min': None, 'max': None},
+                {'label': 'Under 5g', 'min': 0, 'max': 5},
+                {'label': '5-10g', 'min': 5, 'max': 10},
+                {'label': '10-20g', 'min': 10, 'max': 20},
+                {'label': 'Over 20g', 'min': 20, 'max': None}
+            ]
+        )
+
+        FilterConfiguration.objects.create(
+            name='saturated_fat',
+            label='Saturated Fat',
+            unit='g',
+            order=8,
+            options=[
+                {'label': 'Any', 'min': None, 'max': None},
+                {'label': 'Under 3g', 'min': 0, 'max': 3},
+                {'label': '3-6g', 'min': 3, 'max': 6},
+                {'label': '6-10g', 'min': 6, 'max': 10},
+                {'label': 'Over 10g', 'min': 10, 'max': None}
+            ]
+        )
+
+        self.stdout.write(self.style.SUCCESS('✓ Created 8 filter configurations'))
 
         # Seed Quick Filters
         self.stdout.write('Creating quick filters...')
@@ -98,7 +155,7 @@ class Command(BaseCommand):
             requires_location=False,
             order=2,
             filter_params={
-                'carbs': {'min': 0, 'max': 20},
+                'carbs': {'min': None, 'max': 20},
                 'sort': 'carbs_asc'
             }
         )
@@ -160,8 +217,12 @@ class Command(BaseCommand):
             {'value': 'carbs_desc', 'label': 'Carbs (High to Low)', 'order': 8},
             {'value': 'fat_asc', 'label': 'Fat (Low to High)', 'order': 9},
             {'value': 'fat_desc', 'label': 'Fat (High to Low)', 'order': 10},
-            {'value': 'distance_asc', 'label': 'Distance (Nearest First)', 'requires_location': True, 'order': 11},
-            {'value': 'distance_desc', 'label': 'Distance (Farthest First)', 'requires_location': True, 'order': 12},
+            {'value': 'fiber_desc', 'label': 'Fiber (High to Low)', 'order': 11},
+            {'value': 'sodium_asc', 'label': 'Sodium (Low to High)', 'order': 12},
+            {'value': 'sugar_asc', 'label': 'Sugar (Low to High)', 'order': 13},
+            {'value': 'saturated_fat_asc', 'label': 'Saturated Fat (Low to High)', 'order': 14},
+            {'value': 'distance_asc', 'label': 'Distance (Nearest First)', 'requires_location': True, 'order': 15},
+            {'value': 'distance_desc', 'label': 'Distance (Farthest First)', 'requires_location': True, 'order': 16},
         ]
 
         for sort_data in sort_options:
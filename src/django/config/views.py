@@ -1,4 +1,6 @@
 import hashlib
+from api.conditional import versioned
+from api.models import DataVersion
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models import FilterConfiguration, QuickFilter, SortOption, AppConfiguration
@@ -11,6 +13,7 @@ from .serializers import (
 
 
 @api_view(['GET'])
+@versioned(DataVersion.CONFIG, DataVersion.CATALOG)
 def config_all(request):
     """
     Returns all configuration data for the frontend.
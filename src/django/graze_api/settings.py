@@ -68,6 +68,15 @@ DATABASES = {
     }
 }
 
+# Shared by every worker in production (DatabaseCache, see .env.production.example)
+# so a cached dish listing is computed once, not once per gunicorn worker
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='graze'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -86,12 +95,24 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered location vector tiles, one directory per data version (api/tiles.py); nginx serves them from here
+LOCATION_TILE_ROOT = config('LOCATION_TILE_ROOT', default=str(MEDIA_ROOT / 'tiles' / 'locations'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOWED_ORIGINS = config('CORS_ORIGINS', default='http://localhost:5173', cast=Csv())
 
 ANTHROPIC_API_KEY = config('ANTHROPIC_API_KEY', default='')
 
+# Dish listing backend: 'orm' (database) or 'columnar' (in-memory NumPy engine, see api/engine.py)
+DISH_QUERY_ENGINE = config('DISH_QUERY_ENGINE', default='orm')
+
+# Answer location searches around a lat/lng from an in-process KD-tree instead of SQL (api/location_index.py)
+LOCATION_INDEX = config('LOCATION_INDEX', default=False, cast=bool)
+
+# Build dish/location list payloads from .values() rows instead of DRF serializers (api/fast_serializers.py)
+FAST_SERIALIZERS = config('FAST_SERIALIZERS', default=False, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': None,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
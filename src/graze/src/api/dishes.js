@@ -9,12 +9,39 @@ export async function getDishes(params = {}, signal = null) {
   return response.data
 }
 
+export async function getNearestDishes(params = {}) {
+  const response = await apiClient.get('/dishes/nearest', { params })
+  return response.data
+}
+
+export async function getSearchSuggestions(q, limit = 8, signal = null) {
+  const config = { params: { q, limit } }
+  if (signal) {
+    config.signal = signal
+  }
+  const response = await apiClient.get('/search/suggest', config)
+  return response.data
+}
+
 export async function getDish(id) {
   const response = await apiClient.get(`/dishes/${id}`)
   return response.data
 }
 
+// Detail payloads for up to 50 dishes in one request; meta.missing lists ids that no longer exist
+export async function getDishesBatch(ids, { compare = false } = {}) {
+  const params = { ids: ids.join(',') }
+  if (compare) params.compare = 'true'
+  const response = await apiClient.get('/dishes/batch', { params })
+  return response.data
+}
+
 export async function createFlag(data) {
   const response = await apiClient.post('/flags', data)
   return response.data
 }
+
+export async function getCategories(params = {}) {
+  const response = await apiClient.get('/categories', { params })
+  return response.data
+}
@@ -9,6 +9,16 @@ export async function getLocations(params = {}, signal = null) {
   return response.data
 }
 
+// Server-side clusters for a map viewport: { bbox: 'sw_lat,sw_lng,ne_lat,ne_lng', zoom }
+export async function getLocationClusters(params, signal = null) {
+  const config = { params }
+  if (signal) {
+    config.signal = signal
+  }
+  const response = await apiClient.get('/locations/clusters', config)
+  return response.data
+}
+
 export async function getLocation(id) {
   const response = await apiClient.get(`/locations/${id}`)
   return response.data
@@ -24,6 +24,8 @@ export const useDishesStore = defineStore('dishes', {
       carbsMax: null,
       fatMin: null,
       fatMax: null,
+      // Other FilterConfiguration ranges (fiber, sodium, ...): { name: { min, max } }
+      nutrientRanges: {},
       selectedRestaurants: [],
       category: null,
 
@@ -36,7 +38,7 @@ export const useDishesStore = defineStore('dishes', {
 
       // Pagination - use config default
       limit: configStore.appSettings?.items_per_page || 20,
-      offset: 0,
+      nextCursor: null,
       hasMore: false,
     }
   },
@@ -48,6 +50,7 @@ export const useDishesStore = defineStore('dishes', {
       if (state.proteinMin || state.proteinMax) count++
       if (state.carbsMax) count++
       if (state.fatMin || state.fatMax) count++
+      count += Object.values(state.nutrientRanges).filter(r => r.min != null || r.max != null).length
       if (state.selectedRestaurants.length > 0) count++
       if (state.radiusMiles) count++
       return count
@@ -69,7 +72,8 @@ export const useDishesStore = defineStore('dishes', {
 
       const params = {
         limit: this.limit,
-        offset: append ? this.offset : 0,
+        // Cursor pagination: empty cursor starts a new listing
+        cursor: append ? this.nextCursor : '',
         sort: this.sort,
       }
 
@@ -81,6 +85,10 @@ export const useDishesStore = defineStore('dishes', {
       if (this.carbsMax) params.carbs_max = this.carbsMax
       if (this.fatMin) params.fat_min = this.fatMin
       if (this.fatMax) params.fat_max = this.fatMax
+      for (const [name, range] of Object.entries(this.nutrientRanges)) {
+        if (range.min != null) params[`${name}_min`] = range.min
+        if (range.max != null) params[`${name}_max`] = range.max
+      }
       if (this.selectedRestaurants.length > 0) {
         params.restaurants = this.selectedRestaurants.join(',')
       }
@@ -103,12 +111,11 @@ export const useDishesStore = defineStore('dishes', {
           this.dishes = [...this.dishes, ...response.data]
         } else {
           this.dishes = response.data
-          this.offset = 0
+          this.total = response.meta.total
         }
 
-        this.total = response.meta.total
         this.hasMore = response.meta.has_more
-        this.offset = response.meta.offset + response.meta.limit
+        this.nextCursor = response.meta.next_cursor
       } catch (error) {
         // Don't set error state if request was aborted
         if (error.name !== 'AbortError' && error.name !== 'CanceledError') {
@@ -154,6 +161,12 @@ export const useDishesStore = defineStore('dishes', {
       this.fetchDishes()
     },
 
+    // Range filter for any FilterConfiguration name the API accepts as <name>_min/<name>_max
+    setNutrientFilter(name, min, max) {
+      this.nutrientRanges = { ...this.nutrientRanges, [name]: { min, max } }
+      this.fetchDishes()
+    },
+
     setRestaurants(slugs) {
       this.selectedRestaurants = slugs
       this.fetchDishes()
@@ -200,6 +213,7 @@ export const useDishesStore = defineStore('dishes', {
       this.carbsMax = null
       this.fatMin = null
       this.fatMax = null
+      this.nutrientRanges = {}
       this.selectedRestaurants = []
       this.category = null
       this.radiusMiles = null
@@ -1,5 +1,8 @@
 import { defineStore } from 'pinia'
-import { getDish } from '../api/dishes'
+import { getDishesBatch } from '../api/dishes'
+
+// Server-side cap on ids per batch request
+const BATCH_SIZE = 50
 
 const STORAGE_KEY = 'graze_favorites'
 
@@ -34,10 +37,12 @@ export const useFavoritesStore = defineStore('favorites', {
 
       this.loading = true
       try {
-        const dishes = await Promise.all(
-          this.favoriteIds.map(id => getDish(id).catch(() => null))
-        )
-        this.favoriteDishes = dishes.filter(Boolean)
+        const batches = []
+        for (let i = 0; i < this.favoriteIds.length; i += BATCH_SIZE) {
+          batches.push(getDishesBatch(this.favoriteIds.slice(i, i + BATCH_SIZE)))
+        }
+        const responses = await Promise.all(batches)
+        this.favoriteDishes = responses.flatMap(response => response.data)
       } catch (e) {
         console.error('Failed to load favorites:', e)
       } finally {